@@ -1,6 +1,8 @@
 import random
 import os
 import time
+import tracemalloc
+from itertools import repeat
 
 # AWS services with their descriptions
 aws_services = {
@@ -25,9 +27,11 @@ def clear_screen():
     """Clear the terminal screen."""
     os.system('cls' if os.name == 'nt' else 'clear')
 
-def display_hangman(tries):
-    """Display the hangman based on the number of tries left."""
-    stages = [
+# Selection pool built once instead of list(aws_services.keys()) every round
+SERVICE_POOL = tuple(aws_services)
+
+# Hangman drawings indexed by tries left
+STAGES = [
         """
            --------
            |      |
@@ -91,98 +95,180 @@ def display_hangman(tries):
            |     
            -
         """
-    ]
-    return stages[tries]
+]
 
-def play_hangman():
-    """Main function to play the Hangman game."""
-    clear_screen()
-    print("\nWelcome to AWS Hangman!")
-    print("Guess the AWS service name based on its description.\n")
+# Guesses used by scripted sessions when no script file is given (common letters first)
+DEFAULT_SCRIPT = "ETAOINSHRDLUCMFWYPVBGKQJXZ0123456789"
+
+def display_hangman(tries):
+    """Display the hangman based on the number of tries left."""
+    return STAGES[tries]
+
+class RoundState:
+    """State of the current round, reset in place between rounds."""
+    __slots__ = ("service", "description", "word", "guessed_letters", "guessed_words", "tries", "guessed")
+
+    def __init__(self):
+        self.word = []
+        self.guessed_letters = []
+        self.guessed_words = []
+        self.service = None
+        self.description = None
+        self.tries = 6
+        self.guessed = False
+
+    def reset(self, service):
+        """Start a new round for service, reusing the existing lists."""
+        self.service = service
+        self.description = aws_services[service]
+        self.word.clear()
+        self.word.extend(repeat('_', len(service)))
+        self.guessed_letters.clear()
+        self.guessed_words.clear()
+        self.tries = 6
+        self.guessed = False
+
+def apply_guess(state, guess):
+    """Apply one guess to the round and return a message describing it."""
+    service = state.service
     
-    # Select a random AWS service
-    service = random.choice(list(aws_services.keys()))
-    description = aws_services[service]
+    # Check if the guess is a single letter
+    if len(guess) == 1 and guess.isalnum():
+        if guess in state.guessed_letters:
+            return f"You already guessed the letter {guess}"
+        state.guessed_letters.append(guess)
+        if guess not in service:
+            state.tries -= 1
+            return f"{guess} is not in the word."
+        
+        # Update the word completion in place
+        word = state.word
+        for index, letter in enumerate(service):
+            if letter == guess:
+                word[index] = guess
+        if "_" not in word:
+            state.guessed = True
+        return f"Good job, {guess} is in the word!"
     
-    # Initialize game variables
-    word_completion = '_' * len(service)
-    guessed = False
-    guessed_letters = []
-    guessed_words = []
-    tries = 6
+    # Check if the guess is a word
+    if len(guess) == len(service) and guess.isalnum():
+        if guess in state.guessed_words:
+            return f"You already guessed the word {guess}"
+        if guess != service:
+            state.tries -= 1
+            state.guessed_words.append(guess)
+            return f"{guess} is not the word."
+        state.guessed = True
+        state.word[:] = service
+        return ""
     
-    print(f"Hint: {description}")
-    print(display_hangman(tries))
-    print(f"Word: {' '.join(word_completion)}")
+    return "Not a valid guess."
+
+def show_state(state):
+    """Print the hint, hangman and guesses so far."""
+    print(f"Hint: {state.description}")
+    print(display_hangman(state.tries))
+    print(f"Word: {' '.join(state.word)}")
+    print(f"Letters guessed: {', '.join(state.guessed_letters)}")
+    print(f"Words guessed: {', '.join(state.guessed_words)}")
+    print(f"Tries left: {state.tries}")
     print("\n")
+
+def play_round(state, read_guess=input, interactive=True):
+    """Play one round with a randomly selected service; returns True if it was guessed.
+
+    The round is lost early if read_guess returns None (no guesses left).
+    """
+    state.reset(random.choice(SERVICE_POOL))
     
-    while not guessed and tries > 0:
-        guess = input("Please guess a letter or the full word: ").upper()
-        
-        # Check if the guess is a single letter
-        if len(guess) == 1 and guess.isalnum():
-            if guess in guessed_letters:
-                clear_screen()
-                print(f"You already guessed the letter {guess}")
-            elif guess not in service:
-                clear_screen()
-                print(f"{guess} is not in the word.")
-                tries -= 1
-                guessed_letters.append(guess)
-            else:
-                clear_screen()
-                print(f"Good job, {guess} is in the word!")
-                guessed_letters.append(guess)
-                
-                # Update the word completion
-                word_as_list = list(word_completion)
-                indices = [i for i, letter in enumerate(service) if letter == guess]
-                for index in indices:
-                    word_as_list[index] = guess
-                word_completion = "".join(word_as_list)
-                
-                if "_" not in word_completion:
-                    guessed = True
+    if interactive:
+        clear_screen()
+        print("\nWelcome to AWS Hangman!")
+        print("Guess the AWS service name based on its description.\n")
+        print(f"Hint: {state.description}")
+        print(display_hangman(state.tries))
+        print(f"Word: {' '.join(state.word)}")
+        print("\n")
+    
+    while not state.guessed and state.tries > 0:
+        guess = read_guess("Please guess a letter or the full word: ")
+        if guess is None:
+            break
+        message = apply_guess(state, guess.upper())
         
-        # Check if the guess is a word
-        elif len(guess) == len(service) and guess.isalnum():
-            if guess in guessed_words:
+        if interactive:
+            if message:
                 clear_screen()
-                print(f"You already guessed the word {guess}")
-            elif guess != service:
-                clear_screen()
-                print(f"{guess} is not the word.")
-                tries -= 1
-                guessed_words.append(guess)
-            else:
-                guessed = True
-                word_completion = service
-        
+                print(message)
+            show_state(state)
+    
+    # Game result
+    if interactive:
+        if state.guessed:
+            print(f"Congratulations! You guessed the AWS service: {state.service}")
         else:
-            clear_screen()
-            print("Not a valid guess.")
+            print(f"Sorry, you ran out of tries. The AWS service was: {state.service}")
+    
+    return state.guessed
+
+def play_hangman():
+    """Main function to play the Hangman game."""
+    state = RoundState()
+    
+    # Loop instead of recursing so long sessions use constant stack
+    while True:
+        play_round(state)
         
-        # Display current game state
-        print(f"Hint: {description}")
-        print(display_hangman(tries))
-        print(f"Word: {' '.join(word_completion)}")
-        print(f"Letters guessed: {', '.join(guessed_letters)}")
-        print(f"Words guessed: {', '.join(guessed_words)}")
-        print(f"Tries left: {tries}")
-        print("\n")
+        # Ask to play again
+        play_again = input("Would you like to play again? (y/n): ").lower()
+        if play_again != 'y':
+            print("Thanks for playing AWS Hangman! Hope you learned something about AWS services.")
+            break
+
+def play_scripted(rounds, script=DEFAULT_SCRIPT, report_every=0):
+    """Play rounds without a terminal, taking each round's guesses from script in order.
+
+    A round that is still open when the script runs out is lost, so a
+    script that cannot finish a round never loops. Returns the number of
+    rounds won. With report_every, prints traced memory every
+    report_every rounds (start tracemalloc first).
+    """
+    state = RoundState()
+    wins = 0
     
-    # Game result
-    if guessed:
-        print(f"Congratulations! You guessed the AWS service: {service}")
-    else:
-        print(f"Sorry, you ran out of tries. The AWS service was: {service}")
+    for round_number in range(1, rounds + 1):
+        guesses = iter(script)
+        wins += play_round(state, lambda prompt: next(guesses, None), interactive=False)
+        if report_every and round_number % report_every == 0:
+            current, peak = tracemalloc.get_traced_memory()
+            print(f"round {round_number}: {wins} won, memory {current / 1024:.1f} KiB (peak {peak / 1024:.1f} KiB)")
     
-    # Ask to play again
-    play_again = input("Would you like to play again? (y/n): ").lower()
-    if play_again == 'y':
-        play_hangman()
-    else:
-        print("Thanks for playing AWS Hangman! Hope you learned something about AWS services.")
+    return wins
 
 if __name__ == "__main__":
-    play_hangman()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='AWS Hangman')
+    parser.add_argument('--rounds', type=int, help='Play this many rounds non-interactively from scripted guesses, then exit')
+    parser.add_argument('--script', help='File of guesses (one per line) for --rounds; defaults to letters by frequency')
+    parser.add_argument('--seed', type=int, help='Random seed for service selection')
+    parser.add_argument('--report-every', type=int, default=0, metavar='N', help='With --rounds, print traced memory every N rounds')
+    args = parser.parse_args()
+    
+    if args.seed is not None:
+        random.seed(args.seed)
+    
+    if args.rounds is None:
+        play_hangman()
+    else:
+        script = DEFAULT_SCRIPT
+        if args.script:
+            with open(args.script, 'r') as file:
+                script = [line.strip() for line in file if line.strip()]
+        if args.report_every:
+            tracemalloc.start()
+        start = time.perf_counter()
+        wins = play_scripted(args.rounds, script, args.report_every)
+        elapsed = time.perf_counter() - start
+        rate = f", {args.rounds / elapsed:.0f} rounds/s" if args.rounds > 0 and elapsed > 0 else ""
+        print(f"Played {args.rounds} rounds in {elapsed:.2f}s ({wins} won{rate})")
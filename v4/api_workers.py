@@ -0,0 +1,248 @@
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+
+from hangman_api import DEFAULT_HOST, DEFAULT_PORT, load_secret, make_server, serve
+from shared_catalog import CatalogPublisher
+
+# How often the supervisor reaps workers and checks for catalog changes
+SUPERVISE_INTERVAL = 0.2
+
+# A worker that dies sooner than this after starting counts as crashing;
+# its restarts are delayed, doubling up to MAX_RESTART_DELAY
+MIN_UPTIME = 5.0
+MAX_RESTART_DELAY = 30.0
+
+# Seconds a stopping worker waits for requests in progress
+DRAIN_TIMEOUT = 10.0
+
+# Seconds the supervisor waits for workers to drain before killing them
+STOP_TIMEOUT = DRAIN_TIMEOUT + 5.0
+
+
+def reuse_port_available():
+    """True if the kernel lets several processes bind one port with SO_REUSEPORT"""
+    if not hasattr(socket, 'SO_REUSEPORT'):
+        return False
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as probe:
+            probe.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        return True
+    except OSError:
+        return False
+
+
+def bind_socket(host, port, reuse_port=False, listen=True):
+    """TCP socket bound to (host, port), optionally shared with SO_REUSEPORT"""
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    if listen:
+        sock.listen(128)
+    return sock
+
+
+def watch_parent(server, interval=1.0):
+    """Stop the server if the supervisor goes away without stopping it"""
+    parent = os.getppid()
+    while os.getppid() == parent:
+        time.sleep(interval)
+    server.stop()
+
+
+def run_worker(make_game, services_file, shared_name, secret, host, port, sock=None):
+    """Worker process body: serve the API from the shared catalog until SIGTERM; returns an exit code"""
+    # The supervisor handles Ctrl-C and reload requests for the whole group
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if hasattr(signal, 'SIGHUP'):
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+    game = make_game(services_file, shared_catalog=shared_name)
+    if sock is None:
+        # SO_REUSEPORT: every worker listens on its own socket and the kernel spreads connections
+        sock = bind_socket(host, port, reuse_port=True)
+    server = make_server(game, secret=secret, sock=sock)
+    signal.signal(signal.SIGTERM, lambda signum, frame: server.stop())
+    threading.Thread(target=watch_parent, args=(server,), daemon=True).start()
+    server.serve_forever()
+    drained = server.drain(DRAIN_TIMEOUT)
+    game.close()
+    return 0 if drained else 1
+
+
+class Supervisor:
+    """Pre-forks API worker processes and keeps them running
+
+    The supervisor loads the catalog once and publishes it to shared memory
+    (see shared_catalog.py); workers attach to it and serve requests. With
+    SO_REUSEPORT each worker binds the port itself, otherwise they all
+    accept from one listening socket opened before forking. Dead workers
+    are restarted, with a growing delay if they keep crashing. SIGHUP (or
+    a change to the services file, when watching) reloads the catalog and
+    republishes it; workers switch to it between rounds without restarting.
+    SIGTERM or Ctrl-C stops the workers gracefully and withdraws the catalog.
+    """
+
+    def __init__(self, make_game, services_file, workers, host=DEFAULT_HOST, port=DEFAULT_PORT, secret=None, watch=True):
+        self.make_game = make_game
+        self.services_file = services_file
+        self.workers = workers
+        self.host = host
+        self.port = port
+        # Every worker must sign tokens with the same key
+        self.secret = secret or load_secret()
+        self.watch = watch
+        self.reuse_port = reuse_port_available()
+        self.sock = None
+        self.game = None
+        self.publisher = None
+        self.slots = {}
+        self.delays = [0.0] * workers
+        self.restart_at = [0.0] * workers
+        self.stopping = False
+        self.reload_requested = False
+
+    def start(self):
+        """Load and publish the catalog, bind the port and fork the workers"""
+        self.game = self.make_game(self.services_file)
+        self.publisher = CatalogPublisher(f"aws-hangman-{os.getpid()}")
+        self.publisher.publish(self.game.aws_services)
+
+        # With SO_REUSEPORT the supervisor's socket only reserves the port (it never listens)
+        self.sock = bind_socket(self.host, self.port, reuse_port=self.reuse_port, listen=not self.reuse_port)
+        if not self.reuse_port:
+            self.sock.setblocking(False)
+        self.port = self.sock.getsockname()[1]
+
+        for slot in range(self.workers):
+            self.spawn(slot)
+        if self.watch:
+            self.game.start_watching()
+        mode = "SO_REUSEPORT" if self.reuse_port else "shared accept socket"
+        print(f"AWS Hangman API listening on http://{self.host}:{self.port} with {self.workers} workers ({mode})", file=sys.stderr)
+
+    def spawn(self, slot):
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                if self.reuse_port:
+                    # Only reserves the port for the supervisor
+                    self.sock.close()
+                code = run_worker(self.make_game, self.services_file, self.publisher.name, self.secret,
+                                  self.host, self.port, None if self.reuse_port else self.sock)
+            except BaseException as e:
+                print(f"API worker {os.getpid()} failed: {e}", file=sys.stderr)
+            finally:
+                # Never fall back into the supervisor's code in the child
+                sys.stderr.flush()
+                os._exit(code)
+        self.slots[pid] = (slot, time.monotonic())
+
+    def reap(self):
+        """Collect exited workers and schedule their restarts"""
+        # Wait on workers only; the resource tracker is a child process too
+        for pid in list(self.slots):
+            try:
+                done, status = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                done, status = pid, 0
+            if done == 0:
+                continue
+            slot, started = self.slots.pop(pid)
+            if self.stopping:
+                continue
+            if time.monotonic() - started < MIN_UPTIME:
+                self.delays[slot] = min(max(self.delays[slot] * 2, 0.5), MAX_RESTART_DELAY)
+            else:
+                self.delays[slot] = 0.0
+            self.restart_at[slot] = time.monotonic() + self.delays[slot]
+            print(f"API worker {pid} exited with status {os.waitstatus_to_exitcode(status)}; "
+                  f"restarting in {self.delays[slot]:.1f} s", file=sys.stderr)
+
+    def restart_dead(self):
+        running = set(slot for slot, _ in self.slots.values())
+        now = time.monotonic()
+        for slot in range(self.workers):
+            if slot not in running and now >= self.restart_at[slot]:
+                self.spawn(slot)
+
+    def republish(self):
+        """Publish the supervisor's current catalog for the workers to pick up"""
+        generation = self.publisher.publish(self.game.aws_services)
+        print(f"Published {len(self.game.aws_services)} services to the workers (version {generation})", file=sys.stderr)
+
+    def request_stop(self, signum=None, frame=None):
+        self.stopping = True
+
+    def request_reload(self, signum=None, frame=None):
+        self.reload_requested = True
+
+    def run(self):
+        """Supervise until SIGTERM or Ctrl-C"""
+        signal.signal(signal.SIGTERM, self.request_stop)
+        signal.signal(signal.SIGINT, self.request_stop)
+        if hasattr(signal, 'SIGHUP'):
+            signal.signal(signal.SIGHUP, self.request_reload)
+        try:
+            self.start()
+            while not self.stopping:
+                time.sleep(SUPERVISE_INTERVAL)
+                self.reap()
+                if self.stopping:
+                    break
+                self.restart_dead()
+                if self.reload_requested:
+                    self.reload_requested = False
+                    if self.game.reload_services():
+                        self.republish()
+                    else:
+                        print("Services file unchanged; nothing to reload", file=sys.stderr)
+                elif self.game.apply_pending_catalog():
+                    self.republish()
+        finally:
+            self.stop()
+
+    def stop(self):
+        """Ask every worker to drain and exit, then withdraw the catalog"""
+        self.stopping = True
+        for pid in self.slots:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + STOP_TIMEOUT
+        while self.slots and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.05)
+        for pid in list(self.slots):
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            del self.slots[pid]
+        if self.game is not None and self.game.watcher is not None:
+            self.game.watcher.stop()
+        if self.sock is not None:
+            self.sock.close()
+        if self.publisher is not None:
+            self.publisher.close()
+
+
+def serve_workers(make_game, services_file, workers, host=DEFAULT_HOST, port=DEFAULT_PORT, watch=True):
+    """Serve the API from `workers` processes sharing one port; make_game is the AwsHangman class
+
+    Needs os.fork(); elsewhere a single in-process server is run instead.
+    """
+    if not hasattr(os, 'fork'):
+        print("Worker processes need os.fork(); serving from a single process", file=sys.stderr)
+        game = make_game(services_file)
+        if watch:
+            game.start_watching()
+        serve(game, host, port)
+        return
+    Supervisor(make_game, services_file, workers, host, port, watch=watch).run()
@@ -1,296 +1,1023 @@
+import hashlib
 import json
 import requests
 from bs4 import BeautifulSoup
 import time
 import os
 import re
-from datetime import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlencode
+
+from catalog_store import CatalogStore, atomic_write_json
+from crawl_checkpoint import DEFAULT_CHECKPOINT_INTERVAL, CrawlCheckpoint, CrawlInterrupted, checkpoint_path
+from certification_notes import EXAM_DOMAIN, RECENT_UPDATE, add_note, compact_notes, migrate_notes, note_date, note_hashes
+from feed_sources import (DOCS_SITEMAP_URL, SITEMAP_CATEGORY, WHATS_NEW_FEED_URL, ResponseStream, iter_rss, iter_sitemap,
+                          sitemap_services)
+from fulltext import sync_index_file
+from update_metrics import UpdateLog
+
+# Patterns used by normalize_service_name, compiled once at import
+PREFIX_PATTERN = re.compile(r'Amazon|AWS')
+PUNCTUATION_PATTERN = re.compile(r'[^\w\s]')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+# Docs link texts (with "Amazon"/"AWS" removed) that map straight to a service key
+SERVICE_ALIASES = {
+    "Simple Storage Service": "S3",
+    "Simple Storage Service (S3)": "S3",
+    "Elastic Compute Cloud": "EC2",
+    "Elastic Compute Cloud (EC2)": "EC2",
+    "Relational Database Service": "RDS",
+    "Relational Database Service (RDS)": "RDS",
+    "Simple Notification Service": "SNS",
+    "Simple Notification Service (SNS)": "SNS",
+    "Simple Queue Service": "SQS",
+    "Simple Queue Service (SQS)": "SQS",
+    "Identity and Access Management": "IAM",
+    "Identity and Access Management (IAM)": "IAM",
+    "Route 53": "ROUTE53",
+    "Elastic Container Service": "ECS",
+    "Elastic Container Service (ECS)": "ECS",
+    "Elastic Kubernetes Service": "EKS",
+    "Elastic Kubernetes Service (EKS)": "EKS",
+    "Virtual Private Cloud": "VPC",
+    "Virtual Private Cloud (VPC)": "VPC",
+    "Key Management Service": "KMS",
+    "Key Management Service (KMS)": "KMS",
+}
+
+# Substrings that identify a service family regardless of the rest of the link text
+SERVICE_ALIAS_TOKENS = {
+    "S3": "S3",
+    "EC2": "EC2",
+    "RDS": "RDS",
+    "Lambda": "LAMBDA",
+}
+
+# Pause between detail page requests, to be nice to AWS servers
+DEFAULT_REQUEST_DELAY = 1.0
+
+# Parallelism and request rate for the exam guide crawl
+DEFAULT_CERT_WORKERS = 4
+DEFAULT_RATE_LIMIT = 2.0
+
+# What's New listing API, paged newest first
+WHATS_NEW_API_URL = "https://aws.amazon.com/api/dirs/items/search"
+WHATS_NEW_PAGE_SIZE = 25
+
+# How far back the first streaming run looks when there is no high-water mark yet
+DEFAULT_WHATS_NEW_BOOTSTRAP_DAYS = 30
+
+# Words that mark an exam guide heading as an exam domain
+DOMAIN_KEYWORDS = ('domain', 'section', 'area')
+
+# How long a fetched detail page stays fresh in incremental mode
+DEFAULT_FETCH_TTL_HOURS = 7 * 24
+
+class RateLimiter:
+    """Spaces out calls to wait() so at most `rate` happen per second across threads"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self.next_slot = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        """Block until the caller may send its next request"""
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class ServiceKeys:
+    """Service keys handed from the docs crawl to the exam guide matchers running alongside it
+
+    names() blocks until publish() has been called once; the keys are the
+    catalog's plus any new ones on the docs index, in the order the merged
+    catalog will have them.
+    """
+
+    def __init__(self, services, new_keys=None):
+        self.services = services
+        self.keys = None
+        self.ready = threading.Event()
+        self.lock = threading.Lock()
+        if new_keys is not None:
+            self.publish(new_keys)
+
+    def publish(self, new_keys=()):
+        """Make the keys available; later calls are ignored"""
+        with self.lock:
+            if self.ready.is_set():
+                return
+            keys = list(self.services)
+            known = set(keys)
+            for key in new_keys:
+                if key not in known:
+                    known.add(key)
+                    keys.append(key)
+            self.keys = [(key, key.lower()) for key in keys]
+            self.ready.set()
+
+    def names(self):
+        """(service key, lowercase key) pairs, once published"""
+        self.ready.wait()
+        return self.keys
+
+
+def whats_new_page_url(page, page_size=WHATS_NEW_PAGE_SIZE):
+    """URL of one page of the What's New listing API, newest first"""
+    query = urlencode({
+        "item.directoryId": "whats-new",
+        "sort_by": "item.additionalFields.postDateTime",
+        "sort_order": "desc",
+        "size": page_size,
+        "item.locale": "en_US",
+        "page": page,
+    })
+    return f"{WHATS_NEW_API_URL}?{query}"
+
+
+def analyze_exam_guide(html, service_names):
+    """Map service name -> exam domain lines for one exam guide page
+
+    service_names is a list of (name, lowercase name) pairs. The page is
+    parsed once and walked in document order, pairing each domain heading
+    with the next list after it.
+    """
+    guide_soup = BeautifulSoup(html, 'html.parser')
+    domain_headings = {id(heading) for heading in guide_soup.select('div.content h3, div.content h4')}
+    guide_notes = {}
+    pending = []
+    
+    for element in guide_soup.find_all(['h3', 'h4', 'ul']):
+        if element.name != 'ul':
+            if id(element) in domain_headings:
+                domain_text = element.text.strip()
+                if any(keyword in domain_text.lower() for keyword in DOMAIN_KEYWORDS):
+                    pending.append(domain_text)
+            continue
+        
+        if not pending:
+            continue
+        
+        # Found the list following one or more domain headings, look for services mentioned
+        items = [item.text.strip() for item in element.select('li')]
+        for domain_text in pending:
+            for item_text in items:
+                item_lower = item_text.lower()
+                for service_name, service_lower in service_names:
+                    if service_lower in item_lower:
+                        guide_notes.setdefault(service_name, []).append(f"Exam domain: {domain_text} - {item_text}")
+        pending = []
+    
+    return guide_notes
+
 
 class AwsServiceUpdater:
-    def __init__(self, services_file='aws_services.json'):
+    def __init__(self, services_file='aws_services.json', incremental=False, ttl_hours=DEFAULT_FETCH_TTL_HOURS,
+                 update_log=None, session=None, request_delay=DEFAULT_REQUEST_DELAY,
+                 cert_workers=DEFAULT_CERT_WORKERS, rate_limit=DEFAULT_RATE_LIMIT,
+                 stream_whats_new=False, whats_new_bootstrap_days=DEFAULT_WHATS_NEW_BOOTSTRAP_DAYS,
+                 concurrent_phases=True, resume=False, checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL,
+                 docs_source="index", whats_new_feed=False):
         self.services_file = services_file
+        self.store = CatalogStore(services_file, writer="updater")
+        self.session = session if session is not None else requests.Session()
+        self.request_delay = request_delay
+        self.cert_workers = cert_workers
+        self.rate_limit = rate_limit
+        # The RSS feed is read incrementally against the same high-water mark as the listing API
+        self.stream_whats_new = stream_whats_new or whats_new_feed
+        self.whats_new_feed = whats_new_feed
+        self.docs_source = docs_source
+        self.whats_new_bootstrap_days = whats_new_bootstrap_days
         self.current_services = self.load_current_services()
-        self.update_log = []
+        self.update_log = update_log if update_log is not None else UpdateLog()
+        self.normalization_file = self.sidecar_file('normalization')
+        self.normalization_cache = self.load_normalization_cache()
+        self.incremental = incremental
+        self.ttl_hours = ttl_hours
+        self.fetch_meta_file = self.sidecar_file('fetch_meta')
+        self.fetch_meta = self.load_fetch_meta()
+        self.note_hashes = {}
+        self.whats_new_file = self.sidecar_file('whats_new')
+        self.whats_new_state = self.load_whats_new_state()
+        self.pending_whats_new_state = None
+        self.concurrent_phases = concurrent_phases
+        # Crawl progress, so an interrupted update can carry on where it stopped
+        options = {"incremental": incremental, "stream_whats_new": stream_whats_new,
+                   "docs_source": docs_source, "whats_new_feed": whats_new_feed}
+        self.checkpoint = CrawlCheckpoint.open(checkpoint_path(services_file), checkpoint_interval, options, resume)
+        self.interrupted = threading.Event()
         
     def load_current_services(self):
         """Load current AWS services from file"""
         try:
-            with open(self.services_file, 'r') as file:
-                return json.load(file)
+            return self.store.load()
         except FileNotFoundError:
             return {}
     
+    def fetch(self, url):
+        """GET a page, recording latency and size in the update log"""
+        start = time.perf_counter()
+        response = self.session.get(url)
+        self.update_log.record_request(url, response.status_code, len(response.content), time.perf_counter() - start)
+        return response
+
+    def stream_xml(self, url, parse):
+        """Yield what parse() reads from an XML document while it downloads, recording it like fetch()"""
+        start = time.perf_counter()
+        response = self.session.get(url, stream=True)
+        stream = ResponseStream(response)
+        try:
+            response.raise_for_status()
+            yield from parse(stream)
+        finally:
+            response.close()
+            self.update_log.record_request(url, response.status_code, stream.bytes_read, time.perf_counter() - start)
+
+    def add_certification_note(self, service_name, kind, text, date=None):
+        """Add a structured certification note entry, skipping duplicates by hash"""
+        service_info = self.current_services[service_name]
+        hashes = self.note_hashes.get(service_name)
+        if hashes is None:
+            migrate_notes(service_info)
+            hashes = self.note_hashes[service_name] = note_hashes(service_info)
+        return add_note(service_info, kind, text, hashes, date=date)
+
+    def compact_certification_notes(self):
+        """Drop duplicate, expired and excess note entries for every service"""
+        removed = 0
+        for service_info in self.current_services.values():
+            removed += compact_notes(service_info)
+        self.note_hashes = {}
+
+        if removed:
+            self.update_log.append(f"Compacted certification notes, removed {removed} entries")
+        return removed
+
+    def sidecar_file(self, kind):
+        """Path of an auxiliary file stored next to the services file"""
+        return f"{os.path.splitext(self.services_file)[0]}.{kind}.json"
+
+    def load_fetch_meta(self):
+        """Load per-page fetch metadata (service, index hash, content hash, last fetch time)"""
+        try:
+            with open(self.fetch_meta_file, 'r') as file:
+                return json.load(file)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def save_fetch_meta(self):
+        """Persist per-page fetch metadata for the next incremental run"""
+        atomic_write_json(self.fetch_meta_file, self.fetch_meta)
+
+    def needs_detail_fetch(self, service_url, index_hash, is_new):
+        """Decide whether a detail page must be fetched in incremental mode"""
+        if not self.incremental or is_new:
+            return True
+
+        meta = self.fetch_meta.get(service_url)
+        if not meta or meta.get("index_hash") != index_hash:
+            return True
+
+        # Refresh entries that are older than the TTL
+        try:
+            last_fetched = datetime.fromisoformat(meta["last_fetched"])
+        except (KeyError, ValueError):
+            return True
+        age_hours = (datetime.now() - last_fetched).total_seconds() / 3600
+        return age_hours >= self.ttl_hours
+
+    def alias_fingerprint(self):
+        """Fingerprint of the alias tables, used to invalidate stale cache entries"""
+        tables = json.dumps([SERVICE_ALIASES, SERVICE_ALIAS_TOKENS], sort_keys=True)
+        return hashlib.sha1(tables.encode('utf-8')).hexdigest()
+
+    def load_normalization_cache(self):
+        """Load the memoized link text -> service key table saved next to the catalog"""
+        try:
+            with open(self.normalization_file, 'r') as file:
+                cache = json.load(file)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+        # Entries computed with different alias tables may be wrong now
+        if cache.get("aliases") != self.alias_fingerprint():
+            return {}
+        return cache.get("names", {})
+
+    def save_normalization_cache(self):
+        """Persist the normalization table so the next run skips recomputing names"""
+        atomic_write_json(self.normalization_file, {"aliases": self.alias_fingerprint(), "names": self.normalization_cache})
+
     def save_services(self, services):
         """Save updated services to file"""
-        with open(self.services_file, 'w') as file:
-            json.dump(services, file, indent=4)
+        # Merges in anything the game saved while the update was running
+        services = self.current_services = self.store.save(services)
+        self.note_hashes = {}
+
+        # Re-index notes that changed if the game has built a full-text index
+        sync_index_file(self.services_file, services)
+
+        self.save_normalization_cache()
+        self.save_fetch_meta()
+        self.save_whats_new_state()
+        # Everything the crawls found is in the catalog now
+        self.checkpoint.clear()
         
         # Also save a backup with timestamp
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_file = f"aws_services_backup_{timestamp}.json"
-        with open(backup_file, 'w') as file:
-            json.dump(services, file, indent=4)
+        backup_file = f"{os.path.splitext(self.services_file)[0]}_backup_{timestamp}.json"
+        atomic_write_json(backup_file, services)
             
         return backup_file
     
     def fetch_aws_services_from_docs(self):
         """Fetch AWS services from the AWS documentation"""
-        print("Fetching AWS services from AWS documentation...")
+        try:
+            crawl = self.crawl_docs()
+        except Exception as e:
+            self.update_log.error(f"Error fetching AWS services: {e}")
+            return None
+        return self.merge_docs(crawl)
+    
+    def crawl_docs(self, on_index=None):
+        """Read the docs index and the service detail pages without changing the catalog
+
+        on_index, if given, is called with the service keys on the index as
+        soon as it is parsed, before the (slow) detail pages are fetched.
+        Returns the index entries, the descriptions found by entry position,
+        the fetch metadata to store and the number of pages skipped.
+        Progress is checkpointed after every page; a resumed crawl reuses
+        the saved index and carries on with the pages it had not reached.
+        """
+        state = self.checkpoint.section("docs")
+        if "entries" in state:
+            entries = [tuple(entry) for entry in state["entries"]]
+            print(f"Resuming the AWS documentation crawl: {len(state['visited'])} of {len(entries)} service pages already visited")
+        else:
+            print("Fetching AWS services from AWS documentation...")
+            entries = self.read_docs_sitemap() if self.docs_source == "sitemap" else self.read_docs_index()
+            self.checkpoint.update("docs", entries=entries, next=0, failed=[], visited={}, descriptions={}, fetch_meta={}, skipped=0)
+            state = self.checkpoint.section("docs")
+        
+        if on_index is not None:
+            on_index([entry[3] for entry in entries])
+        
+        # Only the first link to a service the catalog lacks adds it
+        new_entries = []
+        added = set()
+        for entry in entries:
+            normalized_name = entry[3]
+            is_new = normalized_name not in self.current_services and normalized_name not in added
+            if is_new:
+                added.add(normalized_name)
+            new_entries.append(is_new)
+        
+        # Pages that failed last time are retried before the rest of the frontier
+        retry = list(state["failed"])
+        failed = []
+        for position in retry + list(range(state["next"], len(entries))):
+            if self.interrupted.is_set():
+                raise CrawlInterrupted("AWS documentation crawl stopped")
+            if not self.crawl_service_page(position, entries[position], new_entries[position], state):
+                failed.append(position)
+            if retry and position == retry[0]:
+                retry.pop(0)
+                self.checkpoint.update("docs", failed=retry + failed)
+            else:
+                self.checkpoint.update("docs", next=position + 1, failed=retry + failed)
         
+        descriptions = {int(position): description for position, description in state["descriptions"].items()}
+        return {"entries": entries, "descriptions": descriptions, "fetch_meta": dict(state["fetch_meta"]), "skipped": state["skipped"]}
+    
+    def read_docs_index(self):
+        """(category, link text, detail page URL, service key) for every service on the docs index"""
         # AWS service categories page
         url = "https://docs.aws.amazon.com/index.html"
         
-        try:
-            response = requests.get(url)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            services = {}
-            
-            # Find service categories
-            categories = soup.select('div.category')
+        response = self.fetch(url)
+        response.raise_for_status()
+        
+        soup = BeautifulSoup(response.text, 'html.parser')
+        entries = []
+        
+        # Find service categories
+        for category in soup.select('div.category'):
+            category_name = category.select_one('h2').text.strip()
             
-            for category in categories:
-                category_name = category.select_one('h2').text.strip()
+            # Find all services in this category
+            for link in category.select('ul li a'):
+                service_name = link.text.strip()
+                service_url = link.get('href')
                 
-                # Find all services in this category
-                service_links = category.select('ul li a')
-                
-                for link in service_links:
-                    service_name = link.text.strip()
-                    service_url = link.get('href')
-                    
-                    # Skip non-service links
-                    if not service_url or not service_name:
-                        continue
-                        
-                    # Normalize service name to match our format
-                    normalized_name = self.normalize_service_name(service_name)
-                    
-                    # Skip if we couldn't normalize the name
-                    if not normalized_name:
-                        continue
+                # Skip non-service links
+                if not service_url or not service_name:
+                    continue
                     
-                    # Check if we already have this service
-                    if normalized_name in self.current_services:
-                        # Update category if needed
-                        if self.current_services[normalized_name]["category"] != category_name:
-                            self.current_services[normalized_name]["category"] = category_name
-                            self.update_log.append(f"Updated category for {normalized_name} to {category_name}")
-                    else:
-                        # Add new service with default values
-                        self.current_services[normalized_name] = {
-                            "description": f"{service_name} - AWS service (description pending)",
-                            "category": category_name,
-                            "difficulty": "Medium",  # Default difficulty
-                            "certification_notes": f"This is a newer AWS service. Research its key features and use cases for certification exams."
-                        }
-                        self.update_log.append(f"Added new service: {normalized_name} in category {category_name}")
-                        
-                    # Try to fetch more details about this service
-                    if service_url and service_url.startswith('http'):
-                        try:
-                            time.sleep(1)  # Be nice to AWS servers
-                            service_response = requests.get(service_url)
-                            if service_response.status_code == 200:
-                                service_soup = BeautifulSoup(service_response.text, 'html.parser')
-                                
-                                # Try to find a description
-                                description_elem = service_soup.select_one('div.description')
-                                if description_elem:
-                                    description = description_elem.text.strip()
-                                    if description:
-                                        self.current_services[normalized_name]["description"] = description
-                                        self.update_log.append(f"Updated description for {normalized_name}")
-                        except Exception as e:
-                            print(f"Error fetching details for {service_name}: {e}")
-            
-            return self.current_services
-            
+                # Normalize service name to match our format
+                normalized_name = self.normalize_service_name(service_name)
+                
+                # Skip if we couldn't normalize the name
+                if not normalized_name:
+                    continue
+                
+                entries.append((category_name, service_name, service_url, normalized_name))
+        return entries
+    
+    def read_docs_sitemap(self):
+        """Docs index entries for every guide in the docs sitemap index, without categories"""
+        entries = []
+        for service_name, service_url in sitemap_services(self.stream_xml(DOCS_SITEMAP_URL, iter_sitemap)):
+            normalized_name = self.normalize_service_name(service_name)
+            if normalized_name:
+                entries.append((None, service_name, service_url, normalized_name))
+        return entries
+    
+    def crawl_service_page(self, position, entry, is_new, state):
+        """Fetch one service's detail page into the docs crawl state; False if it failed"""
+        category_name, service_name, service_url, normalized_name = entry
+        
+        # Try to fetch more details about this service
+        if not service_url.startswith('http'):
+            return True
+        
+        # Unchanged index entries fetched within the TTL are skipped in incremental mode
+        index_hash = hashlib.sha1(f"{category_name}|{service_name}|{service_url}".encode('utf-8')).hexdigest()
+        if not self.needs_detail_fetch(service_url, index_hash, is_new):
+            self.checkpoint.update("docs", skipped=state["skipped"] + 1)
+            self.update_log.increment("detail_pages_skipped")
+            return True
+
+        try:
+            time.sleep(self.request_delay)  # Be nice to AWS servers
+            service_response = self.fetch(service_url)
+            self.checkpoint.record("docs", "visited", service_url, service_response.status_code)
+            if service_response.status_code == 200:
+                content_hash = hashlib.sha1(service_response.content).hexdigest()
+                previous = state["fetch_meta"].get(service_url) or self.fetch_meta.get(service_url, {})
+                self.checkpoint.record("docs", "fetch_meta", service_url, {
+                    "service": normalized_name,
+                    "source_url": service_url,
+                    "index_hash": index_hash,
+                    "content_hash": content_hash,
+                    "last_fetched": datetime.now().isoformat(timespec='seconds')
+                })
+
+                # Same page as last time, nothing new to parse
+                if not is_new and previous.get("content_hash") == content_hash:
+                    self.update_log.increment("detail_pages_unchanged")
+                    return True
+
+                service_soup = BeautifulSoup(service_response.text, 'html.parser')
+                
+                # Try to find a description
+                description_elem = service_soup.select_one('div.description')
+                if description_elem:
+                    description = description_elem.text.strip()
+                    if description:
+                        self.checkpoint.record("docs", "descriptions", str(position), description)
+            return True
         except Exception as e:
-            print(f"Error fetching AWS services: {e}")
-            return None
+            self.update_log.error(f"Error fetching details for {service_name}: {e}")
+            return False
+    
+    def merge_docs(self, crawl):
+        """Apply a docs crawl to the catalog: categories, new services and descriptions"""
+        for position, (category_name, service_name, service_url, normalized_name) in enumerate(crawl["entries"]):
+            # Check if we already have this service
+            if normalized_name in self.current_services:
+                # Update category if needed (the sitemap has none)
+                if category_name and self.current_services[normalized_name]["category"] != category_name:
+                    self.current_services[normalized_name]["category"] = category_name
+                    self.update_log.append(f"Updated category for {normalized_name} to {category_name}")
+            else:
+                # Add new service with default values
+                self.current_services[normalized_name] = {
+                    "description": f"{service_name} - AWS service (description pending)",
+                    "category": category_name or SITEMAP_CATEGORY,
+                    "difficulty": "Medium",  # Default difficulty
+                    "certification_notes": f"This is a newer AWS service. Research its key features and use cases for certification exams."
+                }
+                self.update_log.append(f"Added new service: {normalized_name} in category {category_name or SITEMAP_CATEGORY}")
+            
+            description = crawl["descriptions"].get(position)
+            if description:
+                self.current_services[normalized_name]["description"] = description
+                self.update_log.append(f"Updated description for {normalized_name}")
+        
+        self.fetch_meta.update(crawl["fetch_meta"])
+        if self.incremental:
+            print(f"Skipped {crawl['skipped']} unchanged service pages (TTL {self.ttl_hours}h)")
+        
+        return self.current_services
     
     def fetch_certification_updates(self):
         """Fetch AWS certification exam updates"""
-        print("Fetching AWS certification exam updates...")
+        try:
+            guides = self.crawl_certification_guides(ServiceKeys(self.current_services, ()))
+        except Exception as e:
+            self.update_log.error(f"Error fetching certification updates: {e}")
+            return None
+        return self.merge_certification_notes(guides)
+    
+    def crawl_certification_guides(self, service_keys):
+        """Fetch and analyse every exam guide; returns (guide url, notes or exception) in page order
+
+        Guides are downloaded straight away; each is matched against the
+        service keys once service_keys has them.
+        """
+        state = self.checkpoint.section("cert")
+        if "guides" in state:
+            guide_urls = state["guides"]
+            print(f"Resuming the exam guide crawl: {len(state['results'])} of {len(guide_urls)} guides already analysed")
+        else:
+            print("Fetching AWS certification exam updates...")
+            guide_urls = self.read_exam_guide_links()
+            self.checkpoint.update("cert", guides=guide_urls, results={})
         
+        rate_limiter = RateLimiter(self.rate_limit)
+        phase = self.update_log.current_phase
+        
+        with ThreadPoolExecutor(max_workers=max(1, self.cert_workers)) as executor:
+            # Guides analysed before an interruption are not fetched again
+            futures = {guide_url: executor.submit(self.crawl_exam_guide, guide_url, service_keys, rate_limiter, phase)
+                       for guide_url in guide_urls if guide_url not in state["results"]}
+            try:
+                wait(futures.values())
+            except BaseException:
+                # Ctrl-C: let the workers finish their current guide and stop
+                self.interrupted.set()
+                raise
+        
+        guides = []
+        for guide_url in guide_urls:
+            future = futures.get(guide_url)
+            if future is None:
+                guides.append((guide_url, state["results"][guide_url]))
+                continue
+            try:
+                guides.append((guide_url, future.result()))
+            except CrawlInterrupted:
+                raise
+            except Exception as e:
+                guides.append((guide_url, e))
+        return guides
+    
+    def read_exam_guide_links(self):
+        """Exam guide URLs linked from the certification prep page, in page order"""
         # AWS certification page
         url = "https://aws.amazon.com/certification/certification-prep/"
         
-        try:
-            response = requests.get(url)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Find exam guides which often contain updates
-            exam_guides = soup.select('a[href*="exam-guide"]')
-            
-            for guide in exam_guides:
-                guide_url = guide.get('href')
-                if guide_url and guide_url.startswith('http'):
-                    try:
-                        time.sleep(1)  # Be nice to AWS servers
-                        guide_response = requests.get(guide_url)
-                        if guide_response.status_code == 200:
-                            guide_soup = BeautifulSoup(guide_response.text, 'html.parser')
-                            
-                            # Look for content about exam domains
-                            domains = guide_soup.select('div.content h3, div.content h4')
-                            
-                            for domain in domains:
-                                domain_text = domain.text.strip()
-                                if any(keyword in domain_text.lower() for keyword in ['domain', 'section', 'area']):
-                                    # Found a domain section, look for services mentioned
-                                    content = domain.find_next('ul')
-                                    if content:
-                                        for item in content.select('li'):
-                                            item_text = item.text.strip()
-                                            
-                                            # Look for service names in the content
-                                            for service_name in self.current_services.keys():
-                                                if service_name.lower() in item_text.lower():
-                                                    # Update certification notes
-                                                    domain_info = f"Exam domain: {domain_text} - {item_text}"
-                                                    if "certification_notes" in self.current_services[service_name]:
-                                                        if domain_info not in self.current_services[service_name]["certification_notes"]:
-                                                            self.current_services[service_name]["certification_notes"] += f"\n\n{domain_info}"
-                                                            self.update_log.append(f"Updated certification notes for {service_name} with exam domain info")
-                                                    else:
-                                                        self.current_services[service_name]["certification_notes"] = domain_info
-                                                        self.update_log.append(f"Added certification notes for {service_name}")
-                    except Exception as e:
-                        print(f"Error fetching exam guide {guide_url}: {e}")
-            
-            return self.current_services
+        response = self.fetch(url)
+        response.raise_for_status()
+        
+        soup = BeautifulSoup(response.text, 'html.parser')
+        
+        # Find exam guides which often contain updates
+        guide_urls = []
+        for guide in soup.select('a[href*="exam-guide"]'):
+            guide_url = guide.get('href')
+            if guide_url and guide_url.startswith('http') and guide_url not in guide_urls:
+                guide_urls.append(guide_url)
+        return guide_urls
+    
+    def crawl_exam_guide(self, guide_url, service_keys, rate_limiter, phase=None):
+        """Fetch one exam guide and map each mentioned service to its domain lines"""
+        # Count the request under the phase that started the crawl
+        self.update_log.current_phase = phase
+        rate_limiter.wait()
+        if self.interrupted.is_set():
+            raise CrawlInterrupted("exam guide crawl stopped")
+        guide_response = self.fetch(guide_url)
+        guide_notes = {}
+        if guide_response.status_code == 200:
+            # Workers only read this snapshot, never current_services itself
+            guide_notes = analyze_exam_guide(guide_response.text, service_keys.names())
+        self.checkpoint.record("cert", "results", guide_url, guide_notes)
+        return guide_notes
+    
+    def merge_certification_notes(self, guides):
+        """Add exam domain notes from crawl_certification_guides() in page order"""
+        # Duplicates are dropped by note hash
+        for guide_url, guide_notes in guides:
+            if isinstance(guide_notes, Exception):
+                self.update_log.error(f"Error fetching exam guide {guide_url}: {guide_notes}")
+                continue
             
-        except Exception as e:
-            print(f"Error fetching certification updates: {e}")
-            return None
+            for service_name, domain_lines in guide_notes.items():
+                for domain_info in domain_lines:
+                    if self.add_certification_note(service_name, EXAM_DOMAIN, domain_info):
+                        self.update_log.append(f"Updated certification notes for {service_name} with exam domain info")
+        
+        return self.current_services
     
     def normalize_service_name(self, name):
         """Normalize service name to our format (uppercase, no spaces)"""
+        # Link texts repeat on every run, so most names are a single cache lookup
+        try:
+            normalized = self.normalization_cache[name]
+            self.update_log.increment("normalization_cache_hits")
+            return normalized
+        except KeyError:
+            self.update_log.increment("normalization_cache_misses")
+            normalized = self.compute_service_name(name)
+            self.normalization_cache[name] = normalized
+            return normalized
+
+    def compute_service_name(self, name):
+        """Derive the service key for a docs link text (uncached)"""
         # Extract the main service name (before any "Amazon" or "AWS" prefixes)
-        name = name.replace("Amazon", "").replace("AWS", "").strip()
-        
-        # Handle special cases
-        if "S3" in name:
-            return "S3"
-        if "EC2" in name:
-            return "EC2"
-        if "RDS" in name:
-            return "RDS"
-        if "Lambda" in name:
-            return "LAMBDA"
-        
+        stripped = PREFIX_PATTERN.sub('', name).strip()
+
+        # Known long-form names map directly to their key
+        alias = SERVICE_ALIASES.get(stripped)
+        if alias:
+            return alias
+
+        # Handle service families identified by a token anywhere in the name
+        for token, service_key in SERVICE_ALIAS_TOKENS.items():
+            if token in stripped:
+                return service_key
+
         # Remove common words and punctuation
-        name = re.sub(r'[^\w\s]', '', name)
-        name = re.sub(r'\s+', '', name)
-        
+        stripped = PUNCTUATION_PATTERN.sub('', stripped)
+        stripped = WHITESPACE_PATTERN.sub('', stripped)
+
         # Convert to uppercase
-        return name.upper() if name else None
+        return stripped.upper() if stripped else None
     
     def update_from_aws_blogs(self):
         """Update service information from AWS blogs"""
+        announcements = self.collect_announcements()
+        if announcements is None:
+            return None
+        return self.merge_announcements(announcements)
+    
+    def collect_announcements(self):
+        """Read recent announcements as (title, date, content) without changing the catalog; None on failure"""
+        state = self.checkpoint.section("blogs")
+        if "announcements" in state:
+            print(f"Reusing {len(state['announcements'])} announcements read before the interruption")
+            self.pending_whats_new_state = state["whats_new_state"]
+            return [tuple(announcement) for announcement in state["announcements"]]
+        
+        announcements = self.collect_whats_new() if self.stream_whats_new else self.read_blog_announcements()
+        if announcements is not None:
+            self.checkpoint.update("blogs", announcements=announcements, whats_new_state=self.pending_whats_new_state)
+        return announcements
+    
+    def read_blog_announcements(self):
+        """The latest announcements on the What's New page, or None if it could not be read"""
         print("Fetching updates from AWS blogs...")
         
         # AWS What's New blog
         url = "https://aws.amazon.com/new/"
         
         try:
-            response = requests.get(url)
+            response = self.fetch(url)
             response.raise_for_status()
             
             soup = BeautifulSoup(response.text, 'html.parser')
             
             # Find recent announcements
-            announcements = soup.select('div.blog-post')
-            
-            for announcement in announcements[:20]:  # Limit to recent announcements
+            announcements = []
+            for announcement in soup.select('div.blog-post')[:20]:  # Limit to recent announcements
                 title_elem = announcement.select_one('h2')
                 if not title_elem:
                     continue
                     
                 title = title_elem.text.strip()
                 
-                # Check if this announcement mentions any of our services
-                for service_name in self.current_services.keys():
-                    if service_name.lower() in title.lower():
-                        # Get the announcement date
-                        date_elem = announcement.select_one('time')
-                        date_str = date_elem.text.strip() if date_elem else "Recent update"
-                        
-                        # Get the announcement content
-                        content_elem = announcement.select_one('p')
-                        content = content_elem.text.strip() if content_elem else ""
-                        
-                        # Update certification notes with this new information
-                        update_info = f"Recent update ({date_str}): {title} - {content}"
-                        if "certification_notes" in self.current_services[service_name]:
-                            if update_info not in self.current_services[service_name]["certification_notes"]:
-                                self.current_services[service_name]["certification_notes"] += f"\n\n{update_info}"
-                                self.update_log.append(f"Added recent update for {service_name}")
-                        else:
-                            self.current_services[service_name]["certification_notes"] = update_info
-                            self.update_log.append(f"Added certification notes for {service_name} with recent update")
+                # Get the announcement date
+                date_elem = announcement.select_one('time')
+                date_str = date_elem.text.strip() if date_elem else "Recent update"
+                
+                # Get the announcement content
+                content_elem = announcement.select_one('p')
+                content = content_elem.text.strip() if content_elem else ""
+                
+                announcements.append((title, date_str, content))
             
-            return self.current_services
+            return announcements
             
         except Exception as e:
-            print(f"Error fetching AWS blog updates: {e}")
+            self.update_log.error(f"Error fetching AWS blog updates: {e}")
             return None
     
+    def merge_announcements(self, announcements):
+        """Apply collected announcements in order, then move the What's New high-water mark"""
+        for title, date_str, content in announcements:
+            self.apply_announcement(title, date_str, content)
+        
+        if self.stream_whats_new:
+            if self.pending_whats_new_state is not None:
+                self.whats_new_state = self.pending_whats_new_state
+                self.pending_whats_new_state = None
+            self.update_log.increment("whats_new_ingested", len(announcements))
+            print(f"Ingested {len(announcements)} new announcements")
+        
+        return self.current_services
+    
+    def apply_announcement(self, title, date_str, content):
+        """Add an announcement as a recent update to every service its title mentions"""
+        title_lower = title.lower()
+        for service_name in self.current_services.keys():
+            if service_name.lower() in title_lower:
+                # Update certification notes with this new information
+                update_info = f"Recent update ({date_str}): {title} - {content}"
+                if self.add_certification_note(service_name, RECENT_UPDATE, update_info, note_date(date_str)):
+                    self.update_log.append(f"Added recent update for {service_name}")
+    
+    def load_whats_new_state(self):
+        """Load the What's New high-water mark (newest post date and the ids seen at it)"""
+        try:
+            with open(self.whats_new_file, 'r') as file:
+                return json.load(file)
+        except (FileNotFoundError, ValueError):
+            return {}
+    
+    def save_whats_new_state(self):
+        """Persist the What's New high-water mark once the catalog has been saved"""
+        if self.whats_new_state:
+            atomic_write_json(self.whats_new_file, self.whats_new_state)
+    
+    def iter_whats_new(self, page_size=WHATS_NEW_PAGE_SIZE):
+        """Yield What's New announcements newest first, fetching one page at a time"""
+        page = 0
+        while True:
+            response = self.fetch(whats_new_page_url(page, page_size))
+            response.raise_for_status()
+            items = response.json().get("items", [])
+            
+            for entry in items:
+                item = entry.get("item", {})
+                fields = item.get("additionalFields", {})
+                yield {
+                    "id": item.get("id") or item.get("name"),
+                    "title": (fields.get("headline") or "").strip(),
+                    "date": fields.get("postDateTime") or "",
+                    "content": BeautifulSoup(fields.get("postBody") or "", 'html.parser').get_text(" ", strip=True),
+                }
+            
+            if len(items) < page_size:
+                return
+            page += 1
+    
+    def iter_whats_new_feed(self):
+        """Yield What's New announcements newest first from the RSS feed, parsed as it downloads"""
+        return self.stream_xml(WHATS_NEW_FEED_URL, iter_rss)
+    
+    def ingest_whats_new(self):
+        """Stream What's New announcements newer than the last run's high-water mark"""
+        return self.merge_announcements(self.collect_whats_new())
+    
+    def collect_whats_new(self):
+        """What's New announcements newer than the high-water mark, as (title, date, content)
+
+        The new mark is kept in pending_whats_new_state until the
+        announcements are merged. If the stream fails part way, the mark is
+        not moved: announcements between the failure and the old mark were
+        never read, so the next run must read back down to the old mark.
+        """
+        if self.whats_new_feed:
+            print("Streaming What's New announcements from the RSS feed...")
+            source = self.iter_whats_new_feed()
+        else:
+            print("Streaming What's New announcements...")
+            source = self.iter_whats_new()
+        
+        # Nothing ingested yet: only look back a bounded number of days
+        mark_date = self.whats_new_state.get("post_date")
+        mark_ids = set(self.whats_new_state.get("ids", []))
+        if not mark_date:
+            cutoff = datetime.now(timezone.utc) - timedelta(days=self.whats_new_bootstrap_days)
+            mark_date = cutoff.strftime("%Y-%m-%dT%H:%M:%SZ")
+        
+        new_state = None
+        announcements = []
+        
+        try:
+            for announcement in source:
+                post_date = announcement["date"]
+                
+                # An unreadable date would compare as older than the mark and end the stream early
+                if not post_date:
+                    print(f"Skipping What's New item without a readable date: {announcement['title'] or announcement['id']}")
+                    self.update_log.increment("whats_new_undated")
+                    continue
+                
+                # Everything from here on is older than what we already have
+                if post_date < mark_date:
+                    break
+                if post_date == mark_date and announcement["id"] in mark_ids:
+                    continue
+                
+                # The first announcement is the newest; remember every id posted at that instant
+                if new_state is None:
+                    new_state = {"post_date": post_date, "ids": []}
+                if post_date == new_state["post_date"]:
+                    new_state["ids"].append(announcement["id"])
+                
+                announcements.append((announcement["title"], post_date[:10], announcement["content"]))
+        except Exception as e:
+            self.update_log.error(f"Error streaming What's New announcements: {e}")
+            # Announcements already read are still merged; notes are deduplicated when the next run reads them again
+            print("Keeping the What's New high-water mark so the next run reads the rest")
+            new_state = None
+        
+        # Keep ids of announcements at the previous mark if nothing newer arrived at the same instant
+        if new_state is not None:
+            if new_state["post_date"] == self.whats_new_state.get("post_date"):
+                new_state["ids"] = sorted(mark_ids.union(new_state["ids"]))
+        self.pending_whats_new_state = new_state
+        return announcements
+    
     def run_update(self):
         """Run the complete update process"""
         print("Starting AWS services update process...")
         
-        # Fetch services from AWS docs
-        self.fetch_aws_services_from_docs()
-        
-        # Fetch certification updates
-        self.fetch_certification_updates()
+        if self.concurrent_phases:
+            self.run_crawls_concurrently()
+        else:
+            # Fetch services from AWS docs
+            self.run_phase("docs", self.fetch_aws_services_from_docs)
+            
+            # Fetch certification updates
+            self.run_phase("cert", self.fetch_certification_updates)
+            
+            # Update from AWS blogs
+            self.run_phase("blogs", self.update_from_aws_blogs)
         
-        # Update from AWS blogs
-        self.update_from_aws_blogs()
+        # Expire old recent updates before saving
+        self.run_phase("compact", self.compact_certification_notes)
         
         # Save the updated services
-        backup_file = self.save_services(self.current_services)
+        backup_file = self.run_phase("save", self.save_services, self.current_services)
         
         print(f"Update completed. Services saved to {self.services_file}")
         print(f"Backup saved to {backup_file}")
+        self.report()
+        
+        return len(self.update_log)
+
+    def run_crawls_concurrently(self):
+        """Run the docs, exam guide and blog crawls at the same time, then merge them in order
+
+        The crawls only read the catalog; every change is made afterwards by
+        one merge step, in the same order as a sequential run, so the result
+        does not depend on which crawl finishes first. The exam guides are
+        matched against the docs index's service keys as soon as the index is
+        parsed, while the docs crawl is still fetching detail pages.
+        """
+        service_keys = ServiceKeys(self.current_services)
+        
+        def crawl_docs():
+            try:
+                return self.crawl_docs(service_keys.publish)
+            finally:
+                # Never leave the exam guide matchers waiting if the index could not be read
+                service_keys.publish()
+        
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            docs = executor.submit(self.run_phase, "docs", crawl_docs)
+            cert = executor.submit(self.run_phase, "cert", self.crawl_certification_guides, service_keys)
+            blogs = executor.submit(self.run_phase, "blogs", self.collect_announcements)
+            try:
+                wait([docs, cert, blogs])
+            except BaseException:
+                # Ctrl-C: stop the crawls at their next page so their progress can be saved
+                self.interrupted.set()
+                raise
+        
+        with self.update_log.span("merge"):
+            try:
+                self.merge_docs(docs.result())
+            except CrawlInterrupted:
+                raise
+            except Exception as e:
+                self.update_log.error(f"Error fetching AWS services: {e}")
+            try:
+                self.merge_certification_notes(cert.result())
+            except CrawlInterrupted:
+                raise
+            except Exception as e:
+                self.update_log.error(f"Error fetching certification updates: {e}")
+            announcements = blogs.result()
+            if announcements is not None:
+                self.merge_announcements(announcements)
+
+    def run_phase(self, phase, func, *args):
+        """Run one step of the update inside a timed span"""
+        with self.update_log.span(phase):
+            return func(*args)
+
+    def report(self):
+        """Print the changes made and the per-phase metrics summary"""
         print(f"Total updates: {len(self.update_log)}")
         
         for update in self.update_log:
             print(f"- {update}")
-        
-        return len(self.update_log)
+
+        print("\nUpdate metrics:")
+        print(self.update_log.format_summary())
+        self.update_log.emit("summary", **self.update_log.summary())
 
 # Add command line argument handling
 if __name__ == "__main__":
     import argparse
+    import sys
+    
+    from replay import recording_session, replay_session
     
     parser = argparse.ArgumentParser(description='Update AWS services database for Hangman game')
+    parser.add_argument('--services-file', default='aws_services.json', help='Services file to update (sharded catalog directories are not supported)')
     parser.add_argument('--docs-only', action='store_true', help='Only update from AWS documentation')
     parser.add_argument('--cert-only', action='store_true', help='Only update from certification exam guides')
     parser.add_argument('--blogs-only', action='store_true', help='Only update from AWS blogs')
+    parser.add_argument('--compact-notes', action='store_true', help='Deduplicate and expire old certification note entries, then exit')
+    parser.add_argument('--incremental', action='store_true', help='Only fetch detail pages for new, changed or stale services')
+    parser.add_argument('--ttl-hours', type=float, default=DEFAULT_FETCH_TTL_HOURS, help='Age after which a detail page is refetched in incremental mode')
+    parser.add_argument('--request-delay', type=float, default=DEFAULT_REQUEST_DELAY, help='Seconds to wait between detail page requests')
+    parser.add_argument('--cert-workers', type=int, default=DEFAULT_CERT_WORKERS, help='Exam guides fetched and analysed concurrently')
+    parser.add_argument('--rate-limit', type=float, default=DEFAULT_RATE_LIMIT, help='Maximum exam guide requests per second (0 for no limit)')
+    parser.add_argument('--whats-new-stream', action='store_true', help="Page through What's New announcements since the last run instead of the latest 20")
+    parser.add_argument('--whats-new-bootstrap-days', type=int, default=DEFAULT_WHATS_NEW_BOOTSTRAP_DAYS, help="Days of announcements to ingest when no high-water mark exists yet")
+    parser.add_argument('--docs-source', choices=('index', 'sitemap'), default='index', help='Discover services from the docs index page or from the docs sitemap XML')
+    parser.add_argument('--whats-new-feed', action='store_true', help="Read What's New announcements since the last run from the RSS feed")
+    parser.add_argument('--sequential', action='store_true', help='Run the docs, exam guide and blog crawls one after another instead of at the same time')
+    parser.add_argument('--resume', action='store_true', help='Carry on an interrupted update without refetching the pages it had already visited')
+    parser.add_argument('--checkpoint-interval', type=float, default=DEFAULT_CHECKPOINT_INTERVAL, help='Seconds between saves of the crawl progress')
+    parser.add_argument('--record', metavar='ARCHIVE', help='Record every fetched response into ARCHIVE for offline replay')
+    parser.add_argument('--replay', metavar='ARCHIVE', help='Serve every request from a recorded ARCHIVE instead of the network')
+    parser.add_argument('--replay-latency', type=float, default=0.0, help='Seconds of latency added to each replayed response')
+    parser.add_argument('--replay-error-rate', type=float, default=0.0, help='Fraction of replayed requests that fail (connection error or 503)')
+    parser.add_argument('--log-json', metavar='PATH', help="Stream structured update events as JSON lines to PATH ('-' for stdout)")
     
     args = parser.parse_args()
+    if os.path.isdir(args.services_file):
+        parser.error(f"{args.services_file} is a sharded catalog directory; the updater only writes single-file catalogs")
+    
+    session = None
+    if args.record:
+        session = recording_session()
+    elif args.replay:
+        session = replay_session(args.replay, args.replay_latency, error_rate=args.replay_error_rate)
+    
+    update_log = UpdateLog.open(args.log_json)
+    updater = AwsServiceUpdater(args.services_file, incremental=args.incremental, ttl_hours=args.ttl_hours, update_log=update_log,
+                                session=session, request_delay=args.request_delay,
+                                cert_workers=args.cert_workers, rate_limit=args.rate_limit,
+                                stream_whats_new=args.whats_new_stream, whats_new_bootstrap_days=args.whats_new_bootstrap_days,
+                                concurrent_phases=not args.sequential,
+                                resume=args.resume, checkpoint_interval=args.checkpoint_interval,
+                                docs_source=args.docs_source, whats_new_feed=args.whats_new_feed)
+    
+    try:
+        if args.compact_notes:
+            print("Compacting certification notes...")
+            removed = updater.run_phase("compact", updater.compact_certification_notes)
+            updater.run_phase("save", updater.save_services, updater.current_services)
+            print(f"Removed {removed} note entries")
+        elif args.docs_only:
+            print("Updating from AWS documentation only...")
+            updater.run_phase("docs", updater.fetch_aws_services_from_docs)
+            updater.run_phase("save", updater.save_services, updater.current_services)
+            updater.report()
+        elif args.cert_only:
+            print("Updating from certification exam guides only...")
+            updater.run_phase("cert", updater.fetch_certification_updates)
+            updater.run_phase("save", updater.save_services, updater.current_services)
+            updater.report()
+        elif args.blogs_only:
+            print("Updating from AWS blogs only...")
+            updater.run_phase("blogs", updater.update_from_aws_blogs)
+            updater.run_phase("save", updater.save_services, updater.current_services)
+            updater.report()
+        else:
+            updater.run_update()
+    except KeyboardInterrupt:
+        updater.checkpoint.save()
+        print(f"\nUpdate interrupted; progress saved to {updater.checkpoint.path}")
+        print("Run the updater again with --resume to carry on where it stopped")
+        update_log.close()
+        sys.exit(130)
+    
+    if args.record:
+        recorded = session.recorder.save(args.record)
+        print(f"Recorded {recorded} responses to {args.record}")
+    elif args.replay:
+        replayer = session.replayer
+        print(f"Replayed {replayer.served} requests from {args.replay} ({replayer.missing} not in archive)")
     
-    updater = AwsServiceUpdater()
-    
-    if args.docs_only:
-        print("Updating from AWS documentation only...")
-        updater.fetch_aws_services_from_docs()
-        updater.save_services(updater.current_services)
-    elif args.cert_only:
-        print("Updating from certification exam guides only...")
-        updater.fetch_certification_updates()
-        updater.save_services(updater.current_services)
-    elif args.blogs_only:
-        print("Updating from AWS blogs only...")
-        updater.update_from_aws_blogs()
-        updater.save_services(updater.current_services)
-    else:
-        updater.run_update()
+    update_log.close()
 
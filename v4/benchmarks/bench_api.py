@@ -0,0 +1,160 @@
+"""Load test the stateless HTTP game API across several server processes or launcher workers"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+V4_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, V4_DIR)
+
+from api_workers import reuse_port_available
+from hangman_api import SECRET_ENV_VAR
+
+GUESS_ORDER = "ETAOISRNCDLMHUPBGFYWKVXZJQ0123456789"
+
+
+def launch(port, catalog, secret, workers=1):
+    """Start one API server process (a supervisor when workers > 1)"""
+    env = dict(os.environ, **{SECRET_ENV_VAR: secret})
+    return subprocess.Popen(
+        [sys.executable, os.path.join(V4_DIR, 'hangman-v4.py'), '--catalog', catalog,
+         '--no-watch', '--serve', '--port', str(port), '--workers', str(workers)],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_for(nodes, ports, workers=1):
+    """Wait until every port answers, and until `workers` distinct processes have answered"""
+    deadline = time.monotonic() + 30
+    for port in ports:
+        seen = set()
+        while len(seen) < workers:
+            try:
+                # A new connection each time, so SO_REUSEPORT can hand it to any worker
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+                connection.request('GET', '/health')
+                seen.add(json.loads(connection.getresponse().read())["pid"])
+                connection.close()
+            except OSError:
+                if time.monotonic() > deadline:
+                    stop_nodes(nodes)
+                    raise RuntimeError(f"API server on port {port} did not start")
+                time.sleep(0.1)
+
+
+def start_nodes(count, base_port, catalog, secret):
+    """Launch count independent API server processes on consecutive ports"""
+    ports = [base_port + number for number in range(count)]
+    nodes = [launch(port, catalog, secret) for port in ports]
+    wait_for(nodes, ports)
+    return nodes, ports
+
+
+def start_workers(count, base_port, catalog, secret):
+    """Launch one supervisor with count worker processes sharing base_port"""
+    nodes = [launch(base_port, catalog, secret, count)]
+    # Accept-socket fallback workers are not picked evenly, so only require that one answers
+    wait_for(nodes, [base_port], count if count > 1 and reuse_port_available() else 1)
+    return nodes, [base_port]
+
+
+def stop_nodes(nodes):
+    for node in nodes:
+        node.terminate()
+    for node in nodes:
+        node.wait()
+
+
+def post(connection, path, body):
+    connection.request('POST', path, json.dumps(body), {'Content-Type': 'application/json'})
+    response = connection.getresponse()
+    return response.status, json.loads(response.read())
+
+
+def client(ports, duration, seed, results):
+    """Play rounds until duration runs out, sending each request to the next node in turn"""
+    rng = random.Random(seed)
+    connections = [http.client.HTTPConnection('127.0.0.1', port) for port in ports]
+    requests = rounds = errors = 0
+    turn = rng.randrange(len(connections))
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        status, state = post(connections[turn % len(connections)], '/rounds', {})
+        turn += 1
+        requests += 1
+        if status != 200:
+            errors += 1
+            continue
+        for guess in GUESS_ORDER:
+            # Consecutive guesses of one round land on different nodes
+            status, state = post(connections[turn % len(connections)], '/guesses', {"token": state["token"], "guess": guess})
+            turn += 1
+            requests += 1
+            if status != 200:
+                errors += 1
+                break
+            if state["game_over"]:
+                rounds += 1
+                break
+    for connection in connections:
+        connection.close()
+    results.put((requests, rounds, errors))
+
+
+def run(ports, clients, duration):
+    """Total (requests, rounds, errors, seconds) for clients running against ports"""
+    results = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=client, args=(ports, duration, number, results)) for number in range(clients)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    totals = [results.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    return tuple(sum(column) for column in zip(*totals)) + (elapsed,)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the stateless HTTP game API')
+    parser.add_argument('--nodes', default='1,2,4', help='Comma-separated server process counts to compare')
+    parser.add_argument('--mode', choices=('nodes', 'workers'), default='nodes',
+                        help='nodes: independent servers on separate ports, each guess sent to another one; '
+                             'workers: one --workers launcher sharing a single port')
+    parser.add_argument('--clients', type=int, default=0, help='Client processes (default: 2 per node of the largest run)')
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds per run')
+    parser.add_argument('--base-port', type=int, default=18080, help='First port to listen on')
+    parser.add_argument('--catalog', default=os.path.join(V4_DIR, 'aws_services.json'), help='Services file to serve')
+    args = parser.parse_args()
+
+    node_counts = [int(count) for count in args.nodes.split(',')]
+    clients = args.clients or 2 * max(node_counts)
+    secret = os.urandom(16).hex()
+    print(f"{os.cpu_count()} CPUs, {clients} client processes, {args.duration:.0f} s per run, {args.mode} mode")
+    print(f"{'procs':>5}{'req/s':>10}{'rounds/s':>10}{'errors':>8}{'speedup':>9}")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # Serve a private copy so the benchmark never touches the real catalog
+        catalog = os.path.join(workdir, os.path.basename(args.catalog))
+        shutil.copy(args.catalog, catalog)
+        baseline = None
+        for count in node_counts:
+            start = start_nodes if args.mode == 'nodes' else start_workers
+            nodes, ports = start(count, args.base_port, catalog, secret)
+            try:
+                requests, rounds, errors, elapsed = run(ports, clients, args.duration)
+            finally:
+                stop_nodes(nodes)
+            rate = requests / elapsed
+            baseline = baseline or rate
+            print(f"{count:5d}{rate:10.0f}{rounds / elapsed:10.0f}{errors:8d}{rate / baseline:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Benchmark the compiled catalog model against the plain dict-of-dicts catalog"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog_model import DIFFICULTIES, DIFFICULTY_MULTIPLIERS, parse_catalog
+from catalog_store import validate_services
+
+CATEGORIES = ("Compute", "Storage", "Database", "Networking", "Security", "Analytics",
+              "Machine Learning", "Management", "Application Integration", "Developer Tools")
+
+
+def build_catalog(size, seed=0):
+    """Synthetic catalog with size services spread over the categories and difficulties"""
+    rng = random.Random(seed)
+    return {
+        f"SERVICE{number}": {
+            "description": f"Synthetic service number {number} used to benchmark catalog loading",
+            "category": rng.choice(CATEGORIES),
+            "difficulty": rng.choice(DIFFICULTIES),
+            "certification_notes": f"Study notes for service {number}"
+        }
+        for number in range(size)
+    }
+
+
+def load_dicts(path):
+    """The original loader: json.load plus the store's shape check"""
+    with open(path, 'r') as file:
+        return validate_services(json.load(file))
+
+
+def load_model(path):
+    """json.load compiled into the validated slots-based catalog model"""
+    with open(path, 'r') as file:
+        return parse_catalog(json.load(file), path)
+
+
+def measure_load(loader, path, rounds):
+    """Best load time over rounds, and the memory retained by the loaded catalog"""
+    best = None
+    for _ in range(rounds):
+        gc.collect()
+        start = time.perf_counter()
+        loader(path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    gc.collect()
+    tracemalloc.start()
+    catalog = loader(path)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return catalog, best, retained, peak
+
+
+def dict_select(services, category, difficulty):
+    """The original select_service filter, comparing strings"""
+    return [
+        name for name, info in services.items()
+        if (category is None or info["category"] == category)
+        and (difficulty is None or info["difficulty"] == difficulty)
+    ]
+
+
+def time_calls(func, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start) / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark catalog loading, memory and filtering')
+    parser.add_argument('--services', type=int, default=100000, help='Number of synthetic services')
+    parser.add_argument('--rounds', type=int, default=5, help='Load and filter repetitions per measurement')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, 'aws_services.json')
+        with open(path, 'w') as file:
+            json.dump(build_catalog(args.services), file, indent=4)
+        size = os.path.getsize(path)
+
+        dicts, dict_time, dict_memory, dict_peak = measure_load(load_dicts, path, args.rounds)
+        model, model_time, model_memory, model_peak = measure_load(load_model, path, args.rounds)
+
+    filter_args = ("Database", "Hard")
+    dict_filter = time_calls(lambda: dict_select(dicts, *filter_args), args.rounds)
+    model_filter = time_calls(lambda: model.select(*filter_args), args.rounds)
+    assert sorted(dict_select(dicts, *filter_args)) == sorted(model.select(*filter_args))
+
+    multipliers = {"Easy": 1, "Medium": 2, "Hard": 3}
+    dict_score = time_calls(lambda: sum(multipliers[info["difficulty"]] for info in dicts.values()), args.rounds)
+    model_score = time_calls(lambda: sum(DIFFICULTY_MULTIPLIERS[record.difficulty_id] for record in model.values()), args.rounds)
+
+    print(f"Catalog: {args.services} services, {size / 1e6:.1f} MB of JSON, best of {args.rounds}")
+    print(f"{'':22}{'dict-of-dicts':>16}{'catalog model':>16}")
+    print(f"{'load + validate':22}{dict_time * 1e3:13.1f} ms{model_time * 1e3:13.1f} ms")
+    print(f"{'retained memory':22}{dict_memory / 1e6:13.1f} MB{model_memory / 1e6:13.1f} MB")
+    print(f"{'peak memory':22}{dict_peak / 1e6:13.1f} MB{model_peak / 1e6:13.1f} MB")
+    print(f"{'filter (cat + diff)':22}{dict_filter * 1e3:13.2f} ms{model_filter * 1e3:13.2f} ms")
+    print(f"{'score every service':22}{dict_score * 1e3:13.2f} ms{model_score * 1e3:13.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
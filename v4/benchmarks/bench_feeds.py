@@ -0,0 +1,146 @@
+"""Benchmark the sitemap and RSS sources against the HTML pages they replace, and check them on recorded fixtures"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aws_service_updater import AwsServiceUpdater
+from feed_sources import DOCS_SITEMAP_URL, WHATS_NEW_FEED_URL, iter_rss, iter_sitemap, sitemap_services
+from replay import replay_session, write_archive
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+V4_DIR = os.path.dirname(BENCH_DIR)
+SITEMAP_FIXTURE = os.path.join(BENCH_DIR, 'docs_sitemap_index.xml')
+FEED_FIXTURE = os.path.join(BENCH_DIR, 'whats_new_feed.xml')
+
+# What the fixtures must produce
+FIXTURE_SERVICES = 23
+FIXTURE_NEW_SERVICES = ["EKS", "KMS", "STEPFUNCTIONS", "BEDROCK"]
+FIXTURE_ANNOUNCEMENTS = 16
+
+
+def check_fixtures(catalog):
+    """Run the updater's sitemap and RSS sources over the recorded fixtures in a scratch directory"""
+    workdir = tempfile.mkdtemp(prefix='bench_feeds_')
+    cwd = os.getcwd()
+    try:
+        os.chdir(workdir)
+        shutil.copy(catalog, 'aws_services.json')
+        responses = {}
+        for url, path, content_type in ((DOCS_SITEMAP_URL, SITEMAP_FIXTURE, "application/xml"),
+                                        (WHATS_NEW_FEED_URL, FEED_FIXTURE, "application/rss+xml")):
+            with open(path, 'rb') as file:
+                responses[url] = (200, {"Content-Type": content_type}, file.read())
+        write_archive('fixtures.zip', responses)
+
+        # Look back far enough that the recorded feed is always within the first run's window
+        updater = AwsServiceUpdater('aws_services.json', session=replay_session('fixtures.zip'), docs_source="sitemap",
+                                    whats_new_feed=True, whats_new_bootstrap_days=36500)
+        with contextlib.redirect_stdout(io.StringIO()):
+            entries = updater.read_docs_sitemap()
+            announcements = updater.collect_whats_new()
+            updater.merge_announcements(announcements)
+            repeated = updater.collect_whats_new()
+        new_services = [entry[3] for entry in entries if entry[3] not in updater.current_services]
+        assert len(entries) == FIXTURE_SERVICES, entries
+        assert new_services == FIXTURE_NEW_SERVICES, new_services
+        assert len(announcements) == FIXTURE_ANNOUNCEMENTS, announcements
+        assert announcements[0][1] == "2026-10-17" and "&" in announcements[0][2], announcements[0]
+        # The high-water mark stops a second read at the newest announcement already ingested
+        assert repeated == [], repeated
+        print(f"Fixtures: {len(entries)} services ({', '.join(new_services)} new), "
+              f"{len(announcements)} announcements, 0 on the next run")
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def sitemap_document(count):
+    """Docs sitemap index and the equivalent HTML docs index page, with count guides each"""
+    entries = "".join(f"<sitemap><loc>https://docs.aws.amazon.com/service{number}/latest/userguide/sitemap.xml</loc>"
+                      f"<lastmod>2026-10-01</lastmod></sitemap>" for number in range(count))
+    links = "".join(f'<li><a href="https://docs.aws.amazon.com/service{number}/">Amazon Service {number}</a></li>'
+                    for number in range(count))
+    sitemap = f'<?xml version="1.0"?><sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</sitemapindex>'
+    page = f'<html><body><div class="category"><h2>Compute</h2><ul>{links}</ul></div></body></html>'
+    return sitemap.encode('utf-8'), page.encode('utf-8')
+
+
+def feed_document(count):
+    """What's New RSS feed and the equivalent HTML What's New page, with count announcements each"""
+    body = "&lt;p&gt;Feature {0} is now generally available in all &lt;b&gt;commercial&lt;/b&gt; regions.&lt;/p&gt;"
+    items = "".join(f"<item><guid>post-{number}</guid><title>SERVICE{number} adds feature {number}</title>"
+                    f"<description>{body.format(number)}</description><pubDate>Sat, 17 Oct 2026 18:00:00 GMT</pubDate>"
+                    f"<link>https://aws.amazon.com/about-aws/whats-new/2026/10/post-{number}/</link></item>"
+                    for number in range(count))
+    posts = "".join(f'<div class="blog-post"><h2>SERVICE{number} adds feature {number}</h2><time>Oct 17, 2026</time>'
+                    f'<p>Feature {number} is now generally available in all <b>commercial</b> regions.</p></div>'
+                    for number in range(count))
+    feed = f'<?xml version="1.0"?><rss version="2.0"><channel><title>Recent Announcements</title>{items}</channel></rss>'
+    page = f'<html><body>{posts}</body></html>'
+    return feed.encode('utf-8'), page.encode('utf-8')
+
+
+def html_services(page):
+    """Link text and URL of every docs index link, as read_docs_index() selects them"""
+    soup = BeautifulSoup(page, 'html.parser')
+    return [(link.text.strip(), link.get('href')) for category in soup.select('div.category')
+            for link in category.select('ul li a')]
+
+
+def html_announcements(page):
+    """Title, date and text of every What's New post, as read_blog_announcements() selects them"""
+    soup = BeautifulSoup(page, 'html.parser')
+    return [(post.select_one('h2').text.strip(), post.select_one('time').text.strip(), post.select_one('p').text.strip())
+            for post in soup.select('div.blog-post')]
+
+
+def chunked(document, size=64 * 1024):
+    """File object handing out document a network-sized chunk at a time"""
+    return io.BufferedReader(io.BytesIO(document), buffer_size=size)
+
+
+def measure(parse, document):
+    """(items, CPU seconds, peak traced MiB) for one parse of document"""
+    tracemalloc.start()
+    start = time.process_time()
+    items = sum(1 for _ in parse(document))
+    cpu = time.process_time() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return items, cpu, peak / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parse cost of the sitemap and RSS sources vs the HTML pages')
+    parser.add_argument('--items', type=int, default=5000, help='Guides and announcements in the generated documents')
+    parser.add_argument('--catalog', default=os.path.join(V4_DIR, 'aws_services.json'), help='Catalog the fixtures are checked against')
+    args = parser.parse_args()
+
+    check_fixtures(args.catalog)
+
+    sitemap, index_page = sitemap_document(args.items)
+    feed, news_page = feed_document(args.items)
+    cases = (
+        ("docs index (HTML)", html_services, index_page),
+        ("docs sitemap", lambda document: sitemap_services(iter_sitemap(chunked(document))), sitemap),
+        ("what's new (HTML)", html_announcements, news_page),
+        ("what's new RSS", lambda document: iter_rss(chunked(document)), feed),
+    )
+    print(f"{'source':20}{'KiB':>8}{'items':>8}{'us/item':>10}{'peak MiB':>10}")
+    for name, parse, document in cases:
+        items, cpu, peak = measure(parse, document)
+        print(f"{name:20}{len(document) / 1024:8.0f}{items:8d}{cpu / items * 1e6:10.1f}{peak:10.2f}")
+
+
+if __name__ == "__main__":
+    main()
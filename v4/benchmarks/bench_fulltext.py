@@ -0,0 +1,80 @@
+"""Benchmark building, syncing and querying the full-text notes index"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fulltext import FullTextIndex
+
+COMMON = ("service", "managed", "data", "understand", "know", "scaling", "security", "storage", "cost", "performance")
+
+
+def synthetic_catalog(count, seed=0):
+    """count services whose descriptions and notes mix common and rare words"""
+    rng = random.Random(seed)
+    vocabulary = [f"term{number}" for number in range(20000)]
+    services = {}
+    for number in range(count):
+        words = lambda n: " ".join(rng.choice(COMMON) if rng.random() < 0.4 else rng.choice(vocabulary) for _ in range(n))
+        services[f"SERVICE{number}"] = {
+            "description": words(15),
+            "certification_notes": words(30),
+            "note_entries": [{"text": f"Exam domain: {words(10)}"} for _ in range(rng.randint(0, 3))],
+        }
+    return services
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the full-text notes index')
+    parser.add_argument('--services', type=int, default=100000, help='Number of synthetic services')
+    parser.add_argument('--queries', type=int, default=100, help='Queries per query kind')
+    parser.add_argument('--edits', type=int, default=100, help='Services edited before the incremental sync')
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    services = synthetic_catalog(args.services)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, 'aws_services.fulltext.json')
+
+        index = FullTextIndex()
+        _, build = timed(lambda: index.sync(services))
+        _, save = timed(lambda: index.save(path))
+        loaded, load = timed(lambda: FullTextIndex.load(path))
+        _, unchanged = timed(lambda: loaded.sync(services))
+
+        for name in rng.sample(list(services), args.edits):
+            services[name]["certification_notes"] += " newly added note about term7"
+        (reindexed, _), incremental = timed(lambda: loaded.sync(services))
+
+        print(f"Catalog: {args.services} services, index file {os.path.getsize(path) / 1e6:.1f} MB")
+        print(f"full build:          {build:7.2f} s")
+        print(f"save:                {save:7.2f} s")
+        print(f"load:                {load:7.2f} s")
+        print(f"sync, no changes:    {unchanged:7.2f} s")
+        print(f"sync, {reindexed:4d} edited:   {incremental:7.2f} s")
+
+    kinds = {
+        "rare term": lambda: f"term{rng.randrange(20000)}",
+        "two rare terms": lambda: f"term{rng.randrange(20000)} term{rng.randrange(20000)}",
+        "common + rare": lambda: f"{rng.choice(COMMON)} term{rng.randrange(20000)}",
+        "common term": lambda: rng.choice(COMMON),
+    }
+    print(f"{'query kind':18}{'p50 ms':>9}{'max ms':>9}")
+    for kind, make_query in kinds.items():
+        samples = sorted(timed(lambda: loaded.search(make_query()))[1] for _ in range(args.queries))
+        print(f"{kind:18}{samples[len(samples) // 2] * 1e3:9.2f}{samples[-1] * 1e3:9.2f}")
+
+
+if __name__ == "__main__":
+    main()
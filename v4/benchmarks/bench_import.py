@@ -0,0 +1,101 @@
+"""Benchmark bulk catalog import and export through the game's service API"""
+import argparse
+import csv
+import importlib.util
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+V4_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, V4_DIR)
+
+from catalog_io import CSV_COLUMNS, open_stream, read_rows
+from catalog_model import DIFFICULTIES
+
+
+def load_game_module():
+    """Import hangman-v4.py (its file name is not a valid module name)"""
+    spec = importlib.util.spec_from_file_location('hangman_v4', os.path.join(V4_DIR, 'hangman-v4.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def synthetic_rows(count, seed=0):
+    """Yield count service rows as dicts including the name"""
+    rng = random.Random(seed)
+    categories = [f"Category {number}" for number in range(25)]
+    for number in range(count):
+        yield {
+            "name": f"SERVICE{number}",
+            "description": f"Bulk imported service number {number}",
+            "category": rng.choice(categories),
+            "difficulty": rng.choice(DIFFICULTIES),
+            "certification_notes": f"Study notes for service {number}"
+        }
+
+
+def write_input(path, format, count):
+    with open(path, 'w', newline='') as file:
+        if format == "csv":
+            writer = csv.DictWriter(file, fieldnames=CSV_COLUMNS)
+            writer.writeheader()
+            writer.writerows(synthetic_rows(count))
+        else:
+            for row in synthetic_rows(count):
+                file.write(json.dumps(row) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark bulk import/export of the services catalog')
+    parser.add_argument('--services', type=int, default=100000, help='Number of services to import')
+    parser.add_argument('--format', choices=("ndjson", "csv"), default="ndjson")
+    parser.add_argument('--trace-memory', action='store_true', help='Report peak memory of the first import (tracemalloc slows it down)')
+    args = parser.parse_args()
+
+    game_module = load_game_module()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        source = os.path.join(workdir, f'services.{args.format}')
+        catalog = os.path.join(workdir, 'aws_services.json')
+        write_input(source, args.format, args.services)
+        with open(catalog, 'w') as file:
+            json.dump({}, file)
+
+        game = game_module.AwsHangman(catalog)
+        if args.trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        with open_stream(source, 'r') as file:
+            added, _, _ = game.import_services(read_rows(file, args.format))
+        import_time = time.perf_counter() - start
+        memory = ""
+        if args.trace_memory:
+            memory = f", peak {tracemalloc.get_traced_memory()[1] / 1e6:.0f} MB"
+            tracemalloc.stop()
+
+        # Importing the same file again updates every service in place
+        start = time.perf_counter()
+        with open_stream(source, 'r') as file:
+            _, reimported, _ = game.import_services(read_rows(file, args.format))
+        reimport_time = time.perf_counter() - start
+
+        export_path = os.path.join(workdir, f'export.{args.format}')
+        start = time.perf_counter()
+        with open_stream(export_path, 'w') as file:
+            exported = game.export_services(file, args.format)
+        export_time = time.perf_counter() - start
+
+        print(f"Input: {args.services} services, {os.path.getsize(source) / 1e6:.1f} MB of {args.format}")
+        print(f"import (new):     {import_time:6.2f} s  ({added} added{memory})")
+        print(f"import (upsert):  {reimport_time:6.2f} s  ({reimported} updated)")
+        print(f"export:           {export_time:6.2f} s  ({exported} services)")
+        print(f"catalog written:  {os.path.getsize(catalog) / 1e6:.1f} MB in a single atomic save per import")
+
+
+if __name__ == "__main__":
+    main()
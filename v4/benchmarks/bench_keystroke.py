@@ -0,0 +1,130 @@
+"""Measure key-press-to-frame latency of play_game through a pseudo-terminal, keystroke vs line input"""
+import argparse
+import fcntl
+import os
+import pty
+import re
+import select
+import shutil
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import termios
+import time
+
+V4_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+GUESS_ORDER = "ETAOISRNCDLMHUPBGFYWKVXZJQ0123456789"
+MENU_PROMPT = b"Enter your choice (1-10): "
+ROUND_OVER = re.compile(rb"Press (any key|Enter) to continue")
+# Shown once a round is ready for the first guess
+ROUND_PROMPTS = {"keys": b"press Enter to guess the whole name", "lines": b"Please guess a letter"}
+
+
+class PtyGame:
+    """hangman-v4.py running on a pseudo-terminal of a fixed size"""
+
+    def __init__(self, catalog, mode, rows=50, columns=160):
+        self.master, slave = pty.openpty()
+        fcntl.ioctl(slave, termios.TIOCSWINSZ, struct.pack("HHHH", rows, columns, 0, 0))
+        command = [sys.executable, os.path.join(V4_DIR, 'hangman-v4.py'), '--catalog', catalog, '--no-watch', '--player', 'bench']
+        if mode == "lines":
+            command.append('--line-input')
+        env = dict(os.environ, TERM=os.environ.get('TERM', 'xterm'))
+        self.process = subprocess.Popen(command, stdin=slave, stdout=slave, stderr=slave, env=env, start_new_session=True)
+        os.close(slave)
+        self.output = b""
+
+    def send(self, data):
+        self.output = b""
+        os.write(self.master, data)
+
+    def expect(self, pattern, timeout=30):
+        """Read output until pattern (bytes or compiled regex) appears; returns the match"""
+        deadline = time.monotonic() + timeout
+        while True:
+            match = pattern.search(self.output) if hasattr(pattern, 'search') else re.search(re.escape(pattern), self.output)
+            if match:
+                return match
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([self.master], [], [], remaining)[0]:
+                raise TimeoutError(f"timed out waiting for {pattern!r}; last output: {self.output[-300:]!r}")
+            try:
+                self.output += os.read(self.master, 65536)
+            except OSError:
+                raise EOFError("the game exited") from None
+
+    def close(self):
+        try:
+            self.send(b"10\r")
+            self.process.wait(timeout=10)
+        except (EOFError, TimeoutError, subprocess.TimeoutExpired):
+            self.process.kill()
+            self.process.wait()
+        os.close(self.master)
+
+
+def guess_feedback(letter):
+    """Output that shows the frame after guessing letter has been drawn"""
+    return re.compile(rb"(%s is not in the word|Good job, %s|Press (any key|Enter) to continue)" % (letter, letter))
+
+
+def measure(catalog, mode, guesses):
+    """(startup seconds, per-guess latencies) for mode 'keys' or 'lines'"""
+    start = time.perf_counter()
+    game = PtyGame(catalog, mode)
+    latencies = []
+    try:
+        game.expect(MENU_PROMPT)
+        startup = time.perf_counter() - start
+        while len(latencies) < guesses:
+            game.send(b"1\r")
+            game.expect(ROUND_PROMPTS[mode])
+            # Every letter and digit in turn always ends the round; only the first guesses are timed
+            for letter in GUESS_ORDER.encode():
+                letter = bytes([letter])
+                start = time.perf_counter()
+                if mode == "keys":
+                    game.send(letter)
+                    match = game.expect(guess_feedback(letter))
+                else:
+                    # Line input also waits for the game to ask for the next guess
+                    game.send(letter + b"\r")
+                    match = game.expect(re.compile(rb"(Please guess a letter|Press Enter to continue)"))
+                if len(latencies) < guesses:
+                    latencies.append(time.perf_counter() - start)
+                if ROUND_OVER.search(match.group(0)):
+                    break
+            game.send(b"\r")
+            game.expect(MENU_PROMPT)
+    finally:
+        game.close()
+    return startup, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Key-press-to-frame latency of play_game through a pseudo-terminal')
+    parser.add_argument('--guesses', type=int, default=50, help='Keystroke-mode guesses to time')
+    parser.add_argument('--line-guesses', type=int, default=5, help='Line-mode guesses to time (each waits out the 1 s message pause)')
+    parser.add_argument('--catalog', default=os.path.join(V4_DIR, 'aws_services.json'), help='Services file to play')
+    args = parser.parse_args()
+
+    print(f"{'mode':8}{'startup s':>11}{'guesses':>9}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}")
+    with tempfile.TemporaryDirectory() as workdir:
+        # Play a private copy so the benchmark never touches the real catalog or leaderboard
+        catalog = os.path.join(workdir, os.path.basename(args.catalog))
+        shutil.copy(args.catalog, catalog)
+        for mode, guesses in (("keys", args.guesses), ("lines", args.line_guesses)):
+            if not guesses:
+                continue
+            startup, latencies = measure(catalog, mode, guesses)
+            latencies.sort()
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            print(f"{mode:8}{startup:11.3f}{len(latencies):9d}{statistics.median(latencies) * 1e3:9.2f}"
+                  f"{p95 * 1e3:9.2f}{latencies[-1] * 1e3:9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Benchmark the leaderboard: skiplist updates, top-k and rank vs sorting, snapshots and the journal"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from leaderboard import Leaderboard, LeaderboardStore
+
+
+def player_rows(count, rng):
+    """Snapshot data for count players with random scores, in rank order"""
+    scored = sorted(((rng.randrange(0, 5000, 10), seq, f"player{seq}") for seq in range(1, count + 1)),
+                    key=lambda row: (-row[0], row[1]))
+    return {
+        "seq": count,
+        "players": [[player, score, seq, score // 10, score // 10 + 1] for score, seq, player in scored],
+    }
+
+
+def naive_top(board, count):
+    """top(count) by sorting every player, as a plain dict of scores would need"""
+    ranked = sorted(board.players.items(), key=lambda item: (-item[1][0], item[1][1]))
+    return [player for player, _ in ranked[:count]]
+
+
+def naive_rank(board, player):
+    score, seq = board.players[player][:2]
+    return 1 + sum(1 for other_score, other_seq, _, _ in board.players.values()
+                   if (-other_score, other_seq) < (-score, seq))
+
+
+def timed(function, repeat):
+    """Mean seconds per call of function over repeat calls"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark leaderboard updates, queries and persistence')
+    parser.add_argument('--players', type=int, default=1000000, help='Number of players on the board')
+    parser.add_argument('--updates', type=int, default=100000, help='Random results to record')
+    parser.add_argument('--queries', type=int, default=1000, help='top(10) and rank() calls to time')
+    parser.add_argument('--naive', type=int, default=3, help='Full-sort top(10) and rank() calls to time')
+    parser.add_argument('--journal', type=int, default=5000, help='Results to record through the store')
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    data = player_rows(args.players, rng)
+    names = [row[0] for row in data["players"]]
+
+    start = time.perf_counter()
+    board = Leaderboard.from_snapshot(data)
+    print(f"Built a {args.players}-player board from sorted rows in {time.perf_counter() - start:.2f} s")
+
+    results = [(rng.choice(names), rng.choice((0, 10, 20, 30)), rng.random() < 0.6) for _ in range(args.updates)]
+    start = time.perf_counter()
+    for player, points, won in results:
+        board.record(player, points, won)
+    per_update = (time.perf_counter() - start) / args.updates
+    print(f"record(): {per_update * 1e6:.1f} us per result ({args.updates} results)")
+
+    samples = [rng.choice(names) for _ in range(args.queries)]
+    top = timed(lambda: board.top(10), args.queries)
+    rank = timed(lambda: board.rank(samples[rng.randrange(len(samples))]), args.queries)
+    sort_top = timed(lambda: naive_top(board, 10), args.naive)
+    scan_rank = timed(lambda: naive_rank(board, rng.choice(samples)), args.naive)
+    assert naive_top(board, 10) == [row["player"] for row in board.top(10)]
+    assert naive_rank(board, samples[0]) == board.rank(samples[0])
+    print(f"{'query':10}{'skiplist us':>13}{'full sort us':>14}{'speedup':>10}")
+    print(f"{'top(10)':10}{top * 1e6:13.1f}{sort_top * 1e6:14.0f}{sort_top / top:9.0f}x")
+    print(f"{'rank()':10}{rank * 1e6:13.1f}{scan_rank * 1e6:14.0f}{scan_rank / rank:9.0f}x")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        store = LeaderboardStore.open(os.path.join(workdir, 'aws_services.json'), snapshot_interval=float('inf'))
+        store.board, store.unsaved = board, len(board)
+        start = time.perf_counter()
+        store.snapshot()
+        size = os.path.getsize(store.snapshot_path)
+        print(f"Snapshot written in {time.perf_counter() - start:.2f} s ({size / 2 ** 20:.1f} MiB)")
+
+        start = time.perf_counter()
+        for number in range(args.journal):
+            player, points, won = results[number % len(results)]
+            store.record(player, points, won, number)
+        per_append = (time.perf_counter() - start) / args.journal
+        print(f"Journaled record(): {per_append * 1e6:.0f} us per result ({1 / per_append:.0f} results/s)")
+
+        start = time.perf_counter()
+        reopened = LeaderboardStore.open(os.path.join(workdir, 'aws_services.json'))
+        print(f"Restart: snapshot load plus {args.journal}-result replay in {time.perf_counter() - start:.2f} s")
+        assert reopened.board.top(10) == store.board.top(10)
+
+
+if __name__ == "__main__":
+    main()
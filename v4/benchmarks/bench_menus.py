@@ -0,0 +1,202 @@
+"""End-to-end benchmarks of the interactive menus, driven through a pseudo-terminal with scripted keystrokes"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+from bench_catalog_model import build_catalog
+from bench_keystroke import GUESS_ORDER, MENU_PROMPT, ROUND_OVER, ROUND_PROMPTS, PtyGame, guess_feedback
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+V4_DIR = os.path.dirname(BENCH_DIR)
+DEFAULT_THRESHOLDS = os.path.join(BENCH_DIR, 'menu_thresholds.json')
+
+# Metrics in the order they are measured and reported
+METRICS = ("startup", "menu", "round_start", "guess", "category_round_start", "category_guess", "add_service", "update_service")
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def summarize(samples):
+    """{"samples", "p50_ms", "p95_ms", "max_ms"} for a list of seconds"""
+    return {
+        "samples": len(samples),
+        "p50_ms": round(percentile(samples, 50) * 1e3, 3),
+        "p95_ms": round(percentile(samples, 95) * 1e3, 3),
+        "max_ms": round(max(samples) * 1e3, 3),
+    }
+
+
+def timed(game, data, pattern):
+    """Seconds from sending data until pattern appears in the output"""
+    start = time.perf_counter()
+    game.send(data)
+    game.expect(pattern)
+    return time.perf_counter() - start
+
+
+def play_round(game, samples, guesses):
+    """Guess letters in turn until the round ends, timing up to `guesses` of them, then return to the menu"""
+    for letter in GUESS_ORDER.encode():
+        letter = bytes([letter])
+        start = time.perf_counter()
+        game.send(letter)
+        match = game.expect(guess_feedback(letter))
+        if guesses > 0:
+            samples.append(time.perf_counter() - start)
+            guesses -= 1
+        if ROUND_OVER.search(match.group(0)):
+            break
+    game.send(b"\r")
+    game.expect(MENU_PROMPT)
+
+
+def run_suite(catalog, repeat):
+    """Samples in seconds for every metric"""
+    samples = {metric: [] for metric in METRICS}
+    # Startup gets fresh processes; everything else is measured in one session
+    for _ in range(repeat):
+        start = time.perf_counter()
+        game = PtyGame(catalog, "keys")
+        game.expect(MENU_PROMPT)
+        samples["startup"].append(time.perf_counter() - start)
+        game.close()
+
+    game = PtyGame(catalog, "keys")
+    try:
+        game.expect(MENU_PROMPT)
+        for number in range(repeat):
+            # Menu navigation: open the statistics screen and come back
+            game.send(b"6\r")
+            game.expect(b"Press Enter to continue")
+            samples["menu"].append(timed(game, b"\r", MENU_PROMPT))
+
+            samples["round_start"].append(timed(game, b"1\r", ROUND_PROMPTS["keys"]))
+            play_round(game, samples["guess"], 5)
+
+            game.send(b"2\r")
+            game.expect(b"Enter your choice: ")
+            samples["category_round_start"].append(timed(game, b"1\r", ROUND_PROMPTS["keys"]))
+            play_round(game, samples["category_guess"], 5)
+
+            # Save latency: from the last answer until the game confirms the write
+            name = f"MENUBENCH{os.getpid()}X{number}".encode()
+            game.send(b"4\r")
+            for prompt, answer in ((b"Enter service name: ", name),
+                                   (b"Enter service description: ", b"Service added by the menu benchmark"),
+                                   (b"Select category or add new: ", b"1"),
+                                   (b"Enter your choice: ", b"1")):
+                game.expect(prompt)
+                game.send(answer + b"\r")
+            game.expect(b"Enter certification study notes: ")
+            samples["add_service"].append(timed(game, b"Benchmark notes\r", b"Service added successfully"))
+            game.send(b"\r")
+            game.expect(MENU_PROMPT)
+
+            game.send(b"5\r")
+            game.expect(b"Search services")
+            game.send(name + b"\r")
+            game.expect(b"Select service to update")
+            # Pick the first match, then keep every field but the notes
+            for prompt, answer in ((b"Select service to update", b"1"),
+                                   (b"Description [", b""),
+                                   (b"Select category: ", b"keep"),
+                                   (b"Enter your choice: ", b"keep")):
+                game.expect(prompt)
+                game.send(answer + b"\r")
+            game.expect(b"Certification notes [")
+            samples["update_service"].append(timed(game, b"Updated benchmark notes\r", b"Service updated successfully"))
+            game.send(b"\r")
+            game.expect(MENU_PROMPT)
+    finally:
+        game.close()
+    return samples
+
+
+def check(results, thresholds, baseline=None, tolerance=0.25, min_delta_ms=1.0):
+    """Regression messages: p95 over its budget, or p50 more than tolerance slower than the baseline"""
+    problems = []
+    for metric, summary in results["metrics"].items():
+        budget = thresholds.get(metric, {}).get("p95_ms")
+        if budget is not None and summary["p95_ms"] > budget:
+            problems.append(f"{metric}: p95 {summary['p95_ms']:.2f} ms is over its {budget} ms budget")
+        previous = (baseline or {}).get("metrics", {}).get(metric)
+        if previous:
+            # Ignore sub-millisecond jitter on very fast metrics
+            delta = summary["p50_ms"] - previous["p50_ms"]
+            if delta > min_delta_ms and summary["p50_ms"] > previous["p50_ms"] * (1 + tolerance):
+                problems.append(f"{metric}: p50 {summary['p50_ms']:.2f} ms vs {previous['p50_ms']:.2f} ms in the baseline "
+                                f"(+{delta / previous['p50_ms'] * 100:.0f}%)")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the interactive menus through a pseudo-terminal')
+    parser.add_argument('--repeat', type=int, default=10, help='Times to run each scenario')
+    parser.add_argument('--services', type=int, default=0, help='Play a synthetic catalog of this many services instead of --catalog')
+    parser.add_argument('--catalog', default=os.path.join(V4_DIR, 'aws_services.json'), help='Services file to play')
+    parser.add_argument('--output', metavar='PATH', help='Write the results as JSON to PATH')
+    parser.add_argument('--thresholds', default=DEFAULT_THRESHOLDS, help='JSON file of per-metric p95 budgets in ms')
+    parser.add_argument('--baseline', metavar='PATH', help='Results JSON from an earlier run to compare p50 latencies with')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed p50 slowdown against the baseline (0.25 = 25%%)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # Play a private copy so the benchmark never touches the real catalog or leaderboard
+        catalog = os.path.join(workdir, 'aws_services.json')
+        if args.services:
+            with open(catalog, 'w') as file:
+                json.dump(build_catalog(args.services), file)
+        else:
+            shutil.copy(args.catalog, catalog)
+        with open(catalog, 'r') as file:
+            services = len(json.load(file))
+        samples = run_suite(catalog, args.repeat)
+
+    results = {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "services": services,
+            "repeat": args.repeat,
+        },
+        "metrics": {metric: summarize(samples[metric]) for metric in METRICS},
+    }
+
+    print(f"{services} services, {args.repeat} runs per scenario")
+    print(f"{'metric':22}{'samples':>8}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for metric, summary in results["metrics"].items():
+        print(f"{metric:22}{summary['samples']:8d}{summary['p50_ms']:10.2f}{summary['p95_ms']:10.2f}{summary['max_ms']:10.2f}")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=4)
+
+    thresholds = {}
+    if args.thresholds and os.path.exists(args.thresholds):
+        with open(args.thresholds, 'r') as file:
+            thresholds = json.load(file)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r') as file:
+            baseline = json.load(file)
+    if baseline and baseline.get("environment", {}).get("services") != services:
+        print(f"Warning: the baseline was measured with {baseline.get('environment', {}).get('services')} services")
+    problems = check(results, thresholds, baseline, args.tolerance)
+    for problem in problems:
+        print(f"REGRESSION {problem}")
+    if problems:
+        sys.exit(1)
+    print("All metrics within thresholds")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Benchmark normalize_service_name over a corpus of real docs link texts"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aws_service_updater import AwsServiceUpdater
+
+CORPUS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'docs_link_texts.txt')
+
+
+def legacy_normalize_service_name(name):
+    """The original if-chain implementation, kept as the baseline"""
+    name = name.replace("Amazon", "").replace("AWS", "").strip()
+    if "S3" in name:
+        return "S3"
+    if "EC2" in name:
+        return "EC2"
+    if "RDS" in name:
+        return "RDS"
+    if "Lambda" in name:
+        return "LAMBDA"
+    name = re.sub(r'[^\w\s]', '', name)
+    name = re.sub(r'\s+', '', name)
+    return name.upper() if name else None
+
+
+def load_corpus():
+    """Read one link text per line from the corpus file"""
+    with open(CORPUS_FILE, 'r') as file:
+        return [line.strip() for line in file if line.strip()]
+
+
+def time_pass(normalize, corpus, rounds):
+    """Return the average seconds per full pass over the corpus"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for name in corpus:
+            normalize(name)
+    return (time.perf_counter() - start) / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark service name normalization')
+    parser.add_argument('--rounds', type=int, default=200, help='Passes over the corpus per measurement')
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        services_file = os.path.join(workdir, 'aws_services.json')
+
+        # Cold: a fresh updater with no persisted table computes every name once
+        cold_updater = AwsServiceUpdater(services_file)
+        start = time.perf_counter()
+        for name in corpus:
+            cold_updater.normalize_service_name(name)
+        cold = time.perf_counter() - start
+        cold_updater.save_normalization_cache()
+
+        # Warm: the next run starts from the table persisted by the previous one
+        warm_updater = AwsServiceUpdater(services_file)
+        warm = time_pass(warm_updater.normalize_service_name, corpus, args.rounds)
+
+    legacy = time_pass(legacy_normalize_service_name, corpus, args.rounds)
+    uncached = time_pass(warm_updater.compute_service_name, corpus, args.rounds)
+
+    print(f"Corpus: {len(corpus)} link texts, {args.rounds} rounds")
+    print(f"legacy if-chain:      {legacy * 1e6:9.1f} us/pass")
+    print(f"uncached (aliases):   {uncached * 1e6:9.1f} us/pass")
+    print(f"cold cache (1 pass):  {cold * 1e6:9.1f} us/pass")
+    print(f"warm cache:           {warm * 1e6:9.1f} us/pass ({legacy / warm:.1f}x vs legacy)")
+
+    changed = [name for name in corpus if legacy_normalize_service_name(name) != warm_updater.normalize_service_name(name)]
+    print(f"Names mapped differently from legacy (alias table): {len(changed)}")
+    for name in changed:
+        print(f"  {name!r}: {legacy_normalize_service_name(name)} -> {warm_updater.normalize_service_name(name)}")
+
+
+if __name__ == "__main__":
+    main()
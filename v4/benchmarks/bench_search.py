@@ -0,0 +1,103 @@
+"""Benchmark the service search index used by the update picker"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from service_search import ServiceIndex
+
+SYLLABLES = ("ka", "lo", "mi", "dyn", "amo", "el", "as", "ti", "cl", "oud", "fr", "ont", "ath", "ena",
+             "kin", "esis", "gl", "ue", "red", "shi", "ft", "neb", "ula", "sag", "em", "aker", "rek",
+             "og", "nit", "ion", "co", "gn", "ito", "ste", "p", "fun", "ct", "io", "ns", "or", "bit",
+             "zen", "qu", "ark", "vo", "lt", "ix", "py", "rus", "tor", "ve", "xa", "ly", "ra")
+
+COMMON_WORDS = ("service", "managed", "fully", "data", "for", "the", "and", "that", "cloud", "scalable")
+
+
+def synthetic_catalog(count, seed=0):
+    """count services with syllable names and descriptions drawn from a mixed vocabulary"""
+    rng = random.Random(seed)
+    vocabulary = ["".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(5000)]
+    services = {}
+    while len(services) < count:
+        name = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 5))).upper() + str(rng.randint(0, 99))
+        words = rng.sample(COMMON_WORDS, 4) + rng.sample(vocabulary, 6)
+        rng.shuffle(words)
+        services[name] = {"description": " ".join(words)}
+    return services
+
+
+def typo(word, rng):
+    """word with one character replaced"""
+    position = rng.randrange(len(word))
+    return word[:position] + rng.choice("abcdefghijklmnopqrstuvwxyz") + word[position + 1:]
+
+
+def linear_search(services, query):
+    """Baseline: sort every name and scan for a case-insensitive substring, as a naive picker would"""
+    query = query.lower()
+    return [name for name in sorted(services) if query in name.lower() or query in services[name]["description"]][:10]
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.99)], samples[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the service search index')
+    parser.add_argument('--services', type=int, default=100000, help='Number of synthetic services')
+    parser.add_argument('--queries', type=int, default=200, help='Queries per query kind')
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    services = synthetic_catalog(args.services)
+    names = list(services)
+
+    start = time.perf_counter()
+    index = ServiceIndex.build(services)
+    build_time = time.perf_counter() - start
+
+    kinds = {
+        "exact name": lambda name: name,
+        "name prefix": lambda name: name[:4].lower(),
+        "name with typo": lambda name: typo(name, rng).lower(),
+        "description word": lambda name: services[name]["description"].split()[rng.randrange(10)],
+        "two terms": lambda name: name[:5] + " " + services[name]["description"].split()[0],
+    }
+
+    print(f"Catalog: {args.services} services, index built in {build_time:.2f} s")
+    print(f"{'query kind':20}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}{'hit rate':>10}")
+    for kind, make_query in kinds.items():
+        samples = []
+        hits = 0
+        for name in rng.sample(names, args.queries):
+            query = make_query(name)
+            start = time.perf_counter()
+            results = index.search(query)
+            samples.append(time.perf_counter() - start)
+            hits += name in results
+        p50, p99, worst = percentiles(samples)
+        print(f"{kind:20}{p50 * 1e3:9.2f}{p99 * 1e3:9.2f}{worst * 1e3:9.2f}{hits / args.queries:10.0%}")
+
+    samples = []
+    for name in rng.sample(names, 20):
+        start = time.perf_counter()
+        linear_search(services, name[:4].lower())
+        samples.append(time.perf_counter() - start)
+    print(f"{'linear scan (base)':20}{percentiles(samples)[0] * 1e3:9.2f}")
+
+    start = time.perf_counter()
+    for name in rng.sample(names, args.queries):
+        index.update(name, {"description": services[name]["description"] + " updated"})
+        index.remove(name)
+        index.add(name, services[name])
+    per_edit = (time.perf_counter() - start) / (args.queries * 3)
+    print(f"add/update/remove:  {per_edit * 1e6:.0f} us per edit")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Benchmark per-worker memory and startup: loading the catalog file vs attaching to shared memory"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_catalog_model import build_catalog
+from catalog_model import parse_catalog
+from shared_catalog import CatalogPublisher, SharedCatalogClient
+
+
+def memory_kib():
+    """(private, proportional set size) of this process in KiB, from /proc (Linux)"""
+    fields = {}
+    with open('/proc/self/smaps_rollup', 'r') as file:
+        for line in file:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0), fields.get('Pss', 0)
+
+
+def worker(mode, source, lookups, ready, results, release):
+    """Get a catalog the given way, play lookups against it, report memory, then wait"""
+    baseline, _ = memory_kib()
+    start = time.perf_counter()
+    if mode == "file":
+        with open(source, 'r') as file:
+            catalog = parse_catalog(json.load(file), source)
+    else:
+        client = SharedCatalogClient(source)
+        catalog = client.refresh()
+    startup = time.perf_counter() - start
+
+    rng = random.Random(os.getpid())
+    start = time.perf_counter()
+    for _ in range(lookups):
+        candidates = catalog.select("Database", "Medium")
+        info = catalog[rng.choice(candidates)]
+        info["description"], info["certification_notes"]
+    per_lookup = (time.perf_counter() - start) / lookups
+
+    private, pss = memory_kib()
+    results.put((startup, per_lookup, private - baseline, pss))
+    ready.set()
+    # Stay alive so every worker is measured while the others still map the segment
+    release.wait()
+
+
+def run(mode, source, workers, lookups):
+    release = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    readies = [multiprocessing.Event() for _ in range(workers)]
+    processes = [multiprocessing.Process(target=worker, args=(mode, source, lookups, ready, results, release)) for ready in readies]
+    for process in processes:
+        process.start()
+    for ready in readies:
+        ready.wait()
+    samples = [results.get() for _ in processes]
+    release.set()
+    for process in processes:
+        process.join()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare per-worker catalog memory: file load vs shared memory')
+    parser.add_argument('--services', type=int, default=100000, help='Number of synthetic services')
+    parser.add_argument('--workers', type=int, default=4, help='Worker processes')
+    parser.add_argument('--lookups', type=int, default=200, help='Filtered selections plus lookups per worker')
+    args = parser.parse_args()
+
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        sys.exit("This benchmark reads memory from /proc and needs Linux")
+
+    catalog = build_catalog(args.services)
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, 'aws_services.json')
+        with open(path, 'w') as file:
+            json.dump(catalog, file)
+
+        publisher = CatalogPublisher(f"aws-hangman-bench-{os.getpid()}")
+        try:
+            start = time.perf_counter()
+            publisher.publish(parse_catalog(catalog))
+            publish_time = time.perf_counter() - start
+            segment_kib = publisher.segment.size / 1024
+
+            print(f"Catalog: {args.services} services, {args.workers} workers; "
+                  f"published in {publish_time:.2f} s, segment {segment_kib / 1024:.1f} MiB")
+            print(f"{'mode':8}{'startup s':>11}{'lookup us':>11}{'private MiB/worker':>20}{'PSS MiB total':>15}")
+            for mode, source in (("file", path), ("shared", publisher.name)):
+                samples = run(mode, source, args.workers, args.lookups)
+                startup = max(sample[0] for sample in samples)
+                lookup = sum(sample[1] for sample in samples) / len(samples)
+                private = sum(sample[2] for sample in samples) / len(samples)
+                pss = sum(sample[3] for sample in samples)
+                print(f"{mode:8}{startup:11.3f}{lookup * 1e6:11.1f}{private / 1024:20.1f}{pss / 1024:15.1f}")
+        finally:
+            publisher.close()
+
+
+if __name__ == "__main__":
+    main()
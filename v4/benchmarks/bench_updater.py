@@ -0,0 +1,197 @@
+"""End-to-end updater benchmark over recorded (or synthetic) AWS pages
+
+Runs AwsServiceUpdater.run_update against a replay archive so results are
+deterministic and free of network noise. Record a real archive with
+`python aws_service_updater.py --record pages.zip`, or let this script
+generate a synthetic one shaped like the AWS docs, exam guide and What's
+New pages.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from html import escape
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aws_service_updater import WHATS_NEW_PAGE_SIZE, AwsServiceUpdater, whats_new_page_url
+from feed_sources import DOCS_SITEMAP_URL, WHATS_NEW_FEED_URL
+from replay import replay_session, write_archive
+from update_metrics import UpdateLog
+
+V4_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HTML = {"Content-Type": "text/html; charset=utf-8"}
+JSON = {"Content-Type": "application/json"}
+XML = {"Content-Type": "application/xml"}
+
+
+def build_synthetic_archive(path, services=300, guides=12, posts=60):
+    """Generate an archive with pages matching the selectors the updater uses, plus the sitemap and RSS feed"""
+    responses = {}
+    now = datetime.now(timezone.utc)
+    categories = ["Compute", "Storage", "Database", "Networking", "Security", "Analytics"]
+
+    index = []
+    sitemaps = []
+    for number, category in enumerate(categories):
+        links = []
+        for service in range(number, services, len(categories)):
+            url = f"https://docs.aws.amazon.com/service{service}/"
+            links.append(f'<li><a href="{url}">Amazon Service {service}</a></li>')
+            sitemaps.append(f"<sitemap><loc>{url}latest/userguide/sitemap.xml</loc></sitemap>")
+            responses[url] = (200, HTML, (
+                f'<html><body><div class="description">Service {service} does useful thing {service} '
+                f'for {category.lower()} workloads.</div>' + "<p>filler</p>" * 200 + "</body></html>"
+            ).encode('utf-8'))
+        index.append(f'<div class="category"><h2>{category}</h2><ul>{"".join(links)}</ul></div>')
+    responses["https://docs.aws.amazon.com/index.html"] = (200, HTML, f'<html><body>{"".join(index)}</body></html>'.encode('utf-8'))
+    responses[DOCS_SITEMAP_URL] = (200, XML, (
+        '<?xml version="1.0" encoding="UTF-8"?><sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        f'{"".join(sitemaps)}</sitemapindex>'
+    ).encode('utf-8'))
+
+    guide_links = []
+    for guide in range(guides):
+        url = f"https://d1.awsstatic.com/training/exam-guide-{guide}.html"
+        guide_links.append(f'<a href="{url}">Exam guide {guide}</a>')
+        sections = []
+        for domain in range(4):
+            items = "".join(
+                f"<li>Design with SERVICE{(guide * 7 + domain * 3 + item) % services} and EC2 for task {item}</li>"
+                for item in range(15)
+            )
+            sections.append(f"<h3>Domain {domain + 1}: Area {domain}</h3><ul>{items}</ul>")
+        responses[url] = (200, HTML, f'<html><body><div class="content">{"".join(sections)}</div></body></html>'.encode('utf-8'))
+    responses["https://aws.amazon.com/certification/certification-prep/"] = (200, HTML, f'<html><body>{"".join(guide_links)}</body></html>'.encode('utf-8'))
+
+    announcements = "".join(
+        f'<div class="blog-post"><h2>SERVICE{post % services} adds feature {post}</h2>'
+        f'<time>Jan {post % 28 + 1}, 2026</time><p>Details about feature {post}.</p></div>'
+        for post in range(posts)
+    )
+    responses["https://aws.amazon.com/new/"] = (200, HTML, f'<html><body>{announcements}</body></html>'.encode('utf-8'))
+
+    # What's New listing API pages, newest first
+    items = [
+        {"item": {"id": f"whats-new-{post}", "additionalFields": {
+            "headline": f"SERVICE{post % services} launches capability {post}",
+            "postDateTime": (now - timedelta(hours=post)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "postBody": f"<p>Capability {post} is now generally available.</p>",
+        }}}
+        for post in range(posts * 4)
+    ]
+    for page in range(len(items) // WHATS_NEW_PAGE_SIZE + 1):
+        chunk = items[page * WHATS_NEW_PAGE_SIZE:(page + 1) * WHATS_NEW_PAGE_SIZE]
+        responses[whats_new_page_url(page)] = (200, JSON, json.dumps({"items": chunk}).encode('utf-8'))
+
+    # The same announcements as an RSS feed
+    feed_items = []
+    for entry in items:
+        fields = entry["item"]["additionalFields"]
+        posted = datetime.strptime(fields["postDateTime"], "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+        feed_items.append(f"<item><guid>{entry['item']['id']}</guid><title>{escape(fields['headline'])}</title>"
+                          f"<description>{escape(fields['postBody'])}</description>"
+                          f"<pubDate>{format_datetime(posted, usegmt=True)}</pubDate></item>")
+    responses[WHATS_NEW_FEED_URL] = (200, XML, (
+        '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel><title>Recent Announcements</title>'
+        f'{"".join(feed_items)}</channel></rss>'
+    ).encode('utf-8'))
+
+    return write_archive(path, responses)
+
+
+def run_once(archive, catalog, latency, error_rate, incremental, whats_new_stream, sequential=False,
+             docs_source="index", whats_new_feed=False):
+    """Run a full update in a scratch directory and return its metrics summary"""
+    workdir = tempfile.mkdtemp(prefix='bench_updater_')
+    cwd = os.getcwd()
+    try:
+        os.chdir(workdir)
+        shutil.copy(catalog, 'aws_services.json')
+        update_log = UpdateLog()
+        updater = AwsServiceUpdater('aws_services.json', incremental=incremental, update_log=update_log,
+                                    session=replay_session(archive, latency, error_rate=error_rate, seed=0),
+                                    request_delay=0, rate_limit=0, stream_whats_new=whats_new_stream,
+                                    concurrent_phases=not sequential, docs_source=docs_source,
+                                    whats_new_feed=whats_new_feed)
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+        with contextlib.redirect_stdout(io.StringIO()):
+            updater.run_update()
+        summary = update_log.summary()
+        summary["wall_seconds"] = time.perf_counter() - start
+        summary["cpu_seconds"] = time.process_time() - cpu_start
+        return summary
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark AwsServiceUpdater.run_update against replayed pages')
+    parser.add_argument('--archive', help='Recorded archive to replay (default: generate a synthetic one)')
+    parser.add_argument('--services', type=int, default=300, help='Services in the synthetic archive')
+    parser.add_argument('--catalog', default=os.path.join(V4_DIR, 'aws_services.json'), help='Starting catalog')
+    parser.add_argument('--iterations', type=int, default=5, help='Number of full updates to run')
+    parser.add_argument('--latency', type=float, default=0.0, help='Injected seconds of latency per response')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Injected fraction of failing requests')
+    parser.add_argument('--incremental', action='store_true', help='Run the updater in incremental mode')
+    parser.add_argument('--whats-new-stream', action='store_true', help="Use streaming What's New ingestion")
+    parser.add_argument('--sequential', action='store_true', help='Run the crawls one after another instead of concurrently')
+    parser.add_argument('--docs-source', choices=('index', 'sitemap'), default='index', help='Discover services from the docs index page or the sitemap')
+    parser.add_argument('--whats-new-feed', action='store_true', help="Read What's New announcements from the RSS feed")
+    parser.add_argument('--json', action='store_true', help='Print machine-readable results')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        archive = args.archive
+        if not archive:
+            archive = os.path.join(scratch, 'synthetic.zip')
+            build_synthetic_archive(archive, services=args.services)
+
+        runs = [run_once(archive, args.catalog, args.latency, args.error_rate, args.incremental, args.whats_new_stream,
+                         args.sequential, args.docs_source, args.whats_new_feed)
+                for _ in range(args.iterations)]
+
+    phases = {}
+    for run in runs:
+        for phase in run["phases"]:
+            phases.setdefault(phase["phase"], []).append(phase)
+
+    results = {
+        "iterations": args.iterations,
+        "wall_seconds_median": statistics.median(run["wall_seconds"] for run in runs),
+        "cpu_seconds_median": statistics.median(run["cpu_seconds"] for run in runs),
+        "phases": {
+            name: {
+                "wall_seconds_median": statistics.median(p["wall_seconds"] for p in samples),
+                "cpu_seconds_median": statistics.median(p["cpu_seconds"] for p in samples),
+                "requests": samples[-1]["requests"],
+                "bytes": samples[-1]["bytes"],
+                "errors": samples[-1]["errors"],
+            }
+            for name, samples in phases.items()
+        },
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"run_update over {args.iterations} iterations: "
+          f"{results['wall_seconds_median']:.3f}s wall, {results['cpu_seconds_median']:.3f}s cpu (median)")
+    for name, phase in results["phases"].items():
+        print(f"  {name:>7}: {phase['wall_seconds_median']:.3f}s wall, {phase['cpu_seconds_median']:.3f}s cpu, "
+              f"{phase['requests']} requests, {phase['bytes']} bytes, {phase['errors']} errors")
+
+
+if __name__ == "__main__":
+    main()
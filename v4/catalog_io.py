@@ -0,0 +1,90 @@
+import csv
+import json
+import os
+import sys
+from contextlib import contextmanager
+
+from catalog_model import CatalogError
+
+# Formats understood by the bulk import/export commands
+FORMATS = ("ndjson", "csv")
+
+# Service fields written on export (note_entries are only kept by NDJSON)
+EXPORT_FIELDS = ("description", "category", "difficulty", "certification_notes")
+CSV_COLUMNS = ("name",) + EXPORT_FIELDS
+
+
+def detect_format(path, format=None):
+    """Explicit format, or the one implied by the file extension (NDJSON by default)"""
+    if format:
+        return format
+    return "csv" if os.path.splitext(path)[1].lower() == ".csv" else "ndjson"
+
+
+@contextmanager
+def open_stream(path, mode):
+    """Open path for text streaming, with '-' meaning stdin or stdout"""
+    if path == "-":
+        yield sys.stdout if "w" in mode else sys.stdin
+        return
+    with open(path, mode, newline="" if path.lower().endswith(".csv") else None, encoding="utf-8") as file:
+        yield file
+
+
+def read_ndjson(file):
+    """Yield (line number, name, fields) for each JSON object line"""
+    for line_number, line in enumerate(file, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            raise CatalogError(f"line {line_number}: not valid JSON ({e})") from None
+        if not isinstance(row, dict):
+            raise CatalogError(f"line {line_number}: expected a JSON object, got {type(row).__name__}")
+        yield line_number, row.pop("name", None), row
+
+
+def read_csv(file):
+    """Yield (line number, name, fields) for each CSV row; empty cells are left out"""
+    reader = csv.DictReader(file)
+    if not reader.fieldnames or "name" not in reader.fieldnames:
+        raise CatalogError("CSV header must include a 'name' column")
+    unknown = [column for column in reader.fieldnames if column not in CSV_COLUMNS]
+    if unknown:
+        raise CatalogError(f"unknown CSV columns: {', '.join(unknown)}")
+    for row in reader:
+        # DictReader files cells beyond the header under a None key
+        if None in row:
+            raise CatalogError(f"line {reader.line_num}: {len(row[None])} more cells than header columns")
+        name = row.pop("name")
+        yield reader.line_num, name, {field: value for field, value in row.items() if value}
+
+
+def read_rows(file, format):
+    return read_csv(file) if format == "csv" else read_ndjson(file)
+
+
+def write_ndjson(file, services):
+    """Write one JSON object per service; returns the count"""
+    count = 0
+    for name, info in services.items():
+        file.write(json.dumps({"name": name, **info.to_dict()}) + "\n")
+        count += 1
+    return count
+
+
+def write_csv(file, services):
+    """Write one CSV row per service; returns the count"""
+    writer = csv.writer(file)
+    writer.writerow(CSV_COLUMNS)
+    count = 0
+    for name, info in services.items():
+        writer.writerow([name] + [info[field] for field in EXPORT_FIELDS])
+        count += 1
+    return count
+
+
+def write_rows(file, services, format):
+    return write_csv(file, services) if format == "csv" else write_ndjson(file, services)
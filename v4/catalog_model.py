@@ -0,0 +1,267 @@
+import sys
+
+# Difficulty levels in menu order, interned as their index
+DIFFICULTIES = ("Easy", "Medium", "Hard")
+DIFFICULTY_IDS = {name: index for index, name in enumerate(DIFFICULTIES)}
+DIFFICULTY_MULTIPLIERS = (1, 2, 3)
+
+# Text fields every service must have
+TEXT_FIELDS = ("description", "category", "certification_notes")
+
+# Fields stored in record slots; anything else is kept in record.extra
+RECORD_FIELDS = ("description", "category", "difficulty", "certification_notes", "note_entries")
+
+# Stop collecting validation problems after this many
+MAX_REPORTED_ERRORS = 10
+
+
+class CatalogError(ValueError):
+    """The catalog file does not match the expected schema"""
+
+
+class InternTable:
+    """Maps strings to small integers and back"""
+
+    __slots__ = ("names", "ids")
+
+    def __init__(self):
+        self.names = []
+        self.ids = {}
+
+    def intern(self, name):
+        """Id for name, assigning the next id the first time it is seen"""
+        index = self.ids.get(name)
+        if index is None:
+            name = sys.intern(name)
+            index = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return index
+
+    def get(self, name):
+        """Id for name, or None if it was never interned"""
+        return self.ids.get(name)
+
+    def name(self, index):
+        return self.names[index]
+
+
+class ServiceRecord:
+    """One service, stored in slots with category and difficulty as ints
+
+    Supports the dict-style access (record["description"], record.get(...))
+    the menus and note helpers use, and to_dict() for saving.
+    """
+
+    __slots__ = ("description", "category_id", "difficulty_id", "certification_notes", "note_entries", "extra", "categories")
+
+    def __init__(self, categories, description, category, difficulty, certification_notes, note_entries=None, extra=None):
+        self.categories = categories
+        self.description = description
+        self.category_id = categories.intern(category)
+        self.difficulty_id = DIFFICULTY_IDS[difficulty]
+        self.certification_notes = certification_notes
+        self.note_entries = note_entries
+        self.extra = extra
+
+    @property
+    def category(self):
+        return self.categories.name(self.category_id)
+
+    @category.setter
+    def category(self, value):
+        self.category_id = self.categories.intern(value)
+
+    @property
+    def difficulty(self):
+        return DIFFICULTIES[self.difficulty_id]
+
+    @difficulty.setter
+    def difficulty(self, value):
+        if value not in DIFFICULTIES:
+            raise CatalogError(f"difficulty {value!r} must be one of {', '.join(DIFFICULTIES)}")
+        self.difficulty_id = DIFFICULTY_IDS[value]
+
+    def __getitem__(self, key):
+        if key in ("description", "category", "difficulty", "certification_notes"):
+            return getattr(self, key)
+        if key == "note_entries" and self.note_entries is not None:
+            return self.note_entries
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in RECORD_FIELDS:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def to_dict(self):
+        """Plain dict in the catalog file format"""
+        data = {
+            "description": self.description,
+            "category": self.category,
+            "difficulty": self.difficulty,
+            "certification_notes": self.certification_notes,
+        }
+        if self.note_entries is not None:
+            data["note_entries"] = [dict(entry) for entry in self.note_entries]
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __eq__(self, other):
+        if isinstance(other, ServiceRecord):
+            other = other.to_dict()
+        return self.to_dict() == other
+
+    __hash__ = None
+
+
+def service_problems(name, info):
+    """List of schema problems for one service entry"""
+    if not isinstance(name, str) or not name:
+        return [f"service name {name!r} must be a non-empty string"]
+    if not isinstance(info, dict):
+        return [f"service {name!r} must be an object, got {type(info).__name__}"]
+
+    # Fast path for the common well-formed entry
+    category = info.get("category")
+    if (isinstance(info.get("description"), str) and isinstance(category, str) and category.strip()
+            and isinstance(info.get("certification_notes"), str) and info.get("difficulty") in DIFFICULTIES
+            and "note_entries" not in info):
+        return []
+
+    problems = []
+    for field in TEXT_FIELDS:
+        if field not in info:
+            problems.append(f"service {name!r} is missing {field!r}")
+        elif not isinstance(info[field], str):
+            problems.append(f"service {name!r}: {field!r} must be a string, got {type(info[field]).__name__}")
+    if isinstance(info.get("category"), str) and not info["category"].strip():
+        problems.append(f"service {name!r}: 'category' must not be empty")
+    if "difficulty" not in info:
+        problems.append(f"service {name!r} is missing 'difficulty'")
+    elif info["difficulty"] not in DIFFICULTIES:
+        problems.append(f"service {name!r}: difficulty {info['difficulty']!r} must be one of {', '.join(DIFFICULTIES)}")
+
+    entries = info.get("note_entries")
+    if entries is not None and not (isinstance(entries, list) and all(
+        isinstance(entry, dict) and isinstance(entry.get("text"), str) and "hash" in entry for entry in entries
+    )):
+        problems.append(f"service {name!r}: 'note_entries' must be a list of note objects")
+    return problems
+
+
+def make_record(categories, name, info, source="catalog"):
+    """Validate one service dict and build its record (note entries are copied)"""
+    if isinstance(info, ServiceRecord):
+        info = info.to_dict()
+    problems = service_problems(name, info)
+    if problems:
+        raise CatalogError(f"{source}: {problems[0]}")
+    return build_record(categories, info)
+
+
+def build_record(categories, info):
+    """Record for an already validated service dict"""
+    extra = {key: value for key, value in info.items() if key not in RECORD_FIELDS} if len(info) > 4 else None
+    return ServiceRecord(
+        categories,
+        info["description"],
+        info["category"],
+        info["difficulty"],
+        info["certification_notes"],
+        [dict(entry) for entry in info["note_entries"]] if "note_entries" in info else None,
+        extra or None,
+    )
+
+
+def validate_catalog(data, source="catalog"):
+    """Check a whole catalog dict, reporting up to MAX_REPORTED_ERRORS problems in one CatalogError"""
+    if not isinstance(data, dict):
+        raise CatalogError(f"{source}: catalog must be a JSON object of services, got {type(data).__name__}")
+
+    problems = []
+    for name, info in data.items():
+        problems.extend(service_problems(name, info))
+        if len(problems) >= MAX_REPORTED_ERRORS:
+            break
+    if problems:
+        raise CatalogError(f"{source}: invalid catalog:\n  " + "\n  ".join(problems[:MAX_REPORTED_ERRORS]))
+    return data
+
+
+def parse_services(data, categories, source="catalog"):
+    """Validate a whole catalog dict and return {name: ServiceRecord}"""
+    validate_catalog(data, source)
+    return {name: build_record(categories, info) for name, info in data.items()}
+
+
+def select_names(records, categories, category=None, difficulty=None):
+    """Names in {name: ServiceRecord} matching the filters, comparing interned ids"""
+    category_id = None if category is None else categories.get(category)
+    difficulty_id = None if difficulty is None else DIFFICULTY_IDS.get(difficulty)
+    if (category is not None and category_id is None) or (difficulty is not None and difficulty_id is None):
+        return []
+    return [
+        name for name, record in records.items()
+        if (category_id is None or record.category_id == category_id)
+        and (difficulty_id is None or record.difficulty_id == difficulty_id)
+    ]
+
+
+class Catalog(dict):
+    """Validated catalog: a dict of name -> ServiceRecord with interned categories"""
+
+    def __init__(self, records=None, categories=None):
+        super().__init__(records or {})
+        self.category_table = categories if categories is not None else InternTable()
+
+    @classmethod
+    def from_dict(cls, data, source="catalog"):
+        categories = InternTable()
+        return cls(parse_services(data, categories, source), categories)
+
+    def __setitem__(self, name, info):
+        if not isinstance(info, ServiceRecord) or info.categories is not self.category_table:
+            info = make_record(self.category_table, name, info)
+        super().__setitem__(name, info)
+
+    def category_names(self):
+        """Sorted names of categories that have at least one service"""
+        used = set(record.category_id for record in self.values())
+        return sorted(self.category_table.name(index) for index in used)
+
+    def select(self, category=None, difficulty=None):
+        """Names of services matching the filters"""
+        return select_names(self, self.category_table, category, difficulty)
+
+    def to_dict(self):
+        """Plain dict-of-dicts in the catalog file format"""
+        return {name: record.to_dict() for name, record in self.items()}
+
+
+def parse_catalog(data, source="catalog"):
+    """Parse a catalog dict loaded from JSON into a validated Catalog"""
+    return Catalog.from_dict(data, source)
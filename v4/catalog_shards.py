@@ -0,0 +1,237 @@
+import json
+import os
+import re
+from collections.abc import MutableMapping
+
+from catalog_model import InternTable, make_record, parse_services, select_names, validate_catalog
+from catalog_store import CatalogStore, atomic_write_json, file_lock, merge_catalogs
+
+# Small index of shard contents, kept next to the shard files
+MANIFEST_NAME = "manifest.json"
+
+
+def shard_name_for(category):
+    """File name of the shard that new services in category go to"""
+    slug = re.sub(r'[^a-z0-9]+', '-', category.lower()).strip('-')
+    return f"{slug or 'uncategorized'}.json"
+
+
+def shard_files(directory):
+    """Shard file names in directory (every .json file except the manifest)"""
+    return sorted(
+        name for name in os.listdir(directory)
+        if name.endswith('.json') and name != MANIFEST_NAME and not name.startswith('.')
+    )
+
+
+def file_signature(path):
+    """(size, mtime) of a file, used to tell whether a shard changed"""
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def read_shard(directory, shard):
+    """Load and validate one shard file"""
+    path = os.path.join(directory, shard)
+    with open(path, 'r') as file:
+        return validate_catalog(json.load(file), path)
+
+
+def shard_entry(services, signature):
+    """Manifest entry describing a shard's contents"""
+    return {
+        "categories": sorted(set(info["category"] for info in services.values())),
+        "services": sorted(services),
+        "signature": signature,
+    }
+
+
+def build_manifest(directory):
+    """Scan every shard and write a fresh manifest; returns it"""
+    shards = {}
+    for shard in shard_files(directory):
+        path = os.path.join(directory, shard)
+        shards[shard] = shard_entry(read_shard(directory, shard), file_signature(path))
+    manifest = {"shards": shards}
+    atomic_write_json(os.path.join(directory, MANIFEST_NAME), manifest)
+    return manifest
+
+
+def load_manifest(directory):
+    """Read the manifest, rebuilding it if shards were added, removed or edited"""
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME), 'r') as file:
+            manifest = json.load(file)
+        shards = manifest["shards"]
+        if sorted(shards) == shard_files(directory) and all(
+            shards[shard]["signature"] == file_signature(os.path.join(directory, shard)) for shard in shards
+        ):
+            return manifest
+    except (FileNotFoundError, KeyError, ValueError):
+        pass
+    return build_manifest(directory)
+
+
+def split_catalog(services, directory):
+    """Write a single-file catalog out as one shard per category plus a manifest"""
+    os.makedirs(directory, exist_ok=True)
+    shards = {}
+    for name, info in services.items():
+        shards.setdefault(shard_name_for(info["category"]), {})[name] = info.to_dict() if hasattr(info, 'to_dict') else info
+    for shard, shard_services in shards.items():
+        atomic_write_json(os.path.join(directory, shard), shard_services)
+    return build_manifest(directory)
+
+
+class ShardedCatalog(MutableMapping):
+    """Services spread over shard files, loaded only when needed
+
+    Service names and categories come from the manifest, so listing names,
+    membership tests and get_categories never read a shard. A shard is
+    loaded the first time one of its services (or its category) is used.
+    Loaded services are ServiceRecords sharing one category intern table.
+    """
+
+    def __init__(self, directory, manifest):
+        self.directory = directory
+        self.manifest = manifest["shards"]
+        self.owner = {name: shard for shard, entry in self.manifest.items() for name in entry["services"]}
+        self.shards = {}
+        self.bases = {}
+        self.category_table = InternTable()
+
+    def load_shard(self, shard):
+        """Services in one shard, reading the file on first use"""
+        services = self.shards.get(shard)
+        if services is None:
+            base = read_shard(self.directory, shard) if shard in self.manifest else {}
+            services = parse_services(base, self.category_table, os.path.join(self.directory, shard))
+            self.shards[shard] = services
+            self.bases[shard] = base
+        return services
+
+    def category_names(self):
+        """Sorted categories across all shards, answered from the manifest"""
+        return sorted(set(category for entry in self.manifest.values() for category in entry["categories"]))
+
+    def select(self, category=None, difficulty=None):
+        """Names of matching services, loading only the shards that hold the category"""
+        shards = [shard for shard, entry in self.manifest.items() if category is None or category in entry["categories"]]
+        names = []
+        for shard in shards:
+            names.extend(select_names(self.load_shard(shard), self.category_table, category, difficulty))
+        return names
+
+    def shard_for_new(self, category):
+        """Shard a new service in category should be written to"""
+        for shard, entry in self.manifest.items():
+            if category in entry["categories"]:
+                return shard
+        return shard_name_for(category)
+
+    def __getitem__(self, name):
+        return self.load_shard(self.owner[name])[name]
+
+    def __setitem__(self, name, info):
+        shard = self.owner.get(name) or self.shard_for_new(info["category"])
+        self.load_shard(shard)[name] = make_record(self.category_table, name, info, os.path.join(self.directory, shard))
+        self.owner[name] = shard
+        entry = self.manifest.setdefault(shard, {"categories": [], "services": [], "signature": None})
+        if info["category"] not in entry["categories"]:
+            entry["categories"] = sorted(entry["categories"] + [info["category"]])
+
+    def __delitem__(self, name):
+        shard = self.owner.pop(name)
+        del self.load_shard(shard)[name]
+
+    def __contains__(self, name):
+        return name in self.owner
+
+    def __iter__(self):
+        return iter(list(self.owner))
+
+    def __len__(self):
+        return len(self.owner)
+
+    def save(self):
+        """Write shards that changed since they were loaded; returns the shard names written
+
+        If a shard was also edited on disk meanwhile, the two versions are
+        merged per service like single-file saves.
+        """
+        written = []
+        for shard, services in self.shards.items():
+            base = self.bases[shard]
+            plain = {name: record.to_dict() for name, record in services.items()}
+            if plain == base:
+                continue
+
+            path = os.path.join(self.directory, shard)
+            loaded_signature = self.manifest[shard]["signature"]
+            if os.path.exists(path) and file_signature(path) != loaded_signature:
+                theirs = read_shard(self.directory, shard)
+                plain, conflicts = merge_catalogs(base, plain, theirs)
+                if conflicts:
+                    print(f"Shard {shard} changed on disk; kept local edits for: {', '.join(sorted(conflicts))}")
+                services.clear()
+                services.update(parse_services(plain, self.category_table, path))
+                for name, owner in list(self.owner.items()):
+                    if owner == shard and name not in services:
+                        del self.owner[name]
+                for name in services:
+                    self.owner[name] = shard
+
+            atomic_write_json(path, plain)
+            self.bases[shard] = plain
+            self.manifest[shard] = shard_entry(plain, file_signature(path))
+            written.append(shard)
+
+        if written:
+            atomic_write_json(os.path.join(self.directory, MANIFEST_NAME), {"shards": self.manifest})
+        return written
+
+
+class ShardedCatalogStore(CatalogStore):
+    """CatalogStore for a directory of shard files instead of a single JSON file"""
+
+    def __init__(self, path, writer):
+        super().__init__(path, writer)
+        self.version_path = os.path.join(path, '.version.json')
+
+    def signature(self):
+        """Names, sizes and mtimes of every shard file"""
+        try:
+            return tuple((shard, *file_signature(os.path.join(self.path, shard))) for shard in shard_files(self.path))
+        except FileNotFoundError:
+            return None
+
+    def watch_target(self):
+        """Watch every file in the shard directory"""
+        return self.path, None
+
+    def snapshot(self):
+        """Read only the manifest; shards are loaded lazily by the catalog"""
+        signature = self.signature()
+        if signature is None:
+            raise FileNotFoundError(self.path)
+        catalog = ShardedCatalog(self.path, load_manifest(self.path))
+        return {"data": catalog, "base": None, "version": self.read_version(), "signature": signature}
+
+    def save(self, data):
+        """Write changed shards and the manifest under the catalog lock"""
+        with file_lock(os.path.join(self.path, MANIFEST_NAME)):
+            if data.save():
+                self.version = self.read_version() + 1
+                atomic_write_json(self.version_path, {"version": self.version, "writer": self.writer, "pid": os.getpid()})
+            self.loaded_signature = self.signature()
+        return data
+
+
+def open_store(path, writer, parse=None):
+    """CatalogStore for a single services file, or a sharded store for a directory
+
+    `parse` applies to single-file catalogs; shards are always parsed into records.
+    """
+    if os.path.isdir(path):
+        return ShardedCatalogStore(path, writer)
+    return CatalogStore(path, writer, parse)
@@ -0,0 +1,251 @@
+import copy
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Fields every service entry must have
+REQUIRED_FIELDS = ("description", "category", "difficulty", "certification_notes")
+
+
+def atomic_write_json(path, data, indent=4):
+    """Write JSON to path via a temp file, fsync and rename, so readers never see a partial file"""
+    # One dumps() call uses the C encoder end to end; json.dump() writes in tiny chunks
+    atomic_write_text(path, json.dumps(data, indent=indent))
+
+
+def atomic_write_text(path, text):
+    """Write text to path via a temp file, fsync and rename; no newline translation, so ASCII text is len(text) bytes"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', newline='') as file:
+            file.write(text)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+    # Make the rename itself durable (not supported on Windows)
+    if hasattr(os, 'O_DIRECTORY'):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+@contextmanager
+def file_lock(path):
+    """Hold an exclusive advisory lock on path + '.lock' for the duration of the block"""
+    with open(path + '.lock', 'a+') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def validate_services(services):
+    """Check the basic shape of a catalog, raising ValueError with the first problem found"""
+    if not isinstance(services, dict):
+        raise ValueError("catalog must be a JSON object of services")
+    for name, info in services.items():
+        if not isinstance(info, dict):
+            raise ValueError(f"service {name!r} must be an object")
+        for field in REQUIRED_FIELDS:
+            if not isinstance(info.get(field), str):
+                raise ValueError(f"service {name!r} is missing text field {field!r}")
+    return services
+
+
+def merge_catalogs(base, ours, theirs):
+    """Three-way merge of service dicts; returns (merged, conflicting service names)
+
+    Services we did not change since base take the on-disk version (including
+    deletions); services only we changed keep ours. When both sides changed
+    the same service, ours wins and the name is reported as a conflict.
+    """
+    merged = {}
+    conflicts = []
+    for name in list(ours) + [name for name in theirs if name not in ours]:
+        base_entry = base.get(name)
+        our_entry = ours.get(name)
+        their_entry = theirs.get(name)
+
+        if our_entry == base_entry:
+            chosen = their_entry
+        elif their_entry == base_entry or their_entry == our_entry:
+            chosen = our_entry
+        else:
+            chosen = our_entry
+            conflicts.append(name)
+
+        if chosen is not None:
+            merged[name] = chosen
+    return merged, conflicts
+
+
+class CatalogStore:
+    """Crash-safe, lock-protected access to the services JSON file
+
+    Writes go through a temp file and an atomic rename under an advisory
+    lock shared by the game and the updater. Each write bumps a version
+    stamp kept next to the catalog, so a writer can tell the file changed
+    since it was loaded and merge instead of overwriting the other side's
+    edits. Readers use the file's stat signature to reload only on change.
+
+    The stamp is written before the catalog and records the catalog's
+    size. A crash in between leaves a stamp that does not match the file;
+    a load that finds one treats its version as unknown, so the next save
+    merges instead of trusting it.
+
+    With a `parse` callable (such as catalog_model.parse_catalog) the raw
+    JSON is validated and compiled into a catalog model on load; saves
+    write its to_dict() and return a freshly parsed model after a merge.
+    """
+
+    def __init__(self, path, writer, parse=None):
+        self.path = path
+        self.writer = writer
+        self.parse = parse
+        self.version_path = os.path.splitext(path)[0] + '.version.json'
+        self.base = {}
+        self.version = 0
+        self.loaded_signature = None
+
+    def signature(self):
+        """Identity of the current file contents (inode, size, mtime), or None if missing"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def watch_target(self):
+        """Directory to watch for changes and the file names in it that matter"""
+        return os.path.dirname(os.path.abspath(self.path)), {os.path.basename(self.path)}
+
+    def read_stamp(self):
+        """Version stamp written by the last saver ({} if none yet)"""
+        try:
+            with open(self.version_path, 'r') as file:
+                return json.load(file)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def read_version(self):
+        """Version written by the last saver (0 if none yet)"""
+        return self.read_stamp().get("version", 0)
+
+    def loaded_version(self, signature):
+        """Version of the catalog with this signature, or None if the stamp describes another file
+
+        Stamps written before sizes were recorded are trusted as they are.
+        """
+        stamp = self.read_stamp()
+        size = stamp.get("size")
+        if size is not None and (signature is None or signature[1] != size):
+            return None
+        return stamp.get("version", 0)
+
+    def read(self):
+        """Parse the catalog file, raising FileNotFoundError if it does not exist"""
+        with open(self.path, 'r') as file:
+            return json.load(file)
+
+    def snapshot(self):
+        """Read the catalog with its version and signature without adopting it
+
+        Safe to call from a background thread; pass the result to adopt()
+        on the thread that owns the catalog.
+        """
+        signature = self.signature()
+        raw = self.read()
+        if self.parse is not None:
+            # The model copies what it keeps, so the raw dict can serve as the base
+            return {"data": self.parse(raw, self.path), "base": raw, "version": self.loaded_version(signature), "signature": signature}
+        data = validate_services(raw)
+        return {"data": data, "base": copy.deepcopy(data), "version": self.loaded_version(signature), "signature": signature}
+
+    def adopt(self, snapshot):
+        """Make a snapshot the current catalog and the base for later merges"""
+        self.base = snapshot["base"]
+        self.version = snapshot["version"]
+        self.loaded_signature = snapshot["signature"]
+        return snapshot["data"]
+
+    def load(self):
+        """Load the catalog and remember it as the base for later merges"""
+        return self.adopt(self.snapshot())
+
+    def changed(self):
+        """True if the file was replaced or modified since it was last loaded or saved"""
+        return self.signature() != self.loaded_signature
+
+    def load_if_changed(self):
+        """Reload the catalog only if the file changed; returns the new data or None"""
+        if not self.changed():
+            return None
+        try:
+            return self.load()
+        except FileNotFoundError:
+            return None
+
+    def save(self, data):
+        """Atomically write data, merging in changes another process saved meanwhile
+
+        Returns the catalog as written, which callers should adopt.
+        """
+        model = self.parse is not None and hasattr(data, 'to_dict')
+        plain = data.to_dict() if model else data
+        merged = False
+        with file_lock(self.path):
+            if self.changed() or self.read_version() != self.version:
+                try:
+                    theirs = self.read()
+                except FileNotFoundError:
+                    theirs = {}
+                plain, conflicts = merge_catalogs(self.base, plain, theirs)
+                merged = True
+                if conflicts:
+                    print(f"Catalog changed on disk; kept local edits for: {', '.join(sorted(conflicts))}")
+
+            # Stamp first: a crash before the catalog is replaced leaves a stamp that fails the size check
+            version = self.read_version() + 1
+            text = json.dumps(plain, indent=4)
+            atomic_write_json(self.version_path, {
+                "version": version,
+                "size": len(text),
+                "writer": self.writer,
+                "pid": os.getpid(),
+                "written": datetime.now().isoformat(timespec='seconds')
+            })
+            atomic_write_text(self.path, text)
+
+            self.base = plain if model else copy.deepcopy(plain)
+            self.version = version
+            self.loaded_signature = self.signature()
+        if model:
+            return self.parse(plain, self.path) if merged else data
+        return plain
@@ -0,0 +1,136 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+# inotify event flags (see <sys/inotify.h>)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+INOTIFY_EVENT = struct.Struct("iIII")
+
+# Polling interval when inotify is not available
+DEFAULT_POLL_INTERVAL = 2.0
+
+# Time to let a burst of file events settle before reloading
+DEBOUNCE_SECONDS = 0.2
+
+
+def open_inotify(directory):
+    """Return an inotify fd watching directory, or None if inotify is unavailable"""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            return None
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        if libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+            os.close(fd)
+            return None
+        return fd
+    except (OSError, AttributeError):
+        return None
+
+
+def read_inotify_names(fd):
+    """Drain pending inotify events and return the file names they mention"""
+    names = set()
+    try:
+        buffer = os.read(fd, 64 * 1024)
+    except BlockingIOError:
+        return names
+    offset = 0
+    while offset + INOTIFY_EVENT.size <= len(buffer):
+        _, _, _, length = INOTIFY_EVENT.unpack_from(buffer, offset)
+        offset += INOTIFY_EVENT.size
+        names.add(buffer[offset:offset + length].rstrip(b"\0").decode('utf-8', 'replace'))
+        offset += length
+    return names
+
+
+class CatalogWatcher:
+    """Background thread that notices when the catalog file is replaced
+
+    Uses inotify on Linux and falls back to polling the file's stat
+    signature elsewhere. When the file changes, the new catalog is read,
+    validated and prepared by the `prepare` callback on the watcher thread;
+    the owner picks it up with take_pending() at a safe point (between
+    rounds) and swaps it in, so the main thread never blocks on parsing.
+    """
+
+    def __init__(self, store, prepare, poll_interval=DEFAULT_POLL_INTERVAL):
+        self.store = store
+        self.prepare = prepare
+        self.poll_interval = poll_interval
+        self.pending = None
+        self.last_signature = store.signature()
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.mode = None
+        self.names = None
+
+    def start(self):
+        """Start watching in a daemon thread"""
+        directory, self.names = self.store.watch_target()
+        fd = open_inotify(directory)
+        self.mode = "inotify" if fd is not None else "polling"
+        self.thread = threading.Thread(target=self.run, args=(fd,), name="catalog-watcher", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Ask the watcher thread to exit"""
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=self.poll_interval + 1)
+
+    def run(self, fd):
+        """Watcher loop: wait for a change, then reload off the main thread"""
+        try:
+            while not self.stop_event.is_set():
+                if fd is not None:
+                    readable, _, _ = select.select([fd], [], [], self.poll_interval)
+                    if not readable:
+                        continue
+                    changed = read_inotify_names(fd)
+                    if self.names is not None and not self.names & changed:
+                        continue
+                    time.sleep(DEBOUNCE_SECONDS)
+                    read_inotify_names(fd)
+                else:
+                    self.stop_event.wait(self.poll_interval)
+                self.check()
+        finally:
+            if fd is not None:
+                os.close(fd)
+
+    def check(self):
+        """Reload and prepare the catalog if its signature changed since last seen"""
+        signature = self.store.signature()
+        if signature is None or signature == self.last_signature:
+            return False
+        try:
+            prepared = self.prepare(self.store.snapshot())
+        except (OSError, ValueError) as e:
+            print(f"Ignoring invalid catalog update: {e}", file=sys.stderr)
+            self.last_signature = signature
+            return False
+        with self.lock:
+            self.pending = prepared
+            self.last_signature = signature
+        return True
+
+    def take_pending(self):
+        """Return the newest prepared catalog (or None) and clear it"""
+        with self.lock:
+            pending, self.pending = self.pending, None
+        return pending
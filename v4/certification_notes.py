@@ -0,0 +1,179 @@
+import hashlib
+from datetime import datetime, timedelta
+
+# Kinds of structured note entries added by the updater
+EXAM_DOMAIN = "exam_domain"
+RECENT_UPDATE = "recent_update"
+
+# Limits applied to "Recent update" entries so notes don't grow forever
+MAX_RECENT_UPDATES = 5
+RECENT_UPDATE_MAX_AGE_DAYS = 180
+
+# Hashes of dropped recent updates remembered per service, so they are not added again
+MAX_EVICTED_HASHES = 200
+
+# Announcement date formats seen on the What's New page and in the listing API
+DATE_FORMATS = ("%Y-%m-%d", "%b %d, %Y", "%B %d, %Y")
+
+# Prefixes used to recognise entries appended to the notes string by older versions
+LEGACY_PREFIXES = {
+    "Exam domain:": EXAM_DOMAIN,
+    "Recent update": RECENT_UPDATE,
+}
+
+
+def note_hash(text):
+    """Short stable hash of a note's text, used for deduplication"""
+    return hashlib.sha1(text.strip().encode('utf-8')).hexdigest()[:16]
+
+
+def migrate_notes(service_info):
+    """Split legacy appended notes out of certification_notes into note_entries"""
+    if "note_entries" in service_info:
+        return False
+
+    notes = service_info.get("certification_notes", "")
+    base_parts = []
+    entries = []
+    seen = set()
+    added = datetime.now().isoformat(timespec='seconds')
+
+    for part in notes.split("\n\n"):
+        kind = None
+        for prefix, prefix_kind in LEGACY_PREFIXES.items():
+            if part.startswith(prefix):
+                kind = prefix_kind
+                break
+
+        if kind is None:
+            base_parts.append(part)
+            continue
+
+        digest = note_hash(part)
+        if digest not in seen:
+            seen.add(digest)
+            entries.append({"kind": kind, "text": part, "hash": digest, "added": added})
+
+    service_info["certification_notes"] = "\n\n".join(base_parts)
+    service_info["note_entries"] = entries
+    return True
+
+
+def note_date(date_str):
+    """Announcement date as YYYY-MM-DD, or None if it is not a date"""
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(date_str.strip(), date_format).strftime("%Y-%m-%d")
+        except (AttributeError, ValueError):
+            continue
+    return None
+
+
+def recency(entry):
+    """Sort key putting the newest announcement last (undated entries by when they were added)"""
+    added = entry.get("added", "")
+    return (entry.get("date") or added[:10], added)
+
+
+def note_hashes(service_info):
+    """Set of hashes for a service's note entries, including dropped recent updates"""
+    hashes = {entry["hash"] for entry in service_info.get("note_entries", [])}
+    hashes.update(service_info.get("evicted_note_hashes", []))
+    return hashes
+
+
+def evict(service_info, entries):
+    """Remember the hashes of dropped entries, keeping only the latest MAX_EVICTED_HASHES"""
+    evicted = service_info.setdefault("evicted_note_hashes", [])
+    evicted.extend(entry["hash"] for entry in entries if entry["hash"] not in evicted)
+    del evicted[:max(len(evicted) - MAX_EVICTED_HASHES, 0)]
+
+
+def oldest_recent(entries, max_recent):
+    """Recent update entries beyond the newest max_recent"""
+    recent = sorted((entry for entry in entries if entry["kind"] == RECENT_UPDATE), key=recency)
+    return recent[:max(len(recent) - max_recent, 0)]
+
+
+def add_note(service_info, kind, text, hashes=None, max_recent=MAX_RECENT_UPDATES, date=None):
+    """Add a note entry unless an identical one exists or existed; returns True if it was kept
+
+    hashes is the caller's cached set from note_hashes(), kept in sync here
+    so repeated calls for the same service stay O(1). date (YYYY-MM-DD)
+    orders recent updates, so the newest are kept whatever order they
+    arrive in.
+    """
+    if hashes is None:
+        hashes = note_hashes(service_info)
+
+    digest = note_hash(text)
+    if digest in hashes:
+        return False
+
+    entries = service_info.setdefault("note_entries", [])
+    entry = {
+        "kind": kind,
+        "text": text,
+        "hash": digest,
+        "added": datetime.now().isoformat(timespec='seconds')
+    }
+    if date:
+        entry["date"] = date
+    entries.append(entry)
+    hashes.add(digest)
+
+    # Keep only the newest recent updates; dropped ones stay in hashes so they are not re-added
+    if kind == RECENT_UPDATE and max_recent is not None:
+        dropped = oldest_recent(entries, max_recent)
+        if dropped:
+            dropped_ids = {id(old) for old in dropped}
+            entries[:] = [old for old in entries if id(old) not in dropped_ids]
+            evict(service_info, dropped)
+            return id(entry) not in dropped_ids
+
+    return True
+
+
+def compact_notes(service_info, max_recent=MAX_RECENT_UPDATES, max_age_days=RECENT_UPDATE_MAX_AGE_DAYS, now=None):
+    """Drop duplicate, expired and excess note entries; returns the number removed"""
+    migrate_notes(service_info)
+    entries = service_info["note_entries"]
+    now = now or datetime.now()
+    cutoff = now - timedelta(days=max_age_days) if max_age_days is not None else None
+
+    kept = []
+    expired = []
+    seen = set()
+    for entry in entries:
+        if entry["hash"] in seen:
+            continue
+        # Announcements age from their own date; undated ones from when they were added
+        if entry["kind"] == RECENT_UPDATE and cutoff is not None:
+            try:
+                if datetime.fromisoformat(entry.get("date") or entry["added"]) < cutoff:
+                    expired.append(entry)
+                    continue
+            except (KeyError, ValueError):
+                pass
+        seen.add(entry["hash"])
+        kept.append(entry)
+
+    if max_recent is not None:
+        excess = oldest_recent(kept, max_recent)
+        excess_ids = {id(entry) for entry in excess}
+        kept = [entry for entry in kept if id(entry) not in excess_ids]
+        expired.extend(excess)
+
+    # Expired announcements may still be listed upstream; don't add them back
+    if expired:
+        evict(service_info, expired)
+    removed = len(entries) - len(kept)
+    service_info["note_entries"] = kept
+    return removed
+
+
+def render_notes(service_info):
+    """Render the base study notes followed by all note entries as one string"""
+    parts = [service_info.get("certification_notes", "")]
+    parts.extend(entry["text"] for entry in service_info.get("note_entries", []))
+    return "\n\n".join(part for part in parts if part)
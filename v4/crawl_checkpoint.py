@@ -0,0 +1,117 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+from catalog_store import atomic_write_json
+
+# Bumped whenever the layout of the state file changes
+CHECKPOINT_VERSION = 1
+
+# Seconds between checkpoint writes while crawling
+DEFAULT_CHECKPOINT_INTERVAL = 30.0
+
+
+def checkpoint_path(services_file):
+    """Crawl state file kept next to the services file"""
+    return f"{os.path.splitext(services_file)[0]}.crawl_state.json"
+
+
+class CrawlInterrupted(Exception):
+    """Raised inside a crawl when the update is being stopped"""
+
+
+class CrawlCheckpoint:
+    """Partial crawl results saved to a small state file so an interrupted update can resume
+
+    The state has one section per crawl (docs, cert, blogs) holding its
+    frontier, the pages it has visited and what it has found so far. Crawls
+    change their section through update() and record(), which may be called
+    from several threads; the file is rewritten at most every `interval`
+    seconds, and whenever save() is called. The file is removed once the
+    update has been saved.
+    """
+
+    def __init__(self, path, interval=DEFAULT_CHECKPOINT_INTERVAL, options=None, sections=None):
+        self.path = path
+        self.interval = interval
+        self.options = options or {}
+        self.sections = sections or {}
+        self.lock = threading.Lock()
+        self.last_save = time.monotonic()
+        self.dirty = False
+
+    @classmethod
+    def open(cls, path, interval=DEFAULT_CHECKPOINT_INTERVAL, options=None, resume=False):
+        """Checkpoint continuing the saved state if resume is set and it was made with the same options"""
+        checkpoint = cls(path, interval, options)
+        try:
+            with open(path, 'r') as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            if resume:
+                print("No interrupted update to resume; starting from scratch")
+            return checkpoint
+        except ValueError:
+            print(f"Ignoring unreadable crawl checkpoint {path}")
+            return checkpoint
+
+        if not resume:
+            print(f"Discarding the checkpoint of an interrupted update from {data.get('saved', 'earlier')} "
+                  f"(use --resume to continue it)")
+        elif data.get("version") != CHECKPOINT_VERSION or data.get("options") != checkpoint.options:
+            print("The interrupted update used different options; starting from scratch")
+        else:
+            print(f"Resuming the update interrupted at {data.get('saved', 'an unknown time')}")
+            checkpoint.sections = data.get("sections", {})
+        return checkpoint
+
+    def section(self, name):
+        """State saved for one crawl (empty if it has not started)"""
+        with self.lock:
+            return self.sections.setdefault(name, {})
+
+    def update(self, name, **fields):
+        """Set fields of a crawl's state"""
+        with self.lock:
+            self.sections.setdefault(name, {}).update(fields)
+            self.dirty = True
+        self.save_if_due()
+
+    def record(self, name, field, key, value):
+        """Set one entry of a dict field of a crawl's state"""
+        with self.lock:
+            self.sections.setdefault(name, {}).setdefault(field, {})[key] = value
+            self.dirty = True
+        self.save_if_due()
+
+    def save_if_due(self):
+        if time.monotonic() - self.last_save >= self.interval:
+            self.save()
+
+    def save(self):
+        """Write the state file now if anything changed since the last write"""
+        with self.lock:
+            if not self.dirty:
+                return False
+            data = {
+                "version": CHECKPOINT_VERSION,
+                "saved": datetime.now().isoformat(timespec='seconds'),
+                "options": self.options,
+                "sections": self.sections,
+            }
+            atomic_write_json(self.path, data, indent=None)
+            self.last_save = time.monotonic()
+            self.dirty = False
+            return True
+
+    def clear(self):
+        """Forget the state once the update it belongs to has been saved"""
+        with self.lock:
+            self.sections = {}
+            self.dirty = False
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
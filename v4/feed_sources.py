@@ -0,0 +1,132 @@
+import html
+import re
+import xml.etree.ElementTree as ET
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+# Sitemap index of every guide on the docs site, one child sitemap per guide
+DOCS_SITEMAP_URL = "https://docs.aws.amazon.com/sitemap_index.xml"
+
+# What's New announcements as RSS 2.0, newest first
+WHATS_NEW_FEED_URL = "https://aws.amazon.com/about-aws/whats-new/recent/feed/"
+
+# Category given to services first seen in the sitemap, which has no categories
+SITEMAP_CATEGORY = "Uncategorized"
+
+# Bytes read from the network per chunk while parsing
+CHUNK_SIZE = 64 * 1024
+
+TAG_PATTERN = re.compile(r'<[^>]+>')
+SPACE_PATTERN = re.compile(r'\s+')
+# Word boundaries inside slugs like "AmazonS3", "AWSCloudFormation" or "elastic-beanstalk"
+SLUG_BREAK_PATTERN = re.compile(r'[-_]+|(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])|(?<=^amazon)|(?<=^aws)')
+# Lowercase slug prefixes written the way link texts spell them
+SLUG_PREFIXES = {"amazon": "Amazon", "aws": "AWS"}
+
+
+class ResponseStream:
+    """Read-only file object over a streamed requests response, counting the bytes read"""
+
+    def __init__(self, response, chunk_size=CHUNK_SIZE):
+        self.chunks = response.iter_content(chunk_size)
+        self.buffer = b""
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        while size < 0 or len(self.buffer) < size:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                break
+            self.bytes_read += len(chunk)
+            self.buffer += chunk
+        if size < 0:
+            size = len(self.buffer)
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+
+def local_name(tag):
+    """Element tag without its {namespace}"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def iter_items(stream, item_tags):
+    """Yield each complete element whose tag (without namespace) is in item_tags, then drop it
+
+    Only the item being read and its ancestors are ever held in memory,
+    however long the document is.
+    """
+    parents = []
+    for event, element in ET.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            parents.append(element)
+            continue
+        parents.pop()
+        if local_name(element.tag) in item_tags:
+            yield element
+            if parents:
+                parents[-1].remove(element)
+
+
+def child_text(element, name):
+    """Stripped text of the first child called name (any namespace), or ''"""
+    for child in element:
+        if local_name(child.tag) == name:
+            return (child.text or "").strip()
+    return ""
+
+
+def iter_sitemap(stream):
+    """Yield (loc, lastmod) for every <url> or <sitemap> entry of a sitemap or sitemap index"""
+    for entry in iter_items(stream, ("url", "sitemap")):
+        loc = child_text(entry, "loc")
+        if loc:
+            yield loc, child_text(entry, "lastmod")
+
+
+def slug_link_text(slug):
+    """Readable name for a docs URL slug, e.g. "AWSCloudFormation" -> "AWS Cloud Formation\""""
+    words = SLUG_BREAK_PATTERN.sub(' ', slug).split()
+    return " ".join(SLUG_PREFIXES.get(word, word) for word in words)
+
+
+def sitemap_services(locations):
+    """(link text, landing page URL) for each guide in sitemap order, one per docs path"""
+    seen = set()
+    for loc, _ in locations:
+        parsed = urlparse(loc)
+        slug = parsed.path.strip('/').split('/', 1)[0]
+        # Site-wide files such as the sitemap itself live at the root
+        if not slug or '.' in slug or slug in seen:
+            continue
+        seen.add(slug)
+        yield slug_link_text(slug), f"{parsed.scheme}://{parsed.netloc}/{slug}/"
+
+
+def strip_tags(text):
+    """Plain text of a small HTML fragment such as an RSS description"""
+    return SPACE_PATTERN.sub(' ', html.unescape(TAG_PATTERN.sub(' ', text))).strip()
+
+
+def rss_date(value):
+    """RFC 822 pubDate as an ISO UTC timestamp like the listing API's postDateTime; '' if unreadable"""
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return ""
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc)
+    return parsed.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def iter_rss(stream):
+    """Yield What's New announcements ({id, title, date, content}) from an RSS 2.0 feed"""
+    for item in iter_items(stream, ("item",)):
+        link = child_text(item, "link")
+        yield {
+            "id": child_text(item, "guid") or link,
+            "title": child_text(item, "title"),
+            "date": rss_date(child_text(item, "pubDate")),
+            "content": strip_tags(child_text(item, "description")),
+        }
@@ -0,0 +1,254 @@
+import hashlib
+import heapq
+import json
+import math
+import os
+import re
+from collections import Counter
+
+from catalog_store import atomic_write_json
+
+# BM25 parameters (the usual defaults)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Bumped when tokenization or the file layout changes; older files are rebuilt
+INDEX_VERSION = 1
+
+# Terms in more than this share of services only re-rank matches of rarer terms
+COMMON_TERM_RATIO = 0.1
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+# Words too common in service descriptions to help ranking
+STOPWORDS = frozenset((
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in", "is", "it",
+    "of", "on", "or", "that", "the", "to", "with", "you", "your",
+))
+
+
+def index_path(catalog_path):
+    """Where the full-text index for a catalog file (or shard directory) is kept"""
+    if os.path.isdir(catalog_path):
+        return os.path.join(catalog_path, '.fulltext.json')
+    return os.path.splitext(catalog_path)[0] + '.fulltext.json'
+
+
+def stem(token):
+    """Fold simple plurals so "replicas" matches "replica\""""
+    if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+        return token[:-1]
+    return token
+
+
+def tokenize(text):
+    """Lower-case, stemmed, stopword-free tokens of text"""
+    return [stem(token) for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def document_text(info):
+    """Searchable text of a service: description, notes and structured note entries"""
+    parts = [info.get("description", ""), info.get("certification_notes", "")]
+    parts.extend(entry.get("text", "") for entry in info.get("note_entries") or ())
+    return "\n".join(parts)
+
+
+def text_hash(text):
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+class FullTextIndex:
+    """BM25 inverted index over service descriptions and certification notes
+
+    Services get small integer doc ids and postings map each term to
+    {doc id: term frequency}; the text itself is never kept. Each document
+    remembers the hash of the text it was built from, so sync() re-indexes
+    just the services whose text changed since the index was saved.
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.names = []
+        self.hashes = []
+        self.lengths = []
+        self.free = []
+        self.postings = {}
+        self.total_length = 0
+        self.doc_terms = {}
+        self.norms = None
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path):
+        """Index saved at path, or an empty one if missing, unreadable or outdated"""
+        index = cls()
+        try:
+            with open(path, 'r') as file:
+                data = json.load(file)
+            if data.get("version") != INDEX_VERSION:
+                return index
+            index.names = data["names"]
+            index.hashes = data["hashes"]
+            index.lengths = data["lengths"]
+            index.postings = {token: dict(zip(flat[::2], flat[1::2])) for token, flat in data["postings"].items()}
+        except (FileNotFoundError, ValueError, KeyError, TypeError):
+            return cls()
+        index.ids = {name: doc_id for doc_id, name in enumerate(index.names) if name is not None}
+        index.free = [doc_id for doc_id, name in enumerate(index.names) if name is None]
+        index.total_length = sum(index.lengths)
+        # Rebuilt on the first removal, which is the only thing that needs it
+        index.doc_terms = None
+        return index
+
+    def save(self, path):
+        """Write the index atomically if it changed since it was loaded or saved"""
+        if not self.dirty:
+            return False
+        atomic_write_json(path, {
+            "version": INDEX_VERSION,
+            "names": self.names,
+            "hashes": self.hashes,
+            "lengths": self.lengths,
+            "postings": {token: [value for pair in postings.items() for value in pair] for token, postings in self.postings.items()},
+        }, indent=None)
+        self.dirty = False
+        return True
+
+    def __len__(self):
+        return len(self.ids)
+
+    def terms_of(self, doc_id):
+        """Terms indexed for a document"""
+        if self.doc_terms is None:
+            self.doc_terms = {}
+            for token, postings in self.postings.items():
+                for posting_id in postings:
+                    self.doc_terms.setdefault(posting_id, []).append(token)
+        return self.doc_terms.get(doc_id, ())
+
+    def add(self, name, info, digest=None):
+        """Index (or re-index) one service; returns False if its text is unchanged"""
+        text = document_text(info)
+        digest = digest or text_hash(text)
+        doc_id = self.ids.get(name)
+        if doc_id is not None:
+            if self.hashes[doc_id] == digest:
+                return False
+            self.remove(name)
+
+        # Count raw words first so stopwords and stemming are handled once per distinct word
+        counts = {}
+        for word, count in Counter(TOKEN_PATTERN.findall(text.lower())).items():
+            if word not in STOPWORDS:
+                token = stem(word)
+                counts[token] = counts.get(token, 0) + count
+        length = sum(counts.values())
+
+        if self.free:
+            doc_id = self.free.pop()
+            self.names[doc_id], self.hashes[doc_id], self.lengths[doc_id] = name, digest, length
+        else:
+            doc_id = len(self.names)
+            self.names.append(name)
+            self.hashes.append(digest)
+            self.lengths.append(length)
+        self.ids[name] = doc_id
+
+        for token, count in counts.items():
+            self.postings.setdefault(token, {})[doc_id] = count
+        if self.doc_terms is not None:
+            self.doc_terms[doc_id] = list(counts)
+        self.total_length += length
+        self.norms = None
+        self.dirty = True
+        return True
+
+    def remove(self, name):
+        doc_id = self.ids.pop(name, None)
+        if doc_id is None:
+            return
+        for token in self.terms_of(doc_id):
+            postings = self.postings.get(token)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self.postings[token]
+        self.doc_terms.pop(doc_id, None)
+        self.total_length -= self.lengths[doc_id]
+        self.names[doc_id], self.hashes[doc_id], self.lengths[doc_id] = None, None, 0
+        self.free.append(doc_id)
+        self.norms = None
+        self.dirty = True
+
+    def sync(self, services):
+        """Bring the index in line with services, one service at a time; returns (reindexed, removed)"""
+        reindexed = 0
+        for name, info in services.items():
+            digest = text_hash(document_text(info))
+            doc_id = self.ids.get(name)
+            if doc_id is None or self.hashes[doc_id] != digest:
+                self.add(name, info, digest)
+                reindexed += 1
+        stale = [name for name in self.ids if name not in services]
+        for name in stale:
+            self.remove(name)
+        return reindexed, len(stale)
+
+    def doc_norms(self):
+        """Per-document BM25 length normalisation, recomputed after edits"""
+        if self.norms is None:
+            average_length = self.total_length / max(len(self.ids), 1) or 1
+            self.norms = [BM25_K1 * (1 - BM25_B + BM25_B * length / average_length) for length in self.lengths]
+        return self.norms
+
+    def search(self, query, limit=10):
+        """(service, score) pairs ranked by BM25, best first"""
+        count = len(self.ids)
+        postings = sorted((self.postings[token] for token in set(tokenize(query)) if token in self.postings), key=len)
+        if not postings:
+            return []
+        norms = self.doc_norms()
+
+        # Terms found in most services only re-rank what the rarer terms matched
+        rare = [terms for terms in postings if len(terms) <= COMMON_TERM_RATIO * count] or postings[:1]
+        common = postings[len(rare):]
+
+        scores = {}
+        for terms in rare:
+            idf = math.log(1 + (count - len(terms) + 0.5) / (len(terms) + 0.5))
+            for doc_id, frequency in terms.items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (BM25_K1 + 1) / (frequency + norms[doc_id])
+        for terms in common:
+            idf = math.log(1 + (count - len(terms) + 0.5) / (len(terms) + 0.5))
+            for doc_id in scores:
+                frequency = terms.get(doc_id)
+                if frequency:
+                    scores[doc_id] += idf * frequency * (BM25_K1 + 1) / (frequency + norms[doc_id])
+
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [(self.names[doc_id], score) for doc_id, score in best]
+
+
+def snippet(info, query, width=100):
+    """First line of a service's text that mentions a query term, shortened to width"""
+    terms = set(tokenize(query))
+    lines = [line.strip() for line in document_text(info).splitlines() if line.strip()]
+    for line in lines:
+        if terms & set(tokenize(line)):
+            return line if len(line) <= width else line[:width - 3] + "..."
+    return lines[0][:width] if lines else ""
+
+
+def sync_index_file(catalog_path, services, create=False):
+    """Update the saved index for catalog_path to match services
+
+    Used after a catalog save. Does nothing if no index has been created
+    yet, unless create is set. Returns the index, or None.
+    """
+    path = index_path(catalog_path)
+    if not create and not os.path.exists(path):
+        return None
+    index = FullTextIndex.load(path)
+    index.sync(services)
+    index.save(path)
+    return index
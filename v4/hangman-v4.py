@@ -2,15 +2,48 @@ import random
 import os
 import json
 import time
+import signal
 import subprocess
 import sys
 from datetime import datetime
+from itertools import islice
+
+from api_workers import serve_workers
+from catalog_io import FORMATS, detect_format, open_stream, read_rows, write_rows
+from catalog_model import DIFFICULTIES, DIFFICULTY_MULTIPLIERS, MAX_REPORTED_ERRORS, CatalogError, make_record, parse_catalog
+from catalog_shards import open_store, split_catalog
+from catalog_watch import DEFAULT_POLL_INTERVAL, CatalogWatcher
+from certification_notes import render_notes
+from crawl_checkpoint import checkpoint_path
+from fulltext import index_path, snippet, sync_index_file
+from hangman_api import DEFAULT_HOST, DEFAULT_PORT, SECRET_ENV_VAR, serve as serve_api
+from instrumentation import PROFILE_ENV_VAR, PROFILE_MODES, setup as setup_instrumentation
+from leaderboard import MAX_PLAYER_LENGTH, LeaderboardStore, default_player, valid_player
+from service_search import ServiceIndex
+from shared_catalog import CatalogPublisher, SharedCatalogClient
+from terminal_ui import BACKSPACE, ENTER, EOF, ESCAPE, REDRAW, FrameRenderer, RawTerminal, raw_input_available
+
+# Rows validated and applied together by import_services
+IMPORT_BATCH_SIZE = 5000
+
+# Seconds a guess's feedback stays on screen in keystroke mode
+STATUS_SECONDS = 1.5
 
 class AwsHangman:
-    def __init__(self):
-        self.aws_services = self.load_services()
+    def __init__(self, services_file='aws_services.json', shared_catalog=None, player=None):
+        self.store = open_store(services_file, writer="game", parse=parse_catalog)
+        self.watcher = None
+        self.search_index = None
+        self.fulltext_index = None
+        self.leaderboard = None
+        self.player = player or default_player()
+        # Read guesses a keystroke at a time (set by main() when the terminal allows it)
+        self.key_input = False
+        # Read-only workers attach to a catalog published in shared memory instead of loading the file
+        self.shared = SharedCatalogClient(shared_catalog) if shared_catalog else None
+        self.aws_services = self.shared.refresh() if self.shared else self.load_services()
         self.categories = self.get_categories()
-        self.difficulty_levels = ["Easy", "Medium", "Hard"]
+        self.difficulty_levels = list(DIFFICULTIES)
         self.current_service = None
         self.description = None
         self.certification_notes = None
@@ -24,11 +57,10 @@ class AwsHangman:
     def load_services(self):
         """Load AWS services from file or use default if file doesn't exist"""
         try:
-            with open('aws_services.json', 'r') as file:
-                return json.load(file)
+            return self.store.load()
         except FileNotFoundError:
             # Default services with certification notes
-            return {
+            return parse_catalog({
                 "EC2": {
                     "description": "Elastic compute service that provides resizable compute capacity in the cloud",
                     "category": "Compute",
@@ -59,16 +91,109 @@ class AwsHangman:
                     "difficulty": "Medium",
                     "certification_notes": "Understand multi-AZ deployments, read replicas, and backup options"
                 }
-            }
+            }, "default services")
     
     def save_services(self):
         """Save the current AWS services to a file"""
-        with open('aws_services.json', 'w') as file:
-            json.dump(self.aws_services, file, indent=4)
+        # Picks up anything the updater saved in the meantime
+        services = self.store.save(self.aws_services)
+        if services is not self.aws_services:
+            self.search_index = None
+            if self.fulltext_index is not None:
+                self.fulltext_index.sync(services)
+        self.aws_services = services
+        if self.fulltext_index is not None:
+            self.fulltext_index.save(index_path(self.store.path))
+
+    def reload_services(self):
+        """Reload services if the file changed on disk; returns True if it did"""
+        services = self.store.load_if_changed()
+        if services is None:
+            return False
+        self.aws_services = services
+        self.categories = self.get_categories()
+        self.search_index = None
+        self.fulltext_index = None
+        return True
     
-    def get_categories(self):
+    def get_categories(self, services=None):
         """Extract unique categories from services"""
-        return sorted(list(set(service["category"] for service in self.aws_services.values())))
+        services = self.aws_services if services is None else services
+        return services.category_names()
+
+    def prepare_catalog(self, snapshot):
+        """Build derived indexes for a validated catalog snapshot (runs on the watcher thread)"""
+        snapshot["categories"] = self.get_categories(snapshot["data"])
+        if self.search_index is not None:
+            snapshot["search_index"] = ServiceIndex.build(snapshot["data"])
+        if self.fulltext_index is not None:
+            snapshot["fulltext_index"] = sync_index_file(self.store.path, snapshot["data"], create=True)
+        return snapshot
+
+    def start_watching(self, poll_interval=DEFAULT_POLL_INTERVAL):
+        """Watch the services file and load new versions in the background"""
+        self.watcher = CatalogWatcher(self.store, self.prepare_catalog, poll_interval).start()
+        return self.watcher
+
+    def apply_pending_catalog(self):
+        """Swap in a catalog loaded by the watcher; only call between rounds"""
+        if self.shared is not None:
+            return self.apply_shared_catalog()
+        if self.watcher is None:
+            return False
+        prepared = self.watcher.take_pending()
+        if prepared is None:
+            return False
+
+        # Skip our own saves and snapshots that a newer write has superseded
+        signature = prepared["signature"]
+        if signature == self.store.loaded_signature or signature != self.store.signature():
+            return False
+
+        self.aws_services = self.store.adopt(prepared)
+        self.categories = prepared["categories"]
+        self.search_index = prepared.get("search_index")
+        self.fulltext_index = prepared.get("fulltext_index")
+        return True
+
+    def apply_shared_catalog(self):
+        """Attach the newest catalog version published in shared memory, if it changed"""
+        services = self.shared.refresh()
+        if services is None:
+            return False
+        self.aws_services = services
+        self.categories = self.get_categories()
+        self.search_index = None
+        self.fulltext_index = None
+        return True
+
+    def get_search_index(self):
+        """Search index over the catalog, built on first use"""
+        if self.search_index is None:
+            self.search_index = ServiceIndex.build(self.aws_services)
+        return self.search_index
+
+    def search_services(self, query, limit=10):
+        """Service names best matching query (name prefixes, typos, description words)"""
+        return self.get_search_index().search(query, limit)
+
+    def search_text(self, query, limit=10):
+        """(service, score) pairs whose description or notes best match query (BM25)"""
+        if self.fulltext_index is None:
+            # Loads the saved index and re-indexes only services whose text changed
+            self.fulltext_index = sync_index_file(self.store.path, self.aws_services, create=True)
+        return self.fulltext_index.search(query, limit)
+
+    def refresh_indexes(self, name):
+        """Keep any built search indexes in step with an added, updated or deleted service"""
+        info = self.aws_services[name] if name in self.aws_services else None
+        for index in (self.search_index, self.fulltext_index):
+            if index is None:
+                continue
+            if info is None:
+                index.remove(name)
+            else:
+                index.add(name, info)
     
     def add_service(self, name, description, category, difficulty, certification_notes):
         """Add a new AWS service to the database"""
@@ -78,8 +203,9 @@ class AwsHangman:
             "difficulty": difficulty,
             "certification_notes": certification_notes
         }
-        self.categories = self.get_categories()
+        self.refresh_indexes(name.upper())
         self.save_services()
+        self.categories = self.get_categories()
         
     def update_service(self, name, description=None, category=None, difficulty=None, certification_notes=None):
         """Update an existing AWS service"""
@@ -93,6 +219,7 @@ class AwsHangman:
                 service["difficulty"] = difficulty
             if certification_notes:
                 service["certification_notes"] = certification_notes
+            self.refresh_indexes(name.upper())
             self.save_services()
             self.categories = self.get_categories()
             return True
@@ -102,11 +229,65 @@ class AwsHangman:
         """Delete an AWS service from the database"""
         if name.upper() in self.aws_services:
             del self.aws_services[name.upper()]
+            self.refresh_indexes(name.upper())
             self.save_services()
             self.categories = self.get_categories()
             return True
         return False
 
+    def validate_import_batch(self, batch, errors):
+        """Build records for a batch of (line, name, fields) rows; problems are added to errors"""
+        records = {}
+        for line_number, name, fields in batch:
+            if not isinstance(name, str) or not name.strip():
+                errors.append(f"line {line_number}: missing service name")
+                continue
+            name = name.strip().upper()
+
+            # Existing services only change the fields given in the row
+            existing = records.get(name) or self.aws_services.get(name)
+            info = dict(existing.to_dict(), **fields) if existing is not None else fields
+            try:
+                records[name] = make_record(self.aws_services.category_table, name, info, f"line {line_number}")
+            except CatalogError as e:
+                errors.append(str(e))
+        return records
+
+    def import_services(self, rows, batch_size=IMPORT_BATCH_SIZE, skip_invalid=False):
+        """Validate and upsert (line, name, fields) rows in batches, then save once
+
+        Returns (added, updated, skipped). Unless skip_invalid is set, the
+        first batch with an invalid row raises CatalogError and nothing is saved.
+        """
+        added = updated = skipped = 0
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            errors = []
+            records = self.validate_import_batch(batch, errors)
+            if errors and not skip_invalid:
+                raise CatalogError("import failed, nothing was saved:\n  " + "\n  ".join(errors[:MAX_REPORTED_ERRORS]))
+            skipped += len(errors)
+            for name, record in records.items():
+                if name in self.aws_services:
+                    updated += 1
+                else:
+                    added += 1
+                self.aws_services[name] = record
+                self.refresh_indexes(name)
+
+        # One atomic write for the whole import
+        if added or updated:
+            self.save_services()
+            self.categories = self.get_categories()
+        return added, updated, skipped
+
+    def export_services(self, file, format="ndjson"):
+        """Stream every service to file as NDJSON or CSV; returns the count"""
+        return write_rows(file, self.aws_services, format)
+
     def clear_screen(self):
         """Clear the terminal screen"""
         os.system('cls' if os.name == 'nt' else 'clear')
@@ -182,22 +363,18 @@ class AwsHangman:
 
     def select_service(self, category=None, difficulty=None):
         """Select a random AWS service based on category and difficulty"""
-        filtered_services = {}
-        
-        for name, info in self.aws_services.items():
-            if (category is None or info["category"] == category) and \
-               (difficulty is None or info["difficulty"] == difficulty):
-                filtered_services[name] = info
+        # Filters compare interned ids; a sharded catalog only loads the shards holding the category
+        candidates = self.aws_services.select(category, difficulty)
         
-        if not filtered_services:
+        if not candidates:
             return None
             
-        service_name = random.choice(list(filtered_services.keys()))
-        service_info = filtered_services[service_name]
+        service_name = random.choice(candidates)
+        service_info = self.aws_services[service_name]
         
         self.current_service = service_name
         self.description = service_info["description"]
-        self.certification_notes = service_info["certification_notes"]
+        self.certification_notes = render_notes(service_info)
         self.word_completion = '_' * len(service_name)
         self.guessed_letters = []
         self.guessed_words = []
@@ -266,10 +443,12 @@ class AwsHangman:
     
     def update_score(self, won):
         """Update the player's score"""
+        points = 0
         if won:
-            difficulty_multiplier = {"Easy": 1, "Medium": 2, "Hard": 3}
             service_info = self.aws_services[self.current_service]
-            self.score += 10 * difficulty_multiplier[service_info["difficulty"]]
+            points = 10 * DIFFICULTY_MULTIPLIERS[service_info.difficulty_id]
+            self.score += points
+        self.get_leaderboard().record(self.player, points, won)
         
         # Record game history
         self.game_history.append({
@@ -278,6 +457,17 @@ class AwsHangman:
             "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         })
     
+    def get_leaderboard(self):
+        """Leaderboard shared by every game and API worker using this catalog, loaded on first use"""
+        if self.leaderboard is None:
+            self.leaderboard = LeaderboardStore.open(self.store.path)
+        return self.leaderboard
+
+    def close(self):
+        """Snapshot the leaderboard so the next start does not replay its journal"""
+        if self.leaderboard is not None:
+            self.leaderboard.snapshot()
+
     def get_study_tip(self):
         """Get a certification study tip for the current service"""
         return self.certification_notes
@@ -316,13 +506,21 @@ class AwsHangman:
         
         return "\n".join(stats)
 
-def main():
+def main(services_file='aws_services.json', watch=True, player=None, key_input=True):
     print("AWS Hangman for Certification Prep - Coming soon!")
-    game = AwsHangman()
+    game = AwsHangman(services_file, player=player)
+    game.key_input = key_input and raw_input_available()
+    if watch:
+        game.start_watching()
     
     while True:
+        # Pick up catalog changes saved by other processes between rounds
+        reloaded = game.apply_pending_catalog()
+        
         game.clear_screen()
         print("\n===== AWS HANGMAN FOR CERTIFICATION PREP =====\n")
+        if reloaded:
+            print(f"(AWS services database reloaded: {len(game.aws_services)} services)\n")
         print("1. Play Game")
         print("2. Filter by Category")
         print("3. Filter by Difficulty")
@@ -330,9 +528,11 @@ def main():
         print("5. Update Existing Service")
         print("6. View Statistics")
         print("7. Update AWS Services Database")
-        print("8. Exit")
+        print("8. Search Descriptions and Study Notes")
+        print("9. View Leaderboard")
+        print("10. Exit")
 
-        choice = input("\nEnter your choice (1-8): ")
+        choice = input("\nEnter your choice (1-10): ")
         
         if choice == "1":
             play_game(game)
@@ -349,6 +549,11 @@ def main():
         elif choice == "7":
             update_aws_services_database(game)
         elif choice == "8":
+            search_study_notes(game)
+        elif choice == "9":
+            view_leaderboard(game)
+        elif choice == "10":
+            game.close()
             print("\nThank you for using AWS Hangman for Certification Prep!")
             break
         else:
@@ -363,6 +568,10 @@ def play_game(game, category=None, difficulty=None):
     if not service:
         input("No services match your criteria. Press Enter to return to the menu...")
         return
+
+    if game.key_input:
+        play_round_keys(game, service)
+        return
     
     game_over = False
     won = False
@@ -392,23 +601,82 @@ def play_game(game, category=None, difficulty=None):
     
     # Game result
     game.clear_screen()
-    print(game.display_game_state())
-    print("\n")
-    
-    if won:
-        print(f"Congratulations! You guessed the AWS service: {service}")
-    else:
-        print(f"Sorry, you ran out of tries. The AWS service was: {service}")
-    
-    # Show certification study tip
-    print("\nCertification Study Tip:")
-    print(game.get_study_tip())
+    print("\n".join(round_summary(game, service, won)))
     
     # Update score
     game.update_score(won)
     
     input("\nPress Enter to continue...")
 
+def round_summary(game, service, won):
+    """Lines shown when a round ends: the final state, the result and the study tip"""
+    lines = [game.display_game_state(), "\n"]
+    if won:
+        lines.append(f"Congratulations! You guessed the AWS service: {service}")
+    else:
+        lines.append(f"Sorry, you ran out of tries. The AWS service was: {service}")
+    lines.append("\nCertification Study Tip:")
+    lines.append(game.get_study_tip())
+    return lines
+
+def play_round_keys(game, service):
+    """Play one round reacting to each keystroke, redrawing only what changed"""
+    renderer = FrameRenderer()
+    status, status_until = "", None
+    word = None
+    won = game_over = False
+
+    with RawTerminal() as terminal:
+        while not game_over:
+            if word is None:
+                prompt = "Type a letter to guess it, or press Enter to guess the whole name: "
+            else:
+                prompt = f"Whole name (Esc to cancel): {word}"
+            frame = ["", "===== AWS HANGMAN =====", "", game.display_game_state(), "", status, prompt]
+            renderer.render(frame, (len(frame) - 1, len(prompt)))
+
+            # Wake up to clear the feedback line when it expires
+            timeout = None if status_until is None else max(0.0, status_until - time.monotonic())
+            key = terminal.read_key(timeout)
+            if key is None:
+                status, status_until = "", None
+                continue
+            if key == REDRAW:
+                renderer.invalidate()
+                continue
+            if key == EOF:
+                raise EOFError
+
+            if word is not None:
+                if key == ESCAPE:
+                    word = None
+                elif key == BACKSPACE:
+                    word = word[:-1]
+                elif key == ENTER:
+                    guess, word = word, None
+                    if guess:
+                        result = game.make_guess(guess)
+                        status, status_until = result["message"], time.monotonic() + STATUS_SECONDS
+                        won, game_over = result["won"], result["game_over"]
+                elif len(key) == 1 and key.isprintable():
+                    word += key.upper()
+                continue
+
+            if key == ENTER:
+                word = ""
+            elif len(key) == 1:
+                result = game.make_guess(key)
+                status, status_until = result["message"], time.monotonic() + STATUS_SECONDS
+                won, game_over = result["won"], result["game_over"]
+
+        game.update_score(won)
+        summary = ["", "===== AWS HANGMAN =====", ""] + round_summary(game, service, won) + ["", "Press any key to continue..."]
+        renderer.render(summary)
+        while terminal.read_key() == REDRAW:
+            renderer.invalidate()
+            renderer.render(summary)
+    renderer.close()
+
 def play_with_category_filter(game):
     """Play the game with a category filter"""
     game.clear_screen()
@@ -501,28 +769,40 @@ def add_new_service(game):
     game.add_service(name, description, category, difficulty, certification_notes)
     input("Service added successfully. Press Enter to continue...")
 
+def pick_service(game):
+    """Search for a service by name or description and let the user pick one"""
+    print("Type part of a service name or description (typos are fine).")
+    while True:
+        query = input("\nSearch services (leave blank to return to the menu): ").strip()
+        if not query:
+            return None
+        
+        matches = game.search_services(query)
+        if not matches:
+            print("No matching services.")
+            continue
+        
+        for i, service in enumerate(matches, 1):
+            print(f"{i}. {service} - {game.aws_services[service]['description'][:60]}")
+        
+        choice = input("\nSelect service to update (leave blank to search again): ").strip()
+        if not choice:
+            continue
+        try:
+            choice = int(choice)
+            if 1 <= choice <= len(matches):
+                return matches[choice - 1]
+            print("Invalid choice.")
+        except ValueError:
+            print("Invalid input.")
+
 def update_service(game):
     """Update an existing AWS service"""
     game.clear_screen()
     print("\n===== UPDATE AWS SERVICE =====\n")
     
-    # List all services
-    services = sorted(game.aws_services.keys())
-    for i, service in enumerate(services, 1):
-        print(f"{i}. {service}")
-    print(f"{len(services) + 1}. Back to Main Menu")
-    
-    try:
-        choice = int(input("\nSelect service to update: "))
-        if 1 <= choice <= len(services):
-            service_name = services[choice - 1]
-        elif choice == len(services) + 1:
-            return
-        else:
-            input("Invalid choice. Press Enter to continue...")
-            return
-    except ValueError:
-        input("Invalid input. Press Enter to continue...")
+    service_name = pick_service(game)
+    if service_name is None:
         return
     
     service_info = game.aws_services[service_name]
@@ -583,6 +863,45 @@ def view_statistics(game):
     print(game.show_statistics())
     input("\nPress Enter to continue...")
 
+def view_leaderboard(game, count=10):
+    """Show the top players and the current player's rank"""
+    game.clear_screen()
+    print("\n===== LEADERBOARD =====\n")
+    standings = game.get_leaderboard().standings(count, game.player)
+    if not standings["top"]:
+        print("No games recorded yet.")
+    for row in standings["top"]:
+        marker = "  <- you" if row["player"] == game.player else ""
+        print(f"{row['rank']:>4}. {row['player']:<24} {row['score']:>7} points  ({row['wins']}/{row['games']} won){marker}")
+
+    mine = standings["player"]
+    if mine is None:
+        print(f"\n{game.player} has not finished a game yet.")
+    elif mine["rank"] > count:
+        print(f"\nYour rank: #{mine['rank']} of {standings['players']} with {mine['score']} points")
+    input("\nPress Enter to continue...")
+
+def search_study_notes(game):
+    """Full-text search over service descriptions and certification notes"""
+    game.clear_screen()
+    print("\n===== SEARCH DESCRIPTIONS AND STUDY NOTES =====\n")
+    
+    query = input("Search for (e.g. read replicas, Multi-AZ): ").strip()
+    if not query:
+        return
+    
+    results = game.search_text(query)
+    if not results:
+        print("\nNo services mention that.")
+    else:
+        print()
+        for i, (service, score) in enumerate(results, 1):
+            service_info = game.aws_services[service]
+            print(f"{i}. {service} ({service_info['category']}, {service_info['difficulty']})")
+            print(f"   {snippet(service_info, query)}")
+    
+    input("\nPress Enter to continue...")
+
 def update_aws_services_database(game):
     """Update AWS services database with latest information"""
     game.clear_screen()
@@ -609,8 +928,16 @@ def update_aws_services_database(game):
             input("\nPress Enter to continue...")
             return
         
+        # The updater rewrites a single services file; shard directories are edited with the game instead
+        services_file = game.store.path
+        if os.path.isdir(services_file):
+            print(f"\nError: {services_file} is a sharded catalog, which the updater cannot write.")
+            print("Update a single-file catalog and split it again with --split-catalog.")
+            input("\nPress Enter to continue...")
+            return
+        
         # Run the updater script with appropriate arguments
-        update_command = [sys.executable, "aws_service_updater.py"]
+        update_command = [sys.executable, "aws_service_updater.py", "--services-file", services_file]
         
         if choice == "1":
             update_command.append("--docs-only")
@@ -620,6 +947,12 @@ def update_aws_services_database(game):
             update_command.append("--blogs-only")
         # Choice 4 runs everything (default)
         
+        # Offer to carry on an update that was interrupted part way through
+        if os.path.exists(checkpoint_path(services_file)):
+            resume = input("\nAn earlier update was interrupted. Resume it? (y/n): ")
+            if resume.strip().lower().startswith("y"):
+                update_command.append("--resume")
+        
         print("\nStarting update process...")
         result = subprocess.run(update_command, capture_output=True, text=True)
         
@@ -628,8 +961,7 @@ def update_aws_services_database(game):
             print(result.stdout)
             
             # Reload services after update
-            game.aws_services = game.load_services()
-            game.categories = game.get_categories()
+            game.reload_services()
             
             input("\nPress Enter to continue...")
         else:
@@ -641,5 +973,98 @@ def update_aws_services_database(game):
         print(f"\nError: {str(e)}")
         input("\nPress Enter to continue...")
 
+def publish_catalog(services_file, name, watch=True, poll_interval=1.0):
+    """Publish the catalog to shared memory for --shared-catalog workers, republishing on change"""
+    game = AwsHangman(services_file)
+    publisher = CatalogPublisher(name)
+    # Turn SIGTERM from a supervisor into a clean exit so the segments are unlinked
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        generation = publisher.publish(game.aws_services)
+        print(f"Published {len(game.aws_services)} services as {name!r} (version {generation})", file=sys.stderr)
+        if watch:
+            game.start_watching()
+        while True:
+            time.sleep(poll_interval)
+            if game.apply_pending_catalog():
+                generation = publisher.publish(game.aws_services)
+                print(f"Published {len(game.aws_services)} services as {name!r} (version {generation})", file=sys.stderr)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        publisher.close()
+
 if __name__ == "__main__":
-    main()
+    import argparse
+
+    parser = argparse.ArgumentParser(description='AWS Hangman for Certification Prep')
+    parser.add_argument('--profile', choices=PROFILE_MODES, help=f'Time hot paths and print a report at exit (also enabled by {PROFILE_ENV_VAR})')
+    parser.add_argument('--catalog', default='aws_services.json', help='Services file, or a directory of shard files')
+    parser.add_argument('--split-catalog', metavar='DIR', help='Split the --catalog file into one shard per category in DIR, then exit')
+    parser.add_argument('--no-watch', action='store_true', help='Do not reload aws_services.json when another process updates it')
+    parser.add_argument('--import', dest='import_path', metavar='PATH', help='Add or update services from an NDJSON or CSV file (- for stdin), then exit')
+    parser.add_argument('--export', dest='export_path', metavar='PATH', help='Write every service to an NDJSON or CSV file (- for stdout), then exit')
+    parser.add_argument('--format', choices=FORMATS, help='Format for --import/--export (default: from the file extension, else NDJSON)')
+    parser.add_argument('--skip-invalid', action='store_true', help='With --import, skip invalid rows instead of aborting')
+    parser.add_argument('--serve', action='store_true', help=f'Serve the stateless HTTP/JSON game API instead of the menu (set {SECRET_ENV_VAR} on every node)')
+    parser.add_argument('--host', default=DEFAULT_HOST, help='Address for --serve to listen on')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='Port for --serve to listen on')
+    parser.add_argument('--workers', type=int, default=1, help='With --serve, run this many worker processes sharing the port, restarted if they die (SIGHUP reloads the catalog)')
+    parser.add_argument('--publish-catalog', metavar='NAME', help='Publish the catalog to shared memory as NAME for --shared-catalog workers and keep it current')
+    parser.add_argument('--shared-catalog', metavar='NAME', help='With --serve, read the catalog published as NAME instead of loading it')
+    parser.add_argument('--line-input', action='store_true', help='Type each guess and press Enter instead of reacting to single keystrokes')
+    parser.add_argument('--player', help='Name to record results under on the leaderboard (default: your login name)')
+    parser.add_argument('--profile-output', metavar='PATH', help='Write the profile report to PATH instead of stderr')
+
+    args = parser.parse_args()
+    if args.shared_catalog and not args.serve:
+        parser.error("--shared-catalog is read-only and only supported with --serve")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.workers > 1 and args.shared_catalog:
+        parser.error("--workers publishes its own shared catalog; do not combine it with --shared-catalog")
+    if args.player is not None and not valid_player(args.player):
+        parser.error(f"--player must be 1 to {MAX_PLAYER_LENGTH} characters")
+
+    try:
+        if args.split_catalog:
+            manifest = split_catalog(AwsHangman(args.catalog).aws_services, args.split_catalog)
+            print(f"Wrote {len(manifest['shards'])} shards to {args.split_catalog}")
+            sys.exit(0)
+
+        if args.import_path:
+            game = AwsHangman(args.catalog)
+            try:
+                with open_stream(args.import_path, 'r') as file:
+                    rows = read_rows(file, detect_format(args.import_path, args.format))
+                    added, updated, skipped = game.import_services(rows, skip_invalid=args.skip_invalid)
+            except CatalogError as e:
+                print(f"Error importing AWS services: {e}")
+                sys.exit(1)
+            print(f"Imported {added + updated} services ({added} added, {updated} updated, {skipped} skipped)", file=sys.stderr)
+            sys.exit(0)
+
+        if args.export_path:
+            with open_stream(args.export_path, 'w') as file:
+                count = AwsHangman(args.catalog).export_services(file, detect_format(args.export_path, args.format))
+            print(f"Exported {count} services", file=sys.stderr)
+            sys.exit(0)
+
+        if args.publish_catalog:
+            publish_catalog(args.catalog, args.publish_catalog, watch=not args.no_watch)
+            sys.exit(0)
+
+        setup_instrumentation(AwsHangman, args.profile, args.profile_output)
+        if args.serve and args.workers > 1:
+            serve_workers(AwsHangman, args.catalog, args.workers, args.host, args.port, watch=not args.no_watch)
+        elif args.serve:
+            game = AwsHangman(args.catalog, shared_catalog=args.shared_catalog)
+            # Shared-memory workers pick up new versions from the publisher instead of watching the file
+            if not args.no_watch and not args.shared_catalog:
+                game.start_watching()
+            serve_api(game, args.host, args.port)
+        else:
+            main(args.catalog, watch=not args.no_watch, player=args.player, key_input=not args.line_input)
+    except CatalogError as e:
+        print(f"Error loading AWS services: {e}")
+        sys.exit(1)
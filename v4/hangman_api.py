@@ -0,0 +1,547 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import random
+import socket
+import struct
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from catalog_model import DIFFICULTY_MULTIPLIERS
+from certification_notes import render_notes
+from catalog_store import file_lock
+from leaderboard import JOURNAL_ROTATE_BYTES, MAX_PLAYER_LENGTH, journal_header, valid_player
+
+# Every node behind the load balancer must share this secret
+SECRET_ENV_VAR = "AWS_HANGMAN_API_SECRET"
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+
+# Token payload: version, round id, service index, service name check, guessed-letter bitset, tries left,
+# guesses made so far, when the round started (Unix seconds) and the player check (0 for none)
+TOKEN_VERSION = 4
+TOKEN_PAYLOAD = struct.Struct(">BQIHQBHIQ")
+TOKEN_MAC_SIZE = 16
+MAX_STEP = 0xFFFF
+
+# Seconds a round stays playable; also how long used tokens are remembered
+ROUND_TTL = 3600
+
+# Letters a guess can reveal, one bit each in the token
+ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+LETTER_BITS = {letter: 1 << index for index, letter in enumerate(ALPHABET)}
+
+MAX_TRIES = 6
+
+# Largest request body accepted
+MAX_BODY_BYTES = 64 * 1024
+
+# Seconds an idle keep-alive connection is kept open
+KEEPALIVE_TIMEOUT = 30
+
+# Most leaderboard rows returned by one request
+MAX_LEADERBOARD_ROWS = 100
+
+
+class ApiError(Exception):
+    """Error returned to the client with an HTTP status"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def load_secret():
+    """Token signing key from the environment, or a random per-process key"""
+    secret = os.environ.get(SECRET_ENV_VAR)
+    if secret:
+        return secret.encode('utf-8')
+    print(f"Warning: {SECRET_ENV_VAR} is not set; tokens will only be valid on this process", file=sys.stderr)
+    return os.urandom(32)
+
+
+def name_check(name):
+    """16-bit hash of a service name, to notice tokens issued against a different catalog"""
+    return int.from_bytes(hashlib.blake2b(name.encode('utf-8'), digest_size=2).digest(), 'big')
+
+
+def player_check(player):
+    """64-bit hash of the player a round was started for, 0 for anonymous rounds"""
+    if player is None:
+        return 0
+    return int.from_bytes(hashlib.blake2b(player.encode('utf-8'), digest_size=8).digest(), 'big') or 1
+
+
+def letters_mask(text):
+    """Bitset of the guessable letters in text"""
+    mask = 0
+    for letter in text:
+        mask |= LETTER_BITS.get(letter, 0)
+    return mask
+
+
+def masked_word(service, letters):
+    """The service name with unguessed letters shown as underscores"""
+    return "".join(letter if letter not in LETTER_BITS or LETTER_BITS[letter] & letters else "_" for letter in service)
+
+
+class TokenCodec:
+    """Packs round state into a URL-safe HMAC-signed token and back"""
+
+    def __init__(self, secret):
+        self.secret = secret
+
+    def sign(self, payload):
+        return hmac.new(self.secret, payload, hashlib.sha256).digest()[:TOKEN_MAC_SIZE]
+
+    def encode(self, round_id, index, check, letters, tries, step, started, player):
+        payload = TOKEN_PAYLOAD.pack(TOKEN_VERSION, round_id, index, check, letters, tries, step, started, player)
+        return base64.urlsafe_b64encode(payload + self.sign(payload)).rstrip(b"=").decode('ascii')
+
+    def decode(self, token):
+        """(round id, service index, name check, letters, tries, step, started, player check), raising ApiError if the token is not ours"""
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        except (ValueError, TypeError):
+            raise ApiError(400, "malformed token") from None
+        payload, mac = raw[:TOKEN_PAYLOAD.size], raw[TOKEN_PAYLOAD.size:]
+        if len(raw) != TOKEN_PAYLOAD.size + TOKEN_MAC_SIZE or not hmac.compare_digest(mac, self.sign(payload)):
+            raise ApiError(403, "invalid token signature")
+        version, round_id, index, check, letters, tries, step, started, player = TOKEN_PAYLOAD.unpack(payload)
+        if version != TOKEN_VERSION:
+            raise ApiError(400, "unsupported token version")
+        return round_id, index, check, letters, tries, step, started, player
+
+
+def used_tokens_path(catalog_path):
+    """Journal of used tokens kept next to a catalog file (or shard directory)"""
+    if os.path.isdir(catalog_path):
+        return os.path.join(catalog_path, '.used_tokens.log')
+    return os.path.splitext(catalog_path)[0] + '.used_tokens.log'
+
+
+class UsedTokens:
+    """The last guess step accepted for each round, so a token can only be used once
+
+    Every guess returns a token with the next step number; a token whose
+    step is not past the last one accepted for its round has been used
+    already. Rounds are forgotten ROUND_TTL seconds after they start, when
+    their tokens expire anyway.
+
+    With a journal path, every accepted step is appended to that file under
+    its lock after catching up with the steps other processes appended, so
+    all workers and nodes sharing the file accept each token once between
+    them. Once the journal passes JOURNAL_ROTATE_BYTES it is rewritten with
+    only the rounds that have not expired, under a new journal id so the
+    other processes know to read it again from the start.
+    """
+
+    def __init__(self, path=None, ttl=ROUND_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.steps = OrderedDict()
+        self.journal_id = None
+        self.offset = 0
+        self.lock = threading.Lock()
+
+    def expire(self, now):
+        # Rounds are added roughly in start order, so the expired ones are at the front
+        while self.steps:
+            _, oldest_start = next(iter(self.steps.values()))
+            if oldest_start + self.ttl >= now:
+                break
+            self.steps.popitem(last=False)
+
+    def accept(self, round_id, step, started):
+        """Note an accepted step; False if it (or a later one) was accepted before"""
+        used = self.steps.get(round_id)
+        if used is not None and step <= used[0]:
+            return False
+        self.steps[round_id] = (step, started)
+        return True
+
+    def catch_up(self):
+        """Apply steps appended to the journal since last read; call with both locks held"""
+        try:
+            with open(self.path, 'rb') as file:
+                header = file.readline()
+                try:
+                    journal_id = json.loads(header)["journal"]
+                except (ValueError, KeyError, TypeError):
+                    journal_id = None
+                if journal_id is None or journal_id != self.journal_id:
+                    # New or rotated journal: it holds every live round, so start over from it
+                    self.steps.clear()
+                    self.journal_id, self.offset = journal_id, len(header)
+                file.seek(self.offset)
+                data = file.read()
+        except FileNotFoundError:
+            data = b""
+        if self.journal_id is None:
+            self.rotate()
+            return
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            self.accept(*json.loads(line))
+        self.offset += end
+        if end < len(data):
+            # Writers hold the lock, so a partial last line is left by one that died mid-append
+            self.rotate()
+
+    def rotate(self):
+        """Replace the journal with one holding only live rounds; call with both locks held"""
+        journal_id = os.urandom(8).hex()
+        lines = [journal_header(journal_id)]
+        lines.extend((json.dumps([round_id, step, started]) + "\n").encode('utf-8')
+                     for round_id, (step, started) in self.steps.items())
+        data = b"".join(lines)
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'wb') as file:
+            file.write(data)
+        os.replace(temp_path, self.path)
+        self.journal_id, self.offset = journal_id, len(data)
+
+    def claim(self, round_id, step, started, now=None):
+        """Mark a round's token as used; False if it (or a later one) was used before"""
+        now = time.time() if now is None else now
+        with self.lock:
+            self.expire(now)
+            if self.path is None:
+                return self.accept(round_id, step, started)
+            with file_lock(self.path):
+                self.catch_up()
+                if not self.accept(round_id, step, started):
+                    return False
+                line = (json.dumps([round_id, step, started]) + "\n").encode('utf-8')
+                with open(self.path, 'ab') as file:
+                    file.write(line)
+                self.offset += len(line)
+                if self.offset >= JOURNAL_ROTATE_BYTES:
+                    self.expire(now)
+                    self.rotate()
+                return True
+
+
+def apply_guess(service, letters, tries, guess):
+    """Apply a guess to round state; returns (letters, tries, result) like AwsHangman.make_guess
+
+    Wrong word guesses are not remembered, so repeating one costs another try.
+    """
+    result = {"valid": True, "message": "", "game_over": False, "won": False}
+
+    if len(guess) == 1 and guess.isalnum():
+        bit = LETTER_BITS.get(guess, 0)
+        if letters & bit:
+            result["valid"] = False
+            result["message"] = f"You already guessed the letter {guess}"
+        elif guess not in service:
+            result["message"] = f"{guess} is not in the word."
+            letters |= bit
+            tries -= 1
+        else:
+            result["message"] = f"Good job, {guess} is in the word!"
+            letters |= bit
+            if "_" not in masked_word(service, letters):
+                result["game_over"] = result["won"] = True
+
+    elif len(guess) == len(service) and guess.isalnum():
+        if guess != service:
+            result["message"] = f"{guess} is not the word."
+            tries -= 1
+        else:
+            letters |= letters_mask(service)
+            result["game_over"] = result["won"] = True
+
+    else:
+        result["valid"] = False
+        result["message"] = "Not a valid guess."
+
+    if tries <= 0:
+        result["game_over"] = True
+        result["won"] = False
+    return letters, tries, result
+
+
+class HangmanApi:
+    """Stateless game rounds over an AwsHangman catalog
+
+    All round state travels in the token, so any process serving the same
+    catalog with the same secret can handle any request. Services are
+    referred to by their index in the sorted service names, checked against
+    a hash of the name so a changed catalog is detected instead of silently
+    switching services. Each token is accepted once: used tokens are
+    journaled next to the catalog, so every process serving it turns a
+    replayed token away. A finished round is added to the leaderboard of
+    the player it was started for; the leaderboard journal, shared by every
+    process, ignores a round id it has already recorded.
+    """
+
+    def __init__(self, game, secret=None):
+        self.game = game
+        self.codec = TokenCodec(secret or load_secret())
+        self.lock = threading.Lock()
+        self.catalog = None
+        self.names = []
+        self.used_tokens = UsedTokens(used_tokens_path(game.store.path))
+
+    def snapshot(self):
+        """Current catalog and its sorted service names, picking up hot reloads"""
+        with self.lock:
+            self.game.apply_pending_catalog()
+            if self.game.aws_services is not self.catalog:
+                self.catalog = self.game.aws_services
+                # A shared-memory catalog is already sorted and decodes names on demand
+                self.names = self.catalog.sorted_names() if hasattr(self.catalog, 'sorted_names') else sorted(self.catalog)
+            return self.catalog, self.names
+
+    def round_view(self, catalog, service, letters, tries, token):
+        info = catalog[service]
+        return {
+            "token": token,
+            "category": info["category"],
+            "difficulty": info["difficulty"],
+            "hint": info["description"],
+            "word": masked_word(service, letters),
+            "tries": tries,
+        }
+
+    def start_round(self, category=None, difficulty=None, player=None):
+        player = self.check_player(player)
+        catalog, names = self.snapshot()
+        candidates = catalog.select(category, difficulty)
+        if not candidates:
+            raise ApiError(404, "no services match your criteria")
+        service = random.choice(candidates)
+        # Lets the leaderboard count each round once, whichever node reports it
+        round_id = random.getrandbits(64)
+        token = self.codec.encode(round_id, bisect_left(names, service), name_check(service), 0, MAX_TRIES, 0, int(time.time()),
+                                  player_check(player))
+        return self.round_view(catalog, service, 0, MAX_TRIES, token)
+
+    def check_player(self, player):
+        """Stripped player name, or None; ApiError if it is not a valid name"""
+        if player is None:
+            return None
+        if not valid_player(player):
+            raise ApiError(400, f"player must be 1 to {MAX_PLAYER_LENGTH} characters")
+        return player.strip()
+
+    def guess(self, token, guess, player=None):
+        player = self.check_player(player)
+        round_id, index, check, letters, tries, step, started, owner = self.codec.decode(token)
+        if player is not None and player_check(player) != owner:
+            raise ApiError(403, "this round was not started for that player")
+        now = time.time()
+        if now > started + ROUND_TTL:
+            raise ApiError(409, "this round has expired; start a new round")
+        catalog, names = self.snapshot()
+        if index >= len(names) or name_check(names[index]) != check:
+            raise ApiError(409, "the services catalog changed; start a new round")
+        service = names[index]
+        if tries <= 0 or "_" not in masked_word(service, letters) or step >= MAX_STEP:
+            raise ApiError(409, "this round is already over")
+        if not self.used_tokens.claim(round_id, step, started, now):
+            raise ApiError(409, "this token has already been used; continue with the latest one")
+
+        letters, tries, result = apply_guess(service, letters, tries, guess.upper())
+        next_token = self.codec.encode(round_id, index, check, letters, tries, step + 1, started, owner)
+        response = self.round_view(catalog, service, letters, tries, next_token)
+        response.update(result)
+        if result["game_over"]:
+            info = catalog[service]
+            response["service"] = service
+            response["study_tip"] = render_notes(info)
+            response["points"] = 10 * DIFFICULTY_MULTIPLIERS[info.difficulty_id] if result["won"] else 0
+            if player is not None:
+                self.leaderboard().record(player, response["points"], result["won"], round_id)
+        return response
+
+    def leaderboard(self):
+        with self.lock:
+            return self.game.get_leaderboard()
+
+    def standings(self, limit=10, player=None):
+        return self.leaderboard().standings(max(0, min(limit, MAX_LEADERBOARD_ROWS)), player)
+
+    def search(self, query, limit=10):
+        with self.lock:
+            return [{"service": service, "score": round(score, 3)} for service, score in self.game.search_text(query, limit)]
+
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    """JSON routes: POST /rounds, POST /guesses, GET /search?q=, GET /leaderboard, GET /health"""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; don't let Nagle hold the body back
+    disable_nagle_algorithm = True
+    timeout = KEEPALIVE_TIMEOUT
+
+    def parse_request(self):
+        # A request line has arrived, so the connection is no longer idle
+        self.server.busy.add(self.connection)
+        return super().parse_request()
+
+    def handle_one_request(self):
+        try:
+            super().handle_one_request()
+        finally:
+            self.server.busy.discard(self.connection)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/health":
+            self.respond(lambda: {"status": "ok", "services": len(self.server.api.snapshot()[1]), "pid": os.getpid()})
+        elif url.path == "/search":
+            query = parse_qs(url.query)
+            self.respond(lambda: self.server.api.search(query.get("q", [""])[0], int(query.get("limit", ["10"])[0])))
+        elif url.path == "/leaderboard":
+            query = parse_qs(url.query)
+            self.respond(lambda: self.server.api.standings(int(query.get("limit", ["10"])[0]), query.get("player", [None])[0]))
+        else:
+            self.send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        if path == "/rounds":
+            self.respond(lambda: self.server.api.start_round(**self.read_fields("category", "difficulty", "player")))
+        elif path == "/guesses":
+            self.respond(lambda: self.server.api.guess(**self.read_fields("token", "guess", "player", required=("token", "guess"))))
+        else:
+            self.send_json(404, {"error": "not found"})
+
+    def read_fields(self, *names, required=()):
+        """Named string fields from the JSON request body; those in required must be present"""
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0 or length > MAX_BODY_BYTES:
+            # The body is left unread, so it must not be taken for the next request on this connection
+            self.close_connection = True
+            if length < 0:
+                raise ApiError(400, "invalid Content-Length")
+            raise ApiError(413, "request body too large")
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            raise ApiError(400, "request body must be JSON") from None
+        if not isinstance(body, dict):
+            raise ApiError(400, "request body must be a JSON object")
+        fields = {}
+        for name in names:
+            value = body.get(name)
+            if value is None and name in required:
+                raise ApiError(400, f"missing field {name!r}")
+            if value is not None and not isinstance(value, str):
+                raise ApiError(400, f"field {name!r} must be a string")
+            fields[name] = value
+        return fields
+
+    def respond(self, handler):
+        try:
+            self.send_json(200, handler())
+        except ApiError as e:
+            self.send_json(e.status, {"error": str(e)})
+        except ValueError as e:
+            self.send_json(400, {"error": str(e)})
+        except Exception as e:
+            print(f"Error handling {self.command} {self.path}: {e!r}", file=sys.stderr)
+            self.send_json(500, {"error": "internal server error"})
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        if self.server.stopping or self.close_connection:
+            # Send keep-alive clients elsewhere while this server drains
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class ApiServer(ThreadingHTTPServer):
+    """Threaded HTTP server that can stop gracefully
+
+    stop() stops accepting connections; drain() then closes idle keep-alive
+    connections and waits for requests in progress to finish.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, handler, sock=None):
+        super().__init__(address, handler, bind_and_activate=sock is None)
+        if sock is not None:
+            # Listen on a socket bound elsewhere (inherited from a supervisor or SO_REUSEPORT)
+            self.socket.close()
+            self.socket = sock
+            self.server_address = sock.getsockname()
+        self.connections = set()
+        self.busy = set()
+        self.stopping = False
+
+    def get_request(self):
+        connection, address = super().get_request()
+        # A listening socket shared between processes may be non-blocking
+        connection.setblocking(True)
+        return connection, address
+
+    def process_request(self, request, client_address):
+        self.connections.add(request)
+        super().process_request(request, client_address)
+
+    def shutdown_request(self, request):
+        self.connections.discard(request)
+        super().shutdown_request(request)
+
+    def stop(self):
+        """Stop serve_forever() from any thread, including a signal handler"""
+        self.stopping = True
+        threading.Thread(target=self.shutdown, daemon=True).start()
+
+    def drain(self, timeout):
+        """After serve_forever() returns: close idle connections and wait up to timeout for the rest"""
+        self.server_close()
+        deadline = time.monotonic() + timeout
+        while self.connections and time.monotonic() < deadline:
+            for connection in list(self.connections - self.busy):
+                try:
+                    connection.shutdown(socket.SHUT_RD)
+                except OSError:
+                    pass
+            time.sleep(0.05)
+        return not self.connections
+
+
+def make_server(game, host=DEFAULT_HOST, port=DEFAULT_PORT, secret=None, verbose=False, sock=None):
+    """HTTP server exposing the game's catalog through HangmanApi"""
+    server = ApiServer((host, port), ApiRequestHandler, sock)
+    server.api = HangmanApi(game, secret)
+    server.verbose = verbose
+    return server
+
+
+def serve(game, host=DEFAULT_HOST, port=DEFAULT_PORT, secret=None, verbose=False):
+    """Serve the API until interrupted"""
+    server = make_server(game, host, port, secret, verbose)
+    print(f"AWS Hangman API listening on http://{host}:{server.server_address[1]}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        game.close()
@@ -0,0 +1,205 @@
+import atexit
+import functools
+import os
+import sys
+import time
+from collections import Counter
+
+# Environment variables that enable profiling without editing code
+PROFILE_ENV_VAR = "AWS_HANGMAN_PROFILE"
+PROFILE_OUTPUT_ENV_VAR = "AWS_HANGMAN_PROFILE_OUTPUT"
+
+# Supported modes: hot-path timers only, timers plus cProfile, timers plus a sampling profiler
+PROFILE_MODES = ("timing", "cprofile", "sample")
+
+# AwsHangman methods timed when instrumentation is on
+HOT_PATHS = (
+    "load_services",
+    "save_services",
+    "select_service",
+    "make_guess",
+    "display_game_state",
+    "display_hangman",
+    "update_score",
+)
+
+# Interval between stack samples for the sampling profiler
+SAMPLE_INTERVAL_SECONDS = 0.005
+
+
+class Histogram:
+    """Latency histogram with power-of-two microsecond buckets (constant memory)"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = Counter()
+
+    def record(self, seconds):
+        """Add one observation"""
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.buckets[max(0, int(seconds * 1e6)).bit_length()] += 1
+
+    def percentile(self, pct):
+        """Upper bound (seconds) of the bucket holding the given percentile"""
+        if not self.count:
+            return 0.0
+        rank = pct / 100.0 * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min((1 << bucket) / 1e6, self.max)
+        return self.max
+
+
+class StackSampler:
+    """Minimal SIGPROF-based sampling profiler (Unix only)"""
+
+    def __init__(self, interval=SAMPLE_INTERVAL_SECONDS):
+        self.interval = interval
+        self.samples = Counter()
+        self.total = 0
+
+    def start(self):
+        """Start sampling the main thread's stack on a CPU-time timer"""
+        import signal
+        signal.signal(signal.SIGPROF, self.sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self):
+        """Stop the sampling timer"""
+        import signal
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+
+    def sample(self, signum, frame):
+        """Record the innermost frame of the interrupted stack"""
+        self.total += 1
+        if frame is not None:
+            code = frame.f_code
+            self.samples[f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}"] += 1
+
+    def report(self, limit=20):
+        """Most frequently sampled locations"""
+        lines = [f"Sampling profiler: {self.total} samples every {self.interval * 1000:.1f}ms of CPU time"]
+        for location, hits in self.samples.most_common(limit):
+            lines.append(f"  {hits / self.total * 100:5.1f}%  {location}")
+        return "\n".join(lines)
+
+
+class Instrumentation:
+    """Opt-in hot-path timers and profilers for AwsHangman
+
+    Nothing is wrapped unless instrumentation is enabled, so the game runs
+    the original methods with no overhead when it is off.
+    """
+
+    def __init__(self, mode="timing", output=None):
+        self.mode = mode
+        self.output = output
+        self.histograms = {}
+        self.profiler = None
+        self.sampler = None
+        self.started = time.perf_counter()
+
+    def histogram(self, name):
+        """Histogram for a timed path, created on first use"""
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        return histogram
+
+    def timed(self, name, func):
+        """Wrap func so every call is counted and timed under name"""
+        histogram = self.histogram(name)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.record(time.perf_counter() - start)
+        return wrapper
+
+    def instrument_class(self, cls, methods=HOT_PATHS):
+        """Replace the given methods on cls with timed wrappers"""
+        for method in methods:
+            original = getattr(cls, method, None)
+            if original is not None:
+                setattr(cls, method, self.timed(f"{cls.__name__}.{method}", original))
+
+    def start(self):
+        """Start the optional session profiler and register the exit report"""
+        if self.mode == "cprofile":
+            import cProfile
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        elif self.mode == "sample":
+            import signal
+            if hasattr(signal, "setitimer"):
+                self.sampler = StackSampler()
+                self.sampler.start()
+            else:
+                print("Sampling profiler is not available on this platform; using timers only", file=sys.stderr)
+        atexit.register(self.dump)
+
+    def report(self):
+        """Build the text report of hot-path call counts, latencies and profiler output"""
+        lines = [f"===== AWS HANGMAN PROFILE ({self.mode}, {time.perf_counter() - self.started:.1f}s session) ====="]
+        lines.append(f"{'path':<32} {'calls':>8} {'total ms':>10} {'mean us':>10} {'p50 us':>9} {'p90 us':>9} {'p99 us':>9} {'max us':>9}")
+        for name, histogram in sorted(self.histograms.items()):
+            if not histogram.count:
+                continue
+            lines.append(
+                f"{name:<32} {histogram.count:>8} {histogram.total * 1e3:>10.2f} "
+                f"{histogram.total / histogram.count * 1e6:>10.1f} {histogram.percentile(50) * 1e6:>9.0f} "
+                f"{histogram.percentile(90) * 1e6:>9.0f} {histogram.percentile(99) * 1e6:>9.0f} {histogram.max * 1e6:>9.0f}"
+            )
+
+        if self.profiler is not None:
+            import io
+            import pstats
+            stream = io.StringIO()
+            pstats.Stats(self.profiler, stream=stream).sort_stats("cumulative").print_stats(25)
+            lines.append(stream.getvalue())
+        if self.sampler is not None:
+            lines.append(self.sampler.report())
+        return "\n".join(lines)
+
+    def dump(self):
+        """Write the report to the output file, or stderr if none was given"""
+        if self.profiler is not None:
+            self.profiler.disable()
+        if self.sampler is not None:
+            self.sampler.stop()
+
+        report = self.report()
+        if self.output:
+            with open(self.output, 'w') as file:
+                file.write(report + "\n")
+        else:
+            print(report, file=sys.stderr)
+
+
+def setup(cls, mode=None, output=None):
+    """Enable instrumentation for cls from a CLI mode or the environment
+
+    Returns the Instrumentation instance, or None when profiling is off.
+    """
+    mode = mode or os.environ.get(PROFILE_ENV_VAR, "")
+    if mode in ("", "0"):
+        return None
+    if mode == "1":
+        mode = "timing"
+    if mode not in PROFILE_MODES:
+        print(f"Unknown profile mode {mode!r}, expected one of {', '.join(PROFILE_MODES)}", file=sys.stderr)
+        return None
+
+    instrumentation = Instrumentation(mode, output or os.environ.get(PROFILE_OUTPUT_ENV_VAR))
+    instrumentation.instrument_class(cls)
+    instrumentation.start()
+    return instrumentation
@@ -0,0 +1,449 @@
+import getpass
+import json
+import math
+import os
+import random
+import threading
+import time
+from collections import deque
+
+from catalog_store import atomic_write_json, file_lock
+
+# Skip list levels and the chance a node is promoted to the next level;
+# 16 levels at 1/4 comfortably cover billions of players
+MAX_LEVEL = 16
+PROMOTE_CHANCE = 0.25
+
+# Bumped when the snapshot layout changes; older snapshots are ignored
+SNAPSHOT_VERSION = 1
+
+# Seconds between automatic snapshots while results are being recorded
+SNAPSHOT_INTERVAL = 60.0
+
+# The journal is started afresh at the next snapshot once it grows past this
+JOURNAL_ROTATE_BYTES = 1 << 20
+
+# Round ids remembered to ignore a finished round being reported twice
+RECENT_ROUNDS = 100000
+
+# Longest player name accepted
+MAX_PLAYER_LENGTH = 64
+
+
+def leaderboard_paths(catalog_path):
+    """Snapshot and journal files for the leaderboard kept next to a catalog file (or shard directory)"""
+    if os.path.isdir(catalog_path):
+        stem = os.path.join(catalog_path, '.leaderboard')
+    else:
+        stem = os.path.splitext(catalog_path)[0] + '.leaderboard'
+    return stem + '.json', stem + '.log'
+
+
+def default_player():
+    """Login name to record results under when no player name is given"""
+    try:
+        return getpass.getuser()
+    except Exception:
+        return "player"
+
+
+def valid_player(player):
+    """True if player is usable as a leaderboard name"""
+    return isinstance(player, str) and 0 < len(player.strip()) <= MAX_PLAYER_LENGTH
+
+
+def journal_header(journal_id):
+    """First line of a journal, naming it so snapshots can tell which journal they cover"""
+    return (json.dumps({"journal": journal_id}) + "\n").encode('utf-8')
+
+
+class SkipNode:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key, level):
+        self.key = key
+        self.next = [None] * level
+        self.width = [1] * level
+
+
+class RankedSkipList:
+    """Sorted keys in an indexable skip list
+
+    Each link also stores how many positions it skips, so insert, remove,
+    rank(key) and the item at an index all take O(log n) expected time.
+    Keys must be distinct and comparable.
+    """
+
+    def __init__(self):
+        self.tail = SkipNode((math.inf,), 0)
+        self.head = SkipNode(None, MAX_LEVEL)
+        self.head.next = [self.tail] * MAX_LEVEL
+        self.size = 0
+
+    @classmethod
+    def from_sorted(cls, keys):
+        """Skip list over already sorted, distinct keys, built in one O(n) pass"""
+        skiplist = cls()
+        last = [skiplist.head] * MAX_LEVEL
+        last_position = [0] * MAX_LEVEL
+        position = 0
+        for key in keys:
+            position += 1
+            node = SkipNode(key, skiplist.random_level())
+            for level in range(len(node.next)):
+                previous = last[level]
+                previous.next[level] = node
+                previous.width[level] = position - last_position[level]
+                last[level] = node
+                last_position[level] = position
+        for level in range(MAX_LEVEL):
+            last[level].next[level] = skiplist.tail
+            last[level].width[level] = position + 1 - last_position[level]
+        skiplist.size = position
+        return skiplist
+
+    @staticmethod
+    def random_level():
+        level = 1
+        while level < MAX_LEVEL and random.random() < PROMOTE_CHANCE:
+            level += 1
+        return level
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        node = self.head.next[0]
+        while node is not self.tail:
+            yield node.key
+            node = node.next[0]
+
+    def insert(self, key):
+        chain = [None] * MAX_LEVEL
+        steps = [0] * MAX_LEVEL
+        node = self.head
+        for level in range(MAX_LEVEL - 1, -1, -1):
+            while node.next[level].key < key:
+                steps[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+
+        new = SkipNode(key, self.random_level())
+        distance = 0
+        for level in range(len(new.next)):
+            previous = chain[level]
+            new.next[level] = previous.next[level]
+            previous.next[level] = new
+            new.width[level] = previous.width[level] - distance
+            previous.width[level] = distance + 1
+            distance += steps[level]
+        for level in range(len(new.next), MAX_LEVEL):
+            chain[level].width[level] += 1
+        self.size += 1
+
+    def remove(self, key):
+        chain = [None] * MAX_LEVEL
+        node = self.head
+        for level in range(MAX_LEVEL - 1, -1, -1):
+            while node.next[level].key < key:
+                node = node.next[level]
+            chain[level] = node
+        target = node.next[0]
+        if target.key != key:
+            raise KeyError(key)
+        for level in range(len(target.next)):
+            previous = chain[level]
+            previous.width[level] += target.width[level] - 1
+            previous.next[level] = target.next[level]
+        for level in range(len(target.next), MAX_LEVEL):
+            chain[level].width[level] -= 1
+        self.size -= 1
+
+    def rank(self, key):
+        """0-based position key would have (the number of smaller keys)"""
+        position = 0
+        node = self.head
+        for level in range(MAX_LEVEL - 1, -1, -1):
+            while node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+        return position
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError(index)
+        remaining = index + 1
+        node = self.head
+        for level in range(MAX_LEVEL - 1, -1, -1):
+            while node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        return node.key
+
+    def first(self, count):
+        """The count smallest keys"""
+        keys = []
+        node = self.head.next[0]
+        while node is not self.tail and len(keys) < count:
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+
+class Leaderboard:
+    """Players ranked by score, best first
+
+    Players are kept in a RankedSkipList keyed by (-score, seq, player),
+    where seq orders players with equal scores by who got there first.
+    Recording a result, top(k) and rank(player) are O(log n) (top(k) is
+    O(log n + k)); nothing is ever sorted as a whole.
+    """
+
+    def __init__(self):
+        self.players = {}
+        self.ranking = RankedSkipList()
+        self.seq = 0
+        self.recent_rounds = deque()
+        self.recent_round_ids = set()
+
+    @classmethod
+    def from_snapshot(cls, data):
+        """Leaderboard from snapshot data (players already in rank order)"""
+        board = cls()
+        rows = data["players"]
+        board.players = {player: [score, seq, wins, games] for player, score, seq, wins, games in rows}
+        board.ranking = RankedSkipList.from_sorted((-score, seq, player) for player, score, seq, wins, games in rows)
+        board.seq = data["seq"]
+        board.recent_rounds = deque(data.get("recent_rounds", ()))
+        board.recent_round_ids = set(board.recent_rounds)
+        return board
+
+    def to_snapshot(self):
+        return {
+            "seq": self.seq,
+            "players": [[player, -score, seq] + self.players[player][2:] for score, seq, player in self.ranking],
+            "recent_rounds": list(self.recent_rounds),
+        }
+
+    def __len__(self):
+        return len(self.players)
+
+    def record(self, player, points, won, round_id=None):
+        """Add one finished round to player's totals; returns False for a round already recorded"""
+        if round_id is not None:
+            if round_id in self.recent_round_ids:
+                return False
+            self.recent_rounds.append(round_id)
+            self.recent_round_ids.add(round_id)
+            if len(self.recent_rounds) > RECENT_ROUNDS:
+                self.recent_round_ids.discard(self.recent_rounds.popleft())
+
+        self.seq += 1
+        entry = self.players.get(player)
+        if entry is None:
+            entry = self.players[player] = [0, self.seq, 0, 0]
+            self.ranking.insert((0, entry[1], player))
+        if points:
+            self.ranking.remove((-entry[0], entry[1], player))
+            entry[0] += points
+            entry[1] = self.seq
+            self.ranking.insert((-entry[0], entry[1], player))
+        entry[2] += 1 if won else 0
+        entry[3] += 1
+        return True
+
+    def row(self, player, rank):
+        score, _, wins, games = self.players[player]
+        return {"rank": rank, "player": player, "score": score, "wins": wins, "games": games}
+
+    def top(self, count=10):
+        """Rows for the best count players"""
+        return [self.row(player, rank) for rank, (_, _, player) in enumerate(self.ranking.first(count), 1)]
+
+    def rank(self, player):
+        """1-based rank of player, or None if they have not played"""
+        entry = self.players.get(player)
+        if entry is None:
+            return None
+        return self.ranking.rank((-entry[0], entry[1], player)) + 1
+
+    def entry(self, player):
+        """Row for player, or None if they have not played"""
+        rank = self.rank(player)
+        return None if rank is None else self.row(player, rank)
+
+
+class LeaderboardStore:
+    """Leaderboard persisted as periodic snapshots plus an append-only journal
+
+    Every result is appended to the journal under the file lock and then
+    applied, so processes sharing the files (API workers, several games)
+    replay the same events in the same order and agree on the ranking;
+    readers call refresh() to pick up results recorded elsewhere. At most
+    every SNAPSHOT_INTERVAL seconds the whole board is written to the
+    snapshot with the journal position it covers, so a restart loads the
+    snapshot and replays only the journal's tail. Once the journal is large
+    it is started afresh right after a snapshot.
+    """
+
+    def __init__(self, snapshot_path, journal_path, snapshot_interval=SNAPSHOT_INTERVAL):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.snapshot_interval = snapshot_interval
+        self.board = Leaderboard()
+        self.journal_id = None
+        self.offset = 0
+        self.last_snapshot = time.monotonic()
+        self.unsaved = 0
+        self.lock = threading.Lock()
+
+    @classmethod
+    def open(cls, catalog_path, snapshot_interval=SNAPSHOT_INTERVAL):
+        store = cls(*leaderboard_paths(catalog_path), snapshot_interval)
+        store.load()
+        return store
+
+    def read_snapshot(self):
+        try:
+            with open(self.snapshot_path, 'r') as file:
+                data = json.load(file)
+            if data.get("version") == SNAPSHOT_VERSION:
+                return data
+        except (FileNotFoundError, ValueError):
+            pass
+        return None
+
+    def read_journal_header(self):
+        """(journal id, header length), or (None, 0) if there is no journal yet"""
+        try:
+            with open(self.journal_path, 'rb') as file:
+                line = file.readline()
+        except FileNotFoundError:
+            return None, 0
+        try:
+            return json.loads(line)["journal"], len(line)
+        except (ValueError, KeyError, TypeError):
+            return None, 0
+
+    def start_journal(self, journal_id=None):
+        """Replace the journal with an empty one; call with the file lock held"""
+        journal_id = journal_id or os.urandom(8).hex()
+        header = journal_header(journal_id)
+        temp_path = self.journal_path + '.tmp'
+        with open(temp_path, 'wb') as file:
+            file.write(header)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.journal_path)
+        return journal_id, len(header)
+
+    def load(self):
+        """Load the snapshot and replay the journal written since"""
+        with self.lock, file_lock(self.journal_path):
+            self.reload()
+        return self
+
+    def sync(self):
+        """Catch up with the journal, reloading if it was rotated; call with both locks held"""
+        if not self.catch_up():
+            self.reload()
+
+    def reload(self):
+        """Rebuild the board from disk; call with both locks held"""
+        snapshot = self.read_snapshot()
+        self.board = Leaderboard.from_snapshot(snapshot) if snapshot else Leaderboard()
+        journal_id, header_length = self.read_journal_header()
+        if snapshot and snapshot["journal"] == journal_id:
+            self.journal_id, self.offset = journal_id, snapshot["offset"]
+        elif snapshot:
+            # A crash during rotation: the snapshot already covers the old journal
+            self.journal_id, self.offset = self.start_journal(snapshot["journal"])
+        elif journal_id is not None:
+            self.journal_id, self.offset = journal_id, header_length
+        else:
+            self.journal_id, self.offset = self.start_journal()
+        self.catch_up()
+
+    def catch_up(self):
+        """Apply results appended to the journal since last read; call with self.lock held
+
+        Returns False if another process started a new journal, in which
+        case the board must be reloaded from the snapshot it wrote.
+        """
+        try:
+            with open(self.journal_path, 'rb') as file:
+                header = file.readline()
+                file.seek(max(self.offset, len(header)))
+                data = file.read()
+        except FileNotFoundError:
+            return False
+        try:
+            journal_id = json.loads(header)["journal"]
+        except (ValueError, KeyError, TypeError):
+            return False
+        if journal_id != self.journal_id:
+            return False
+        # Only whole lines; a writer may be mid-append
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            player, points, won, round_id = json.loads(line)
+            self.board.record(player, points, won, round_id)
+            self.unsaved += 1
+        self.offset += end
+        return True
+
+    def follow(self):
+        """catch_up(), taking the file lock to reload if the journal was rotated; call with self.lock held"""
+        if not self.catch_up():
+            with file_lock(self.journal_path):
+                self.sync()
+
+    def refresh(self):
+        """Pick up results recorded by other processes"""
+        with self.lock:
+            self.follow()
+        return self.board
+
+    def record(self, player, points, won, round_id=None):
+        """Journal one finished round and apply it; snapshots when one is due"""
+        line = (json.dumps([player, points, bool(won), round_id]) + "\n").encode('utf-8')
+        with self.lock, file_lock(self.journal_path):
+            self.sync()
+            with open(self.journal_path, 'ab') as file:
+                file.write(line)
+            self.catch_up()
+            if time.monotonic() - self.last_snapshot >= self.snapshot_interval:
+                self.write_snapshot()
+        return self.board
+
+    def standings(self, count=10, player=None):
+        """{"players", "top", "player"}: the best count rows and player's own row, up to date"""
+        with self.lock:
+            self.follow()
+            return {
+                "players": len(self.board),
+                "top": self.board.top(count),
+                "player": None if player is None else self.board.entry(player),
+            }
+
+    def write_snapshot(self):
+        """Write the board and the journal position it covers; call with both locks held"""
+        rotate = self.offset >= JOURNAL_ROTATE_BYTES
+        journal_id = os.urandom(8).hex() if rotate else self.journal_id
+        data = self.board.to_snapshot()
+        data.update({"version": SNAPSHOT_VERSION, "journal": journal_id})
+        data["offset"] = len(journal_header(journal_id)) if rotate else self.offset
+        atomic_write_json(self.snapshot_path, data, indent=None)
+        if rotate:
+            self.journal_id, self.offset = self.start_journal(journal_id)
+        self.last_snapshot = time.monotonic()
+        self.unsaved = 0
+
+    def snapshot(self):
+        """Write a snapshot now if anything was recorded since the last one"""
+        with self.lock, file_lock(self.journal_path):
+            self.sync()
+            if self.unsaved:
+                self.write_snapshot()
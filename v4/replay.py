@@ -0,0 +1,129 @@
+import json
+import random
+import threading
+import time
+import zipfile
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+# Response headers worth keeping in an archive
+RECORDED_HEADERS = ("Content-Type", "Location", "Last-Modified", "ETag")
+
+# Name of the URL -> response index inside an archive
+ARCHIVE_INDEX = "index.json"
+
+
+def write_archive(path, responses):
+    """Write {url: (status, headers, body bytes)} to a zip archive; returns the count"""
+    index = {}
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for number, (url, (status, headers, body)) in enumerate(sorted(responses.items())):
+            member = f"responses/{number:06d}"
+            archive.writestr(member, body)
+            index[url] = {"status": status, "headers": headers, "member": member}
+        archive.writestr(ARCHIVE_INDEX, json.dumps(index, indent=1))
+    return len(index)
+
+
+class RecordingAdapter(HTTPAdapter):
+    """Transport adapter that sends requests normally and keeps every response"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.responses = {}
+        self.lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        headers = {name: response.headers[name] for name in RECORDED_HEADERS if name in response.headers}
+        with self.lock:
+            self.responses[request.url] = (response.status_code, headers, response.content)
+        return response
+
+    def save(self, path):
+        """Write the recorded responses to a compressed archive"""
+        with self.lock:
+            return write_archive(path, self.responses)
+
+
+class ReplayAdapter(BaseAdapter):
+    """Transport adapter that answers requests from a recorded archive
+
+    URLs missing from the archive get a 404. Optional fixed latency, jitter
+    and a random error rate (connection errors or 503s) make it possible to
+    benchmark the updater's behaviour on a slow or flaky network without
+    touching the real AWS sites.
+    """
+
+    def __init__(self, path, latency=0.0, jitter=0.0, error_rate=0.0, seed=None):
+        super().__init__()
+        self.archive = zipfile.ZipFile(path, 'r')
+        self.index = json.loads(self.archive.read(ARCHIVE_INDEX))
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.served = 0
+        self.missing = 0
+
+    def send(self, request, **kwargs):
+        with self.lock:
+            delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+            failure = self.error_rate and self.random.random() < self.error_rate
+            fail_with_status = self.random.random() < 0.5
+            entry = self.index.get(request.url)
+            body = self.archive.read(entry["member"]) if entry else b""
+            self.served += 1
+            if entry is None:
+                self.missing += 1
+
+        if delay:
+            time.sleep(delay)
+
+        if failure and not fail_with_status:
+            raise requests.ConnectionError(f"Injected connection error for {request.url}", request=request)
+
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        response.reason = "Replayed"
+        if failure:
+            response.status_code = 503
+            response._content = b""
+        elif entry is None:
+            response.status_code = 404
+            response._content = b""
+        else:
+            response.status_code = entry["status"]
+            response.headers = CaseInsensitiveDict(entry["headers"])
+            response._content = body
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers) or 'utf-8'
+        # The body is already in memory, so streamed reads (stream=True) iterate over it
+        response._content_consumed = True
+        return response
+
+    def close(self):
+        self.archive.close()
+
+
+def recording_session():
+    """Session that records every response; call session.recorder.save(path) at the end"""
+    session = requests.Session()
+    adapter = RecordingAdapter()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.recorder = adapter
+    return session
+
+
+def replay_session(path, latency=0.0, jitter=0.0, error_rate=0.0, seed=None):
+    """Session that serves every request from a recorded archive"""
+    session = requests.Session()
+    adapter = ReplayAdapter(path, latency, jitter, error_rate, seed)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.replayer = adapter
+    return session
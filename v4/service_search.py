@@ -0,0 +1,401 @@
+import heapq
+import re
+from bisect import insort
+from collections import deque
+
+# Words in descriptions are split on anything that is not a letter or digit
+WORD_PATTERN = re.compile(r'[a-z0-9]+')
+
+# Key holding the service names stored at a trie node
+TERMINAL = "$"
+
+# Length of the grams used for typo-tolerant lookups
+GRAM_SIZE = 3
+
+# Grams or words shared by more entries than this are too common to narrow a search
+MAX_GRAM_POSTINGS = 5000
+
+# Tokens credited to more services than this are ranked from their best-ranked names instead of scored one by one
+MAX_WORD_POSTINGS = 2000
+
+# Best-ranked names kept for each token that has been ranked that way
+TOP_POSTINGS = 200
+
+# Candidates checked with edit distance per query term
+FUZZY_CANDIDATES = 64
+
+# Prefix matches collected per query term before ranking
+PREFIX_CANDIDATES = 200
+
+# Score for each way a query term can match a service
+NAME_EXACT = 100
+NAME_PREFIX = 50
+NAME_SUBSTRING = 25
+NAME_FUZZY = 30
+WORD_EXACT = 10
+WORD_PREFIX = 6
+WORD_FUZZY = 4
+
+
+def normalize_name(name):
+    """Upper-case letters and digits only, as service keys are written"""
+    return re.sub(r'[^A-Z0-9]', '', name.upper())
+
+
+def rank_key(name):
+    """Order of services with equal scores: shorter names first, then alphabetical"""
+    return len(name), name
+
+
+def description_words(text):
+    """Distinct lower-case words of a description"""
+    return set(WORD_PATTERN.findall(text.lower()))
+
+
+def grams(token):
+    """Overlapping GRAM_SIZE-letter grams of a token, padded so short tokens have some"""
+    padded = f" {token} "
+    return {padded[i:i + GRAM_SIZE] for i in range(len(padded) - GRAM_SIZE + 1)}
+
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance between a and b, or limit + 1 once it is certain to exceed limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def typo_limit(token):
+    """Edits tolerated for a query term of this length"""
+    if len(token) <= 3:
+        return 0
+    return 1 if len(token) <= 6 else 2
+
+
+class PrefixTrie:
+    """Character trie over a set of tokens"""
+
+    def __init__(self):
+        self.root = {}
+
+    def add(self, token):
+        node = self.root
+        for char in token:
+            node = node.setdefault(char, {})
+        node[TERMINAL] = True
+
+    def remove(self, token):
+        """Remove token, pruning nodes left empty"""
+        path = [self.root]
+        for char in token:
+            node = path[-1].get(char)
+            if node is None:
+                return
+            path.append(node)
+        path[-1].pop(TERMINAL, None)
+        for depth in range(len(token), 0, -1):
+            if path[depth]:
+                break
+            del path[depth - 1][token[depth - 1]]
+
+    def completions(self, prefix):
+        """Tokens starting with prefix, shortest first"""
+        node = self.root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return
+        queue = deque([(prefix, node)])
+        while queue:
+            token, node = queue.popleft()
+            for char, child in node.items():
+                if char == TERMINAL:
+                    yield token
+                else:
+                    queue.append((token + char, child))
+
+
+class GramIndex:
+    """Maps letter grams to the tokens containing them, for typo-tolerant lookups"""
+
+    def __init__(self):
+        self.postings = {}
+
+    def add(self, token):
+        for gram in grams(token):
+            self.postings.setdefault(gram, set()).add(token)
+
+    def remove(self, token):
+        for gram in grams(token):
+            tokens = self.postings.get(gram)
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del self.postings[gram]
+
+    def similar(self, token, limit):
+        """Tokens within typo_limit edits of token, as (token, distance) pairs"""
+        max_edits = typo_limit(token)
+        if not max_edits:
+            return []
+        counts = {}
+        for gram in grams(token):
+            tokens = self.postings.get(gram, ())
+            if len(tokens) > MAX_GRAM_POSTINGS:
+                continue
+            for candidate in tokens:
+                counts[candidate] = counts.get(candidate, 0) + 1
+
+        # Each edit destroys at most GRAM_SIZE grams, so fewer shared grams rules a candidate out
+        needed = len(grams(token)) - GRAM_SIZE * max_edits
+        candidates = sorted((c for c in counts.items() if c[1] >= needed), key=lambda item: -item[1])[:limit]
+        matches = []
+        for candidate, _ in candidates:
+            distance = edit_distance(token, candidate, max_edits)
+            if distance <= max_edits:
+                matches.append((candidate, distance))
+        return matches
+
+
+class TokenIndex:
+    """Token -> services postings, with a prefix trie and gram index over the distinct tokens
+
+    For tokens asked for by top(), the TOP_POSTINGS best-ranked services are
+    also kept in rank_key order and updated as services come and go; once
+    removals leave fewer than half of them, the next top() rebuilds it.
+    """
+
+    def __init__(self):
+        self.postings = {}
+        self.trie = PrefixTrie()
+        self.grams = GramIndex()
+        self.ranked = {}
+
+    def add(self, token, name):
+        names = self.postings.get(token)
+        if names is None:
+            names = self.postings[token] = set()
+            self.trie.add(token)
+            self.grams.add(token)
+        names.add(name)
+        if token in self.ranked:
+            self.rank_added(token, name)
+
+    def rank_added(self, token, name):
+        """Keep token's ranked list current after name joined its postings"""
+        ranked = self.ranked[token]
+        key = rank_key(name)
+        # Past the end of the list only if the list held every other service
+        if (ranked and key < ranked[-1]) or len(ranked) + 1 == len(self.postings[token]):
+            insort(ranked, key)
+            if len(ranked) > TOP_POSTINGS:
+                ranked.pop()
+
+    def remove(self, token, name):
+        names = self.postings.get(token)
+        if names is None or name not in names:
+            return
+        names.discard(name)
+        ranked = self.ranked.get(token)
+        if ranked and rank_key(name) <= ranked[-1]:
+            ranked.remove(rank_key(name))
+            if len(ranked) < TOP_POSTINGS // 2 < len(names):
+                del self.ranked[token]
+        if not names:
+            del self.postings[token]
+            self.trie.remove(token)
+            self.grams.remove(token)
+
+    def top(self, token):
+        """Up to TOP_POSTINGS services of token, best ranked first, as rank_key tuples"""
+        ranked = self.ranked.get(token)
+        if ranked is None:
+            ranked = self.ranked[token] = heapq.nsmallest(TOP_POSTINGS, map(rank_key, self.lookup(token)))
+        return ranked
+
+    def lookup(self, token):
+        return self.postings.get(token, ())
+
+    def completions(self, prefix, limit):
+        """Tokens starting with prefix, shortest first, until they cover limit services"""
+        found = []
+        count = 0
+        for token in self.trie.completions(prefix):
+            found.append(token)
+            count += len(self.postings[token])
+            if count >= limit:
+                break
+        return found
+
+    def similar(self, token, limit):
+        return self.grams.similar(token, limit)
+
+
+class ServiceIndex:
+    """Search index over service names and description words
+
+    Name and word prefixes come from tries, typos are matched through a
+    gram index over the same tokens. Each query term must match a
+    service's name or description; services are ranked by summed scores,
+    with name matches far ahead of description matches. add(), remove()
+    and update() keep the index in step with catalog edits.
+    """
+
+    def __init__(self):
+        self.names = TokenIndex()
+        self.words = TokenIndex()
+        self.entries = {}
+
+    @classmethod
+    def build(cls, services):
+        """Index every (name, info) in a catalog"""
+        index = cls()
+        for name, info in services.items():
+            index.add(name, info)
+        # Rank the common tokens now rather than on the first search for each
+        for tokens in (index.names, index.words):
+            for token, names in tokens.postings.items():
+                if len(names) > MAX_WORD_POSTINGS:
+                    tokens.top(token)
+        return index
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, name, info):
+        if name in self.entries:
+            self.remove(name)
+        key = normalize_name(name)
+        words = description_words(info["description"])
+        self.entries[name] = (key, words)
+        self.names.add(key, name)
+        postings = self.words.postings
+        ranked = self.words.ranked
+        for word in words:
+            names = postings.get(word)
+            if names is None:
+                self.words.add(word, name)
+            else:
+                names.add(name)
+                if word in ranked:
+                    self.words.rank_added(word, name)
+
+    def remove(self, name):
+        entry = self.entries.pop(name, None)
+        if entry is None:
+            return
+        key, words = entry
+        self.names.remove(key, name)
+        for word in words:
+            self.words.remove(word, name)
+
+    def update(self, name, info):
+        self.add(name, info)
+
+    def term_scores(self, term, within=None, common=None):
+        """{service: best score} for one query term, limited to services in within if given
+
+        With a common list and no within, postings of more than
+        MAX_WORD_POSTINGS services are not scored but appended to common as
+        (score, token index, token), for top_services() to rank.
+        """
+        scores = {}
+
+        def credit(names, score, tokens=None, token=None):
+            if common is not None and within is None and len(names) > MAX_WORD_POSTINGS:
+                common.append((score, tokens, token))
+                return
+            if within is not None:
+                if len(names) > len(within):
+                    names = [name for name in within if name in names]
+                else:
+                    names = [name for name in names if name in within]
+            for name in names:
+                if scores.get(name, 0) < score:
+                    scores[name] = score
+
+        key = normalize_name(term)
+        if key:
+            credit(self.names.lookup(key), NAME_EXACT, self.names, key)
+            for token in self.names.completions(key, PREFIX_CANDIDATES):
+                # Shorter completions of the prefix rank higher
+                credit(self.names.lookup(token), NAME_PREFIX - min(len(token) - len(key), NAME_PREFIX // 2), self.names, token)
+            for token, distance in self.names.similar(key, FUZZY_CANDIDATES):
+                credit(self.names.lookup(token), NAME_FUZZY - 10 * distance, self.names, token)
+            if len(key) >= GRAM_SIZE:
+                for token in self.substring_names(key):
+                    credit(self.names.lookup(token), NAME_SUBSTRING, self.names, token)
+
+        word = term.lower()
+        if WORD_PATTERN.fullmatch(word):
+            credit(self.words.lookup(word), WORD_EXACT, self.words, word)
+            for token in self.words.completions(word, PREFIX_CANDIDATES):
+                if token != word:
+                    credit(self.words.lookup(token), WORD_PREFIX, self.words, token)
+            for token, _ in self.words.similar(word, FUZZY_CANDIDATES):
+                if token != word:
+                    credit(self.words.lookup(token), WORD_FUZZY, self.words, token)
+        return scores
+
+    def top_services(self, scores, common, limit):
+        """The limit best (service, score) pairs given term_scores() output and its common postings
+
+        A service's score is the best of its own score and those of the
+        common postings holding it. Within one common posting every service
+        not already scored has at least that posting's score, so only its
+        first `limit` such services by rank_key can make the cut.
+        """
+        def best(name, score=0):
+            for common_score, tokens, token in common:
+                if common_score > score and name in tokens.lookup(token):
+                    score = common_score
+            return score
+
+        candidates = {name: best(name, score) for name, score in scores.items()}
+        for _, tokens, token in common:
+            names = [name for _, name in tokens.top(token) if name not in scores][:limit]
+            if len(names) < limit and len(tokens.top(token)) < len(tokens.lookup(token)):
+                # Too many of the best are already scored; rank the rest of the posting
+                names = [name for _, name in heapq.nsmallest(
+                    limit, (rank_key(name) for name in tokens.lookup(token) if name not in scores))]
+            for name in names:
+                candidates[name] = best(name)
+        return heapq.nsmallest(limit, candidates.items(), key=lambda item: (-item[1], *rank_key(item[0])))
+
+    def substring_names(self, key):
+        """Name keys containing key anywhere, found through their shared grams"""
+        inner = (key[i:i + GRAM_SIZE] for i in range(len(key) - GRAM_SIZE + 1))
+        candidates = min((self.names.grams.postings.get(gram, set()) for gram in inner), key=len)
+        if len(candidates) > MAX_GRAM_POSTINGS:
+            return []
+        return [token for token in candidates if key in token]
+
+    def search(self, query, limit=10):
+        """Service names best matching every term of query, best first"""
+        # Narrow with the rarest terms first so common words only filter
+        terms = sorted(query.split(), key=lambda term: len(self.words.lookup(term.lower())))
+        if not terms:
+            return []
+        if len(terms) == 1:
+            common = []
+            scores = self.term_scores(terms[0], common=common)
+            return [name for name, _ in self.top_services(scores, common, limit)]
+        totals = None
+        for term in terms:
+            scores = self.term_scores(term, None if totals is None else totals)
+            if totals is None:
+                totals = scores
+            else:
+                totals = {name: totals[name] + score for name, score in scores.items()}
+            if not totals:
+                return []
+        ranked = heapq.nsmallest(limit, totals.items(), key=lambda item: (-item[1], *rank_key(item[0])))
+        return [name for name, _ in ranked]
@@ -0,0 +1,400 @@
+import json
+import struct
+from bisect import bisect_left
+from collections.abc import Mapping, Sequence
+from multiprocessing import resource_tracker, shared_memory
+
+from catalog_model import DIFFICULTIES, DIFFICULTY_IDS, RECORD_FIELDS, CatalogError, InternTable, ServiceRecord
+
+# Segment layouts use native byte order: publisher and workers share one machine
+SEGMENT_MAGIC = b"AWSHCAT1"
+CONTROL_MAGIC = b"AWSHCTL1"
+
+# Control segment: magic, generation of the current catalog segment
+CONTROL = struct.Struct("=8sQ")
+
+# Catalog segment header: magic, generation, service count, category count
+HEADER = struct.Struct("=8sQII")
+
+# Text spans kept per service, as (offset, length) pairs into the text area
+SPAN_FIELDS = ("name", "description", "certification_notes", "extra")
+
+# Segment sections in order, with their item size in bytes. Service positions
+# are also kept grouped by (category, difficulty) and by difficulty, with the
+# start of every group, so filters are slices instead of scans.
+SECTIONS = (
+    ("category_spans", 4), ("service_spans", 4), ("by_category", 4), ("category_groups", 4),
+    ("by_difficulty", 4), ("difficulty_groups", 4), ("category_ids", 2), ("difficulty_ids", 1),
+)
+
+# Tries when a worker attaches just as the publisher swaps versions
+ATTACH_RETRIES = 5
+
+def segment_name(name, generation):
+    """Shared memory name of one published catalog version"""
+    return f"{name}.{generation}"
+
+
+def untrack(segment):
+    """Take a segment off the resource tracker, which would unlink it when the process exits"""
+    resource_tracker.unregister(segment._name, "shared_memory")
+    return segment
+
+
+def release(segment):
+    """Close and unlink an untracked segment
+
+    unlink() always tells the tracker, so the segment is registered again
+    first to keep the tracker's books balanced.
+    """
+    segment.close()
+    resource_tracker.register(segment._name, "shared_memory")
+    segment.unlink()
+
+
+def attach_segment(name):
+    """Open an existing segment without leaving it on this process's resource tracker
+
+    A tracked segment is unlinked when the process exits, and forked
+    workers share their parent's tracker, so attaching must not track.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13 always registers
+        return untrack(shared_memory.SharedMemory(name=name))
+
+
+def layout(services, categories):
+    """{section: (start, end)} byte ranges of a segment, plus the start of the text area"""
+    counts = {
+        "category_spans": categories * 2,
+        "service_spans": services * len(SPAN_FIELDS) * 2,
+        "by_category": services,
+        "category_groups": categories * len(DIFFICULTIES) + 1,
+        "by_difficulty": services,
+        "difficulty_groups": len(DIFFICULTIES) + 1,
+        "category_ids": services,
+        "difficulty_ids": services,
+    }
+    sections = {}
+    position = HEADER.size
+    for section, size in SECTIONS:
+        sections[section] = (position, position + counts[section] * size)
+        position += counts[section] * size
+    return sections, position
+
+
+def extra_json(info):
+    """Note entries and extra fields of a service as JSON bytes (empty if it has none)"""
+    extra = {}
+    if info.get("note_entries") is not None:
+        extra["note_entries"] = info["note_entries"]
+    if getattr(info, 'extra', None):
+        extra.update(info.extra)
+    elif not isinstance(info, ServiceRecord):
+        extra.update((key, value) for key, value in info.items() if key not in RECORD_FIELDS)
+    return json.dumps(extra).encode('utf-8') if extra else b""
+
+
+def group_starts(keys, groups):
+    """Start of each group key 0..groups-1 in sorted keys, followed by the total"""
+    return [bisect_left(keys, group) for group in range(groups)] + [len(keys)]
+
+
+def encode_catalog(services, generation):
+    """Serialize a catalog into the shared segment layout; returns a bytearray"""
+    names = sorted(services)
+    categories = InternTable()
+    texts = []
+    spans = []
+    category_ids = []
+    difficulty_ids = []
+    position = 0
+
+    def add_text(data, spans):
+        nonlocal position
+        texts.append(data)
+        spans.extend((position, len(data)))
+        position += len(data)
+
+    for name in names:
+        info = services[name]
+        category_ids.append(categories.intern(info["category"]))
+        difficulty_ids.append(DIFFICULTY_IDS[info["difficulty"]])
+        add_text(name.encode('utf-8'), spans)
+        add_text(info["description"].encode('utf-8'), spans)
+        add_text(info["certification_notes"].encode('utf-8'), spans)
+        add_text(extra_json(info), spans)
+
+    category_spans = []
+    for category in categories.names:
+        add_text(category.encode('utf-8'), category_spans)
+
+    category_count = len(categories.names)
+    if category_count > 0xFFFF or position > 0xFFFFFFFF:
+        raise CatalogError("catalog is too large to publish to shared memory")
+
+    levels = len(DIFFICULTIES)
+    by_category = sorted(range(len(names)), key=lambda index: category_ids[index] * levels + difficulty_ids[index])
+    by_difficulty = sorted(range(len(names)), key=difficulty_ids.__getitem__)
+    values = {
+        "category_spans": category_spans,
+        "service_spans": spans,
+        "by_category": by_category,
+        "category_groups": group_starts([category_ids[i] * levels + difficulty_ids[i] for i in by_category], category_count * levels),
+        "by_difficulty": by_difficulty,
+        "difficulty_groups": group_starts([difficulty_ids[i] for i in by_difficulty], levels),
+        "category_ids": category_ids,
+    }
+
+    sections, text_start = layout(len(names), category_count)
+    buffer = bytearray(text_start + position)
+    HEADER.pack_into(buffer, 0, SEGMENT_MAGIC, generation, len(names), category_count)
+    for section, size in SECTIONS:
+        start, end = sections[section]
+        if section == "difficulty_ids":
+            buffer[start:end] = bytes(difficulty_ids)
+        else:
+            items = values[section]
+            struct.pack_into(f"={len(items)}{'I' if size == 4 else 'H'}", buffer, start, *items)
+    buffer[text_start:] = b"".join(texts)
+    return buffer
+
+
+class CatalogPublisher:
+    """Publishes catalog versions to shared memory for worker processes
+
+    Each version goes into a new segment named "<name>.<generation>"; a
+    small control segment called <name> holds the current generation, and
+    is bumped only once the new segment is complete. The previous segment
+    is unlinked straight away: workers that still map it keep reading it
+    until they move on, and its memory is freed when the last one does.
+
+    Segments are kept off the resource tracker, which forked workers share
+    and which attaching workers register and unregister with; close()
+    unlinks them, and a publisher taking over after a crash removes the
+    ones left behind.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.generation = 0
+        self.segment = None
+        try:
+            self.control = untrack(shared_memory.SharedMemory(name=name, create=True, size=CONTROL.size))
+        except FileExistsError:
+            # Left behind by a publisher that was killed; take it over
+            stale = shared_memory.SharedMemory(name=name)
+            _, self.generation = CONTROL.unpack_from(stale.buf)
+            stale.close()
+            stale.unlink()
+            try:
+                orphan = shared_memory.SharedMemory(name=segment_name(name, self.generation))
+                orphan.close()
+                orphan.unlink()
+            except FileNotFoundError:
+                pass
+            self.control = untrack(shared_memory.SharedMemory(name=name, create=True, size=CONTROL.size))
+
+    def publish(self, services):
+        """Write services as a new version and make it current; returns its generation"""
+        generation = self.generation + 1
+        data = encode_catalog(services, generation)
+        segment = untrack(shared_memory.SharedMemory(name=segment_name(self.name, generation), create=True, size=len(data)))
+        segment.buf[:len(data)] = data
+        CONTROL.pack_into(self.control.buf, 0, CONTROL_MAGIC, generation)
+
+        previous, self.segment, self.generation = self.segment, segment, generation
+        if previous is not None:
+            release(previous)
+        return generation
+
+    def close(self):
+        """Withdraw the catalog; workers keep the version they have mapped"""
+        for segment in (self.segment, self.control):
+            if segment is not None:
+                release(segment)
+        self.segment = self.control = None
+
+
+class ServiceNames(Sequence):
+    """Service names of a shared catalog by position, decoded on access
+
+    The full list is sorted, so it supports bisect; select() returns a
+    subset of positions.
+    """
+
+    def __init__(self, catalog, positions=None):
+        # Set first so the positions view is released before the catalog can be closed
+        self.positions = positions
+        self.catalog = catalog
+
+    def __len__(self):
+        return self.catalog.count if self.positions is None else len(self.positions)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if self.positions is not None:
+            index = self.positions[index]
+        elif index < 0:
+            index += self.catalog.count
+        if not 0 <= index < self.catalog.count:
+            raise IndexError(index)
+        return self.catalog.text(index, 0)
+
+
+class SharedCatalog(Mapping):
+    """Read-only catalog view over a published shared memory segment
+
+    Nothing is copied when attaching except the category names; service
+    names and text are decoded from the segment when a service is looked
+    up, and filters return slices of the pre-grouped position arrays.
+    Looking up a service returns a fresh ServiceRecord.
+    """
+
+    def __init__(self, segment):
+        self.segment = segment
+        self.views = {}
+        if len(segment.buf) < HEADER.size or bytes(segment.buf[:len(SEGMENT_MAGIC)]) != SEGMENT_MAGIC:
+            raise CatalogError(f"shared memory segment {segment.name!r} is not a published catalog")
+        magic, self.generation, self.count, category_count = HEADER.unpack_from(segment.buf)
+        sections, text_start = layout(self.count, category_count)
+        for section, size in SECTIONS:
+            start, end = sections[section]
+            view = segment.buf[start:end]
+            self.views[section] = view.cast({4: 'I', 2: 'H', 1: 'B'}[size])
+            view.release()
+        self.spans = self.views["service_spans"]
+        self.views["text"] = self.text_area = segment.buf[text_start:]
+
+        category_spans = self.views["category_spans"]
+        self.category_table = InternTable()
+        for index in range(category_count):
+            start, length = category_spans[2 * index], category_spans[2 * index + 1]
+            self.category_table.intern(bytes(self.text_area[start:start + length]).decode('utf-8'))
+
+    def __del__(self):
+        # Views into the mapping must be released before it can be closed
+        for view in self.views.values():
+            view.release()
+        self.segment.close()
+
+    @property
+    def names(self):
+        # Not cached: a stored sequence would tie the catalog into a reference cycle
+        return ServiceNames(self)
+
+    def text(self, position, field):
+        """One text field of the service at position, decoded from the segment"""
+        span = (position * len(SPAN_FIELDS) + field) * 2
+        start, length = self.spans[span], self.spans[span + 1]
+        return bytes(self.text_area[start:start + length]).decode('utf-8')
+
+    def position(self, name):
+        """Position of a service in the sorted names, or None"""
+        names = self.names
+        index = bisect_left(names, name)
+        if index < self.count and names[index] == name:
+            return index
+        return None
+
+    def __getitem__(self, name):
+        position = self.position(name) if isinstance(name, str) else None
+        if position is None:
+            raise KeyError(name)
+        extra = self.text(position, 3)
+        extra = json.loads(extra) if extra else {}
+        return ServiceRecord(
+            self.category_table,
+            self.text(position, 1),
+            self.category_table.name(self.views["category_ids"][position]),
+            DIFFICULTIES[self.views["difficulty_ids"][position]],
+            self.text(position, 2),
+            extra.pop("note_entries", None),
+            extra or None,
+        )
+
+    def __contains__(self, name):
+        return isinstance(name, str) and self.position(name) is not None
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return self.count
+
+    def sorted_names(self):
+        """All service names in sorted order, without decoding them up front"""
+        return self.names
+
+    def category_names(self):
+        """Sorted names of categories that have at least one service"""
+        groups = self.views["category_groups"]
+        levels = len(DIFFICULTIES)
+        return sorted(
+            self.category_table.name(index) for index in range(len(self.category_table.names))
+            if groups[index * levels] < groups[(index + 1) * levels]
+        )
+
+    def select(self, category=None, difficulty=None):
+        """Names of services matching the filters, as a lazily decoded sequence"""
+        if category is None and difficulty is None:
+            return self.names
+        category_id = None if category is None else self.category_table.get(category)
+        difficulty_id = None if difficulty is None else DIFFICULTY_IDS.get(difficulty)
+        if (category is not None and category_id is None) or (difficulty is not None and difficulty_id is None):
+            return []
+        if category_id is None:
+            groups, positions, first, last = self.views["difficulty_groups"], self.views["by_difficulty"], difficulty_id, difficulty_id + 1
+        else:
+            levels = len(DIFFICULTIES)
+            first = category_id * levels + (difficulty_id or 0)
+            last = first + 1 if difficulty_id is not None else first + levels
+            groups, positions = self.views["category_groups"], self.views["by_category"]
+        return ServiceNames(self, positions[groups[first]:groups[last]])
+
+    def to_dict(self):
+        """Plain dict-of-dicts in the catalog file format"""
+        return {name: self[name].to_dict() for name in self.names}
+
+
+class SharedCatalogClient:
+    """Worker-side handle on a publisher's catalog
+
+    refresh() checks the control segment and attaches the newest version
+    when the generation changed. Call it between rounds; the previous
+    version stays mapped until nothing refers to it.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        try:
+            self.control = attach_segment(name)
+        except FileNotFoundError:
+            raise CatalogError(f"no catalog is published in shared memory as {name!r}") from None
+        self.catalog = None
+
+    def current_generation(self):
+        magic, generation = CONTROL.unpack_from(self.control.buf)
+        if magic != CONTROL_MAGIC:
+            raise CatalogError(f"shared memory segment {self.name!r} is not a catalog control block")
+        return generation
+
+    def refresh(self):
+        """The newest published catalog if it differs from the attached one, else None"""
+        for _ in range(ATTACH_RETRIES):
+            generation = self.current_generation()
+            if self.catalog is not None and self.catalog.generation == generation:
+                return None
+            try:
+                self.catalog = SharedCatalog(attach_segment(segment_name(self.name, generation)))
+                return self.catalog
+            except FileNotFoundError:
+                # Replaced between reading the generation and attaching; read it again
+                continue
+        raise CatalogError(f"could not attach to the catalog published as {self.name!r}")
+
+    def close(self):
+        self.catalog = None
+        self.control.close()
@@ -0,0 +1,216 @@
+import codecs
+import os
+import selectors
+import shutil
+import signal
+import sys
+import threading
+
+try:
+    import termios
+except ImportError:
+    # Windows: only the line-based input() path is available
+    termios = None
+
+# Keys returned by RawTerminal.read_key() besides single characters
+ENTER = "ENTER"
+BACKSPACE = "BACKSPACE"
+ESCAPE = "ESCAPE"
+EOF = "EOF"
+# The screen must be redrawn from scratch (resized, or resumed after Ctrl-Z)
+REDRAW = "REDRAW"
+
+# Control characters that read_key() reports by name
+SPECIAL_KEYS = {"\r": ENTER, "\n": ENTER, "\x7f": BACKSPACE, "\x08": BACKSPACE, "\x1b": ESCAPE, "\x04": EOF}
+
+# Seconds to wait after a lone ESC byte for the rest of an escape sequence
+ESCAPE_WAIT = 0.02
+
+CLEAR = "\x1b[H\x1b[2J"
+CLEAR_LINE = "\x1b[K"
+
+
+def raw_input_available(stdin=None, stdout=None):
+    """True if keystrokes can be read one at a time (termios and an interactive terminal)"""
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    try:
+        return termios is not None and stdin.isatty() and stdout.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+
+class RawTerminal:
+    """Context manager that reads single keystrokes from the terminal as they are typed
+
+    Line buffering and echo are turned off while it is active; Ctrl-C
+    still interrupts. The saved terminal settings are restored when the
+    block exits for any reason, on SIGTERM, and around Ctrl-Z suspends.
+    """
+
+    def __init__(self, stdin=None):
+        self.fd = (stdin or sys.stdin).fileno()
+        self.saved = None
+        self.pending = ""
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.selector = None
+        self.wake_read = self.wake_write = None
+        self.redraw = False
+        self.previous_handlers = {}
+
+    def __enter__(self):
+        self.saved = termios.tcgetattr(self.fd)
+        self.enter_raw()
+        self.wake_read, self.wake_write = os.pipe()
+        os.set_blocking(self.wake_write, False)
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.fd, selectors.EVENT_READ)
+        self.selector.register(self.wake_read, selectors.EVENT_READ)
+        # Signal handlers can only be installed from the main thread
+        if threading.current_thread() is threading.main_thread():
+            self.install_handler(signal.SIGTERM, self.on_terminate)
+            for name in ('SIGTSTP', 'SIGWINCH'):
+                if hasattr(signal, name):
+                    self.install_handler(getattr(signal, name), self.on_job_control)
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        for signum, handler in self.previous_handlers.items():
+            signal.signal(signum, handler)
+        self.previous_handlers = {}
+        self.restore()
+        self.selector.close()
+        os.close(self.wake_read)
+        os.close(self.wake_write)
+        return False
+
+    def enter_raw(self):
+        attrs = termios.tcgetattr(self.fd)
+        # No line editing or echo; keep ISIG so Ctrl-C and Ctrl-Z still work
+        attrs[3] &= ~(termios.ICANON | termios.ECHO)
+        attrs[6][termios.VMIN] = 1
+        attrs[6][termios.VTIME] = 0
+        termios.tcsetattr(self.fd, termios.TCSANOW, attrs)
+
+    def restore(self):
+        if self.saved is not None:
+            termios.tcsetattr(self.fd, termios.TCSADRAIN, self.saved)
+
+    def install_handler(self, signum, handler):
+        self.previous_handlers[signum] = signal.signal(signum, handler)
+
+    def on_terminate(self, signum, frame):
+        # Unwind through __exit__ so the terminal is restored
+        sys.exit(128 + signum)
+
+    def on_job_control(self, signum, frame):
+        if signum == getattr(signal, 'SIGTSTP', None):
+            # Give the shell back a normal terminal, then stop for real until resumed
+            self.restore()
+            signal.signal(signum, signal.SIG_DFL)
+            os.kill(os.getpid(), signum)
+            signal.signal(signum, self.on_job_control)
+            self.enter_raw()
+        self.redraw = True
+        try:
+            os.write(self.wake_write, b"!")
+        except BlockingIOError:
+            pass
+
+    def read_key(self, timeout=None):
+        """Next key (a character, ENTER, BACKSPACE, ESCAPE, EOF or REDRAW), or None after timeout seconds"""
+        while True:
+            if self.redraw:
+                self.redraw = False
+                return REDRAW
+            if self.pending:
+                key = self.decode()
+                if key is not None:
+                    return key
+                continue
+            ready = self.selector.select(timeout)
+            if not ready:
+                return None
+            for key, _ in ready:
+                if key.fd == self.wake_read:
+                    os.read(self.wake_read, 64)
+                elif not self.read_input():
+                    return EOF
+
+    def read_input(self):
+        """Add whatever the terminal has to the pending text; False at end of input"""
+        data = os.read(self.fd, 1024)
+        # Split multi-byte characters wait in the decoder for their remaining bytes
+        self.pending += self.decoder.decode(data)
+        return bool(data)
+
+    def decode(self):
+        """Take one key off the pending input; None for ignored escape sequences"""
+        char = self.pending[0]
+        if char == "\x1b":
+            if len(self.pending) == 1 and self.selector.select(ESCAPE_WAIT):
+                self.read_input()
+            if self.pending[1:2] in ("[", "O"):
+                # Cursor and function keys: skip to the sequence's final byte
+                end = 2
+                while end < len(self.pending) and not "@" <= self.pending[end] <= "~":
+                    end += 1
+                self.pending = self.pending[end + 1:]
+                return None
+        self.pending = self.pending[1:]
+        return SPECIAL_KEYS.get(char, char)
+
+
+class FrameRenderer:
+    """Draws whole-screen frames, rewriting only the rows that changed since the last one"""
+
+    def __init__(self, out=None):
+        self.out = out or sys.stdout
+        self.rows = None
+        self.width = None
+
+    def invalidate(self):
+        """Redraw everything on the next frame"""
+        self.rows = None
+
+    def layout(self, lines):
+        """Split lines into screen rows no wider than the terminal"""
+        rows = []
+        for line in lines:
+            for text in line.split("\n"):
+                text = text.rstrip()
+                rows.extend(text[start:start + self.width] for start in range(0, max(len(text), 1), self.width))
+        return rows
+
+    def render(self, lines, cursor=None):
+        """Show lines; cursor is a (line index, column) in lines, or None to park it below the frame"""
+        width = shutil.get_terminal_size().columns
+        if width != self.width:
+            self.width = width
+            self.rows = None
+        rows = self.layout(lines)
+        output = []
+        if self.rows is None:
+            output.append(CLEAR)
+            self.rows = []
+        for number, row in enumerate(rows):
+            if number >= len(self.rows) or self.rows[number] != row:
+                output.append(f"\x1b[{number + 1};1H{row}{CLEAR_LINE}")
+        for number in range(len(rows), len(self.rows)):
+            output.append(f"\x1b[{number + 1};1H{CLEAR_LINE}")
+        self.rows = rows
+        if cursor is None:
+            row, column = len(rows), 0
+        else:
+            row = len(self.layout(lines[:cursor[0]])) + cursor[1] // self.width
+            column = cursor[1] % self.width
+        output.append(f"\x1b[{row + 1};{column + 1}H")
+        # One write per frame, so a frame is never seen half drawn
+        self.out.write("".join(output))
+        self.out.flush()
+
+    def close(self):
+        """Leave the cursor on a fresh line below the last frame"""
+        if self.rows is not None:
+            self.out.write(f"\x1b[{len(self.rows) + 1};1H\n")
+            self.out.flush()
@@ -0,0 +1,28 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+V4_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The game's modules live next to the scripts rather than in a package
+sys.path.insert(0, V4_DIR)
+
+
+@pytest.fixture(scope="session")
+def game_module():
+    """hangman-v4.py loaded as a module (its file name is not importable)"""
+    spec = importlib.util.spec_from_file_location("hangman_v4", os.path.join(V4_DIR, 'hangman-v4.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def catalog_file(tmp_path):
+    """Copy of the bundled catalog in a scratch directory"""
+    path = tmp_path / "aws_services.json"
+    with open(os.path.join(V4_DIR, 'aws_services.json'), 'rb') as source:
+        path.write_bytes(source.read())
+    return str(path)
@@ -0,0 +1,98 @@
+import json
+
+import pytest
+
+from catalog_store import CatalogStore, merge_catalogs
+
+BASE = {
+    "S3": {"description": "Object storage"},
+    "EC2": {"description": "Virtual servers"},
+    "SQS": {"description": "Queues"},
+}
+
+
+@pytest.mark.parametrize("ours, theirs, merged, conflicts", [
+    # Nobody changed anything
+    (BASE, BASE, BASE, []),
+    # Only they edited, added or deleted
+    (BASE, {**BASE, "S3": {"description": "Buckets"}}, {**BASE, "S3": {"description": "Buckets"}}, []),
+    (BASE, {**BASE, "KMS": {"description": "Keys"}}, {**BASE, "KMS": {"description": "Keys"}}, []),
+    (BASE, {"S3": BASE["S3"], "EC2": BASE["EC2"]}, {"S3": BASE["S3"], "EC2": BASE["EC2"]}, []),
+    # Only we edited, added or deleted
+    ({**BASE, "EC2": {"description": "Instances"}}, BASE, {**BASE, "EC2": {"description": "Instances"}}, []),
+    ({**BASE, "VPC": {"description": "Networks"}}, BASE, {**BASE, "VPC": {"description": "Networks"}}, []),
+    ({"S3": BASE["S3"], "SQS": BASE["SQS"]}, BASE, {"S3": BASE["S3"], "SQS": BASE["SQS"]}, []),
+    # Both sides made the same change
+    ({**BASE, "S3": {"description": "Buckets"}}, {**BASE, "S3": {"description": "Buckets"}},
+     {**BASE, "S3": {"description": "Buckets"}}, []),
+    # Different services changed on each side
+    ({**BASE, "EC2": {"description": "Instances"}}, {**BASE, "S3": {"description": "Buckets"}},
+     {"S3": {"description": "Buckets"}, "EC2": {"description": "Instances"}, "SQS": BASE["SQS"]}, []),
+    # Both changed the same service: ours wins and it is reported
+    ({**BASE, "S3": {"description": "Mine"}}, {**BASE, "S3": {"description": "Theirs"}},
+     {**BASE, "S3": {"description": "Mine"}}, ["S3"]),
+    # We edited what they deleted, and deleted what they edited
+    ({**BASE, "SQS": {"description": "Mine"}}, {"S3": BASE["S3"], "EC2": BASE["EC2"]},
+     {**BASE, "SQS": {"description": "Mine"}}, ["SQS"]),
+    ({"S3": BASE["S3"], "EC2": BASE["EC2"]}, {**BASE, "SQS": {"description": "Theirs"}},
+     {"S3": BASE["S3"], "EC2": BASE["EC2"]}, ["SQS"]),
+    # Both added the same new service differently
+    ({**BASE, "KMS": {"description": "Mine"}}, {**BASE, "KMS": {"description": "Theirs"}},
+     {**BASE, "KMS": {"description": "Mine"}}, ["KMS"]),
+])
+def test_three_way_merge(ours, theirs, merged, conflicts):
+    result, found = merge_catalogs(BASE, ours, theirs)
+    assert result == merged
+    assert found == conflicts
+
+
+def test_merge_keeps_our_order_then_their_additions():
+    ours = {"SQS": BASE["SQS"], "S3": BASE["S3"], "EC2": BASE["EC2"]}
+    theirs = {**BASE, "KMS": {"description": "Keys"}}
+    merged, _ = merge_catalogs(BASE, ours, theirs)
+    assert list(merged) == ["SQS", "S3", "EC2", "KMS"]
+
+
+def test_concurrent_saves_merge_instead_of_overwriting(catalog_file):
+    game, updater = CatalogStore(catalog_file, "game"), CatalogStore(catalog_file, "updater")
+    ours, theirs = game.load(), updater.load()
+
+    theirs["S3"]["description"] = "Edited by the updater"
+    updater.save(theirs)
+    ours["EC2"]["description"] = "Edited in the game"
+    saved = game.save(ours)
+
+    assert saved["S3"]["description"] == "Edited by the updater"
+    assert saved["EC2"]["description"] == "Edited in the game"
+    assert CatalogStore(catalog_file, "reader").load() == saved
+    assert game.read_stamp()["version"] == 2
+    assert game.read_stamp()["writer"] == "game"
+
+
+def test_stamp_for_another_file_forces_a_merge(catalog_file):
+    store = CatalogStore(catalog_file, "game")
+    services = store.load()
+    store.save(services)
+    assert store.loaded_version(store.signature()) == 1
+
+    # A crash after the stamp but before the catalog: the stamp's size no longer matches
+    with open(store.version_path, 'w') as file:
+        json.dump({"version": 2, "size": 1}, file)
+    assert store.loaded_version(store.signature()) is None
+    updater = CatalogStore(catalog_file, "updater")
+    services = updater.load()
+    assert updater.version is None
+
+    # Its save therefore merges the edits saved after it loaded
+    store.save({**services, "KMS": {**services["S3"], "description": "Keys"}})
+    services["S3"]["description"] = "Edited by the updater"
+    saved = updater.save(services)
+    assert saved["KMS"]["description"] == "Keys"
+    assert saved["S3"]["description"] == "Edited by the updater"
+
+
+def test_invalid_catalog_is_rejected(tmp_path):
+    path = tmp_path / "aws_services.json"
+    path.write_text(json.dumps({"S3": {"description": 5}}))
+    with pytest.raises(ValueError):
+        CatalogStore(str(path), "game").load()
@@ -0,0 +1,37 @@
+from datetime import datetime
+
+from certification_notes import RECENT_UPDATE, add_note, compact_notes
+
+
+def recent_texts(service_info):
+    return [entry["text"] for entry in service_info["note_entries"] if entry["kind"] == RECENT_UPDATE]
+
+
+def test_expiry_uses_announcement_date():
+    service_info = {"certification_notes": "Base notes"}
+    # Both were just added, but one was announced long ago
+    add_note(service_info, RECENT_UPDATE, "old announcement", date="2025-01-10")
+    add_note(service_info, RECENT_UPDATE, "new announcement", date="2026-10-01")
+    removed = compact_notes(service_info, now=datetime(2026, 10, 19))
+    assert removed == 1
+    assert recent_texts(service_info) == ["new announcement"]
+    # The expired announcement is not added back
+    assert not add_note(service_info, RECENT_UPDATE, "old announcement", date="2025-01-10")
+
+
+def test_undated_entries_expire_by_when_they_were_added():
+    service_info = {"certification_notes": "Base notes"}
+    add_note(service_info, RECENT_UPDATE, "stale note")
+    add_note(service_info, RECENT_UPDATE, "fresh note")
+    service_info["note_entries"][0]["added"] = "2025-01-10T09:00:00"
+    service_info["note_entries"][1]["added"] = "2026-10-18T09:00:00"
+    assert compact_notes(service_info, now=datetime(2026, 10, 19)) == 1
+    assert recent_texts(service_info) == ["fresh note"]
+
+
+def test_recent_dates_are_kept_whatever_was_added():
+    service_info = {"certification_notes": "Base notes"}
+    add_note(service_info, RECENT_UPDATE, "backfilled", date="2026-09-30")
+    service_info["note_entries"][0]["added"] = "2024-01-01T00:00:00"
+    assert compact_notes(service_info, now=datetime(2026, 10, 19)) == 0
+    assert recent_texts(service_info) == ["backfilled"]
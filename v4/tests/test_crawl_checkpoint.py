@@ -0,0 +1,123 @@
+"""Crawl checkpoints: saving, reopening, and resuming an interrupted docs crawl"""
+import json
+
+import pytest
+import requests
+
+from aws_service_updater import AwsServiceUpdater
+from crawl_checkpoint import CHECKPOINT_VERSION, CrawlCheckpoint, CrawlInterrupted, checkpoint_path
+from replay import replay_session, write_archive
+
+DOCS_INDEX_URL = "https://docs.aws.amazon.com/index.html"
+SERVICES = ["Amazon Athena", "AWS Glue", "Amazon Kinesis", "Amazon Redshift", "AWS Lake Formation", "Amazon QuickSight"]
+
+
+def page_url(service):
+    return f"https://docs.aws.amazon.com/{service.split()[-1].lower()}/"
+
+
+def docs_archive(tmp_path):
+    """Recorded docs index with one category and a detail page per service"""
+    links = "".join(f'<li><a href="{page_url(service)}">{service}</a></li>' for service in SERVICES)
+    responses = {DOCS_INDEX_URL: (200, {"Content-Type": "text/html"},
+                                  f'<div class="category"><h2>Analytics</h2><ul>{links}</ul></div>'.encode('utf-8'))}
+    for service in SERVICES:
+        body = f'<div class="description">{service} description</div>'.encode('utf-8')
+        responses[page_url(service)] = (200, {"Content-Type": "text/html"}, body)
+    path = str(tmp_path / "docs.zip")
+    write_archive(path, responses)
+    return path
+
+
+def make_updater(catalog_file, archive, resume=False, stop_after=None, unreachable=()):
+    """Updater over a recorded archive, remembering the URLs it fetched
+
+    With stop_after, the crawl is interrupted once that many pages were
+    fetched; unreachable URLs fail with a connection error.
+    """
+    updater = AwsServiceUpdater(catalog_file, session=replay_session(archive), request_delay=0,
+                                resume=resume, checkpoint_interval=3600)
+    updater.fetched = []
+    get = updater.session.get
+
+    def counting_get(url, *args, **kwargs):
+        updater.fetched.append(url)
+        if stop_after is not None and len(updater.fetched) >= stop_after:
+            updater.interrupted.set()
+        if url in unreachable:
+            raise requests.ConnectionError(f"cannot reach {url}")
+        return get(url, *args, **kwargs)
+    updater.session.get = counting_get
+    return updater
+
+
+def interrupt(updater):
+    """Run the crawl until it is stopped, then save progress as the updater's Ctrl-C handler does"""
+    with pytest.raises(CrawlInterrupted):
+        updater.crawl_docs()
+    updater.checkpoint.save()
+
+
+def test_resumed_crawl_fetches_only_the_remaining_pages(tmp_path, catalog_file):
+    archive = docs_archive(tmp_path)
+    expected = make_updater(catalog_file, archive).crawl_docs()
+
+    # Index plus three detail pages, then stopped
+    interrupt(make_updater(catalog_file, archive, stop_after=4))
+
+    resumed = make_updater(catalog_file, archive, resume=True)
+    crawl = resumed.crawl_docs()
+    assert resumed.fetched == [page_url(service) for service in SERVICES[3:]]
+    assert crawl["entries"] == expected["entries"]
+    assert crawl["descriptions"] == expected["descriptions"]
+    assert set(crawl["fetch_meta"]) == set(expected["fetch_meta"])
+
+    # Saving the update removes the checkpoint
+    resumed.checkpoint.clear()
+    assert not (tmp_path / "aws_services.crawl_state.json").exists()
+
+
+def test_failed_pages_are_retried_first(tmp_path, catalog_file):
+    archive = docs_archive(tmp_path)
+    interrupt(make_updater(catalog_file, archive, stop_after=5, unreachable={page_url(SERVICES[1])}))
+
+    resumed = make_updater(catalog_file, archive, resume=True)
+    crawl = resumed.crawl_docs()
+    assert resumed.fetched == [page_url(SERVICES[1])] + [page_url(service) for service in SERVICES[4:]]
+    assert sorted(crawl["descriptions"]) == list(range(len(SERVICES)))
+
+
+def test_without_resume_the_checkpoint_is_discarded(tmp_path, catalog_file):
+    archive = docs_archive(tmp_path)
+    interrupt(make_updater(catalog_file, archive, stop_after=3))
+    fresh = make_updater(catalog_file, archive)
+    fresh.crawl_docs()
+    assert fresh.fetched == [DOCS_INDEX_URL] + [page_url(service) for service in SERVICES]
+
+
+def test_checkpoint_needs_the_same_options(tmp_path):
+    path = str(tmp_path / "aws_services.crawl_state.json")
+    checkpoint = CrawlCheckpoint(path, interval=0, options={"incremental": True})
+    checkpoint.update("docs", next=3)
+    checkpoint.record("docs", "visited", "https://example.com/", 200)
+    with open(path, 'r') as file:
+        assert json.load(file)["version"] == CHECKPOINT_VERSION
+
+    assert CrawlCheckpoint.open(path, options={"incremental": True}, resume=True).section("docs") == {
+        "next": 3, "visited": {"https://example.com/": 200}}
+    assert CrawlCheckpoint.open(path, options={"incremental": False}, resume=True).section("docs") == {}
+    assert CrawlCheckpoint.open(path, options={"incremental": True}).section("docs") == {}
+
+    with open(path, 'w') as file:
+        file.write('{"version": 1, "sec')
+    assert CrawlCheckpoint.open(path, options={"incremental": True}, resume=True).section("docs") == {}
+
+
+def test_saves_are_throttled(tmp_path):
+    path = str(tmp_path / "catalog.crawl_state.json")
+    checkpoint = CrawlCheckpoint(path, interval=3600)
+    checkpoint.update("docs", next=1)
+    assert not (tmp_path / "catalog.crawl_state.json").exists()
+    assert checkpoint.save()
+    assert not checkpoint.save()
+    assert checkpoint_path("/data/catalog.json") == "/data/catalog.crawl_state.json"
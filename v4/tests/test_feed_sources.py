@@ -0,0 +1,99 @@
+"""Sitemap and RSS sources parsed from the recorded fixtures, directly and through the updater"""
+import io
+import os
+
+from aws_service_updater import AwsServiceUpdater
+from feed_sources import (DOCS_SITEMAP_URL, WHATS_NEW_FEED_URL, iter_rss, iter_sitemap, rss_date, sitemap_services,
+                          slug_link_text, strip_tags)
+from replay import replay_session, write_archive
+
+BENCH_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks')
+SITEMAP_FIXTURE = os.path.join(BENCH_DIR, 'docs_sitemap_index.xml')
+FEED_FIXTURE = os.path.join(BENCH_DIR, 'whats_new_feed.xml')
+
+
+def read_fixture(path):
+    with open(path, 'rb') as file:
+        return file.read()
+
+
+def test_sitemap_entries():
+    locations = list(iter_sitemap(io.BytesIO(read_fixture(SITEMAP_FIXTURE))))
+    assert len(locations) == 25
+    assert locations[0] == ("https://docs.aws.amazon.com/sitemap_general.xml", "2026-10-01")
+    assert locations[1] == ("https://docs.aws.amazon.com/AWSEC2/latest/UserGuide/sitemap.xml", "2026-10-01")
+
+
+def test_sitemap_services_one_per_guide():
+    services = list(sitemap_services(iter_sitemap(io.BytesIO(read_fixture(SITEMAP_FIXTURE)))))
+    # The site-wide sitemap is skipped and EC2's two guides count once
+    assert len(services) == 23
+    assert services[:4] == [
+        ("AWSEC2", "https://docs.aws.amazon.com/AWSEC2/"),
+        ("Amazon S3", "https://docs.aws.amazon.com/AmazonS3/"),
+        ("lambda", "https://docs.aws.amazon.com/lambda/"),
+        ("Amazon dynamodb", "https://docs.aws.amazon.com/amazondynamodb/"),
+    ]
+    assert ("step functions", "https://docs.aws.amazon.com/step-functions/") in services
+
+
+def test_slug_link_text():
+    assert slug_link_text("AWSCloudFormation") == "AWS Cloud Formation"
+    assert slug_link_text("AmazonS3") == "Amazon S3"
+    assert slug_link_text("elastic-beanstalk") == "elastic beanstalk"
+
+
+def test_rss_items():
+    items = list(iter_rss(io.BytesIO(read_fixture(FEED_FIXTURE))))
+    assert len(items) == 16
+    assert items[0] == {
+        "id": "s3-conditional-writes",
+        "title": "Amazon S3 adds conditional writes for bucket policies",
+        "date": "2026-10-17T18:00:00Z",
+        "content": "Amazon S3 adds conditional writes for bucket policies. "
+                   "Read the documentation & pricing page to learn more.",
+    }
+    assert items[-1]["id"] == "kinesis-on-demand"
+    dates = [item["date"] for item in items]
+    assert dates == sorted(dates, reverse=True)
+
+
+def test_rss_date_and_tags():
+    assert rss_date("Sat, 17 Oct 2026 20:00:00 +0200") == "2026-10-17T18:00:00Z"
+    assert rss_date("not a date") == ""
+    assert strip_tags("<p>One&amp;<b>two</b></p>") == "One& two"
+
+
+def test_updater_reads_the_recorded_fixtures(tmp_path, catalog_file, capsys):
+    archive = str(tmp_path / "fixtures.zip")
+    write_archive(archive, {
+        DOCS_SITEMAP_URL: (200, {"Content-Type": "application/xml"}, read_fixture(SITEMAP_FIXTURE)),
+        WHATS_NEW_FEED_URL: (200, {"Content-Type": "application/rss+xml"}, read_fixture(FEED_FIXTURE)),
+    })
+    updater = AwsServiceUpdater(catalog_file, session=replay_session(archive), docs_source="sitemap",
+                                whats_new_feed=True, whats_new_bootstrap_days=36500)
+
+    entries = updater.read_docs_sitemap()
+    assert len(entries) == 23
+    assert [entry[3] for entry in entries if entry[3] not in updater.current_services] == ["EKS", "KMS", "STEPFUNCTIONS", "BEDROCK"]
+
+    announcements = updater.collect_whats_new()
+    assert len(announcements) == 16
+    assert announcements[0][:2] == ("Amazon S3 adds conditional writes for bucket policies", "2026-10-17")
+    updater.merge_announcements(announcements)
+    # The high-water mark stops the next read at the newest announcement already ingested
+    assert updater.collect_whats_new() == []
+
+
+def test_undated_items_are_skipped(tmp_path, catalog_file, capsys):
+    item = "<item><guid>{0}</guid><title>Amazon S3 adds {0}</title><description>x</description><pubDate>{1}</pubDate></item>"
+    feed = "<rss><channel>{}{}{}</channel></rss>".format(item.format("one", "Sat, 17 Oct 2026 18:00:00 GMT"),
+                                                         item.format("two", "yesterday"),
+                                                         item.format("three", "Fri, 16 Oct 2026 18:00:00 GMT"))
+    archive = str(tmp_path / "feed.zip")
+    write_archive(archive, {WHATS_NEW_FEED_URL: (200, {"Content-Type": "application/rss+xml"}, feed.encode('utf-8'))})
+    updater = AwsServiceUpdater(catalog_file, session=replay_session(archive), whats_new_feed=True,
+                                whats_new_bootstrap_days=36500)
+    announcements = updater.collect_whats_new()
+    assert [title for title, _, _ in announcements] == ["Amazon S3 adds one", "Amazon S3 adds three"]
+    assert updater.update_log.counters["whats_new_undated"] == 1
@@ -0,0 +1,99 @@
+import math
+
+import pytest
+
+from fulltext import BM25_B, BM25_K1, FullTextIndex, tokenize
+
+
+def make_services():
+    """30 filler services plus a few that mention replication and encryption"""
+    services = {f"FILLER{number}": {"description": f"Managed service number {number} for workloads"} for number in range(30)}
+    services["S3"] = {"description": "Object storage with cross-region replication and encryption",
+                      "certification_notes": "Know replication rules and replicas"}
+    services["RDS"] = {"description": "Relational databases with read replicas"}
+    services["KMS"] = {"description": "Encryption keys", "note_entries": [{"text": "Multi-region keys for encryption"}]}
+    return services
+
+
+def bm25_scores(services, query):
+    """BM25 computed from scratch over every query term and service"""
+    documents = {name: tokenize("\n".join([info.get("description", ""), info.get("certification_notes", "")] +
+                                          [entry["text"] for entry in info.get("note_entries", [])]))
+                 for name, info in services.items()}
+    average_length = sum(len(terms) for terms in documents.values()) / len(documents)
+    scores = {}
+    for term in set(tokenize(query)):
+        matching = [name for name, terms in documents.items() if term in terms]
+        idf = math.log(1 + (len(documents) - len(matching) + 0.5) / (len(matching) + 0.5))
+        for name in matching:
+            frequency = documents[name].count(term)
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * len(documents[name]) / average_length)
+            scores[name] = scores.get(name, 0.0) + idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+    return scores
+
+
+def assert_matches_reference(index, services, query):
+    expected = bm25_scores(services, query)
+    results = index.search(query, limit=len(services))
+    assert {name for name, _ in results} == set(expected)
+    for name, score in results:
+        assert score == pytest.approx(expected[name])
+    assert [score for _, score in results] == sorted((score for _, score in results), reverse=True)
+
+
+@pytest.mark.parametrize("query", ["replication", "replicas", "encryption", "replication encryption", "the keys"])
+def test_scores_match_bm25(query):
+    services = make_services()
+    index = FullTextIndex()
+    index.sync(services)
+    assert_matches_reference(index, services, query)
+
+
+def test_plurals_and_stopwords():
+    assert tokenize("The replicas of a bucket") == ["replica", "bucket"]
+    assert tokenize("Access") == ["access"]
+
+
+def test_common_terms_only_rerank_rarer_matches():
+    services = make_services()
+    index = FullTextIndex()
+    index.sync(services)
+    # "managed" is in every filler, so it only adds to services "encryption" matched
+    results = dict(index.search("encryption managed", limit=50))
+    assert set(results) == {"S3", "KMS"}
+    assert results == pytest.approx({name: score for name, score in bm25_scores(services, "encryption").items()})
+    # On its own a common term still finds its services
+    assert len(index.search("managed", limit=50)) == 30
+
+
+def test_edits_match_a_fresh_index(tmp_path):
+    services = make_services()
+    index = FullTextIndex()
+    index.sync(services)
+
+    services["RDS"] = {"description": "Relational databases with encryption at rest"}
+    del services["KMS"]
+    services["DYNAMODB"] = {"description": "Key-value tables with global replication"}
+    assert index.sync(services) == (2, 1)
+    assert index.sync(services) == (0, 0)
+
+    fresh = FullTextIndex()
+    fresh.sync(services)
+    for query in ("replication", "encryption", "keys", "relational databases"):
+        assert index.search(query) == pytest.approx(fresh.search(query))
+        assert_matches_reference(index, services, query)
+
+    # The saved index answers the same, and removals still work after loading
+    path = str(tmp_path / "catalog.fulltext.json")
+    assert index.save(path)
+    loaded = FullTextIndex.load(path)
+    assert loaded.search("replication") == pytest.approx(index.search("replication"))
+    del services["S3"]
+    assert loaded.sync(services) == (0, 1)
+    assert_matches_reference(loaded, services, "replication")
+
+
+def test_outdated_index_file_is_rebuilt(tmp_path):
+    path = tmp_path / "catalog.fulltext.json"
+    path.write_text('{"version": 0, "names": ["S3"]}')
+    assert len(FullTextIndex.load(str(path))) == 0
@@ -0,0 +1,137 @@
+"""Round tokens, single use across processes and guesses through HangmanApi"""
+import pytest
+
+import hangman_api
+from hangman_api import ApiError, HangmanApi, TokenCodec, UsedTokens, used_tokens_path
+
+SECRET = b"test-secret"
+
+
+def test_token_round_trip():
+    codec = TokenCodec(SECRET)
+    state = (2 ** 64 - 1, 17, 0xBEEF, (1 << 36) - 1, 6, 3, 1760000000, 12345)
+    token = codec.encode(*state)
+    assert codec.decode(token) == state
+    # URL-safe and unpadded, so it can travel in a query string
+    assert "=" not in token and "+" not in token and "/" not in token
+
+
+def test_tampered_token_is_rejected():
+    codec = TokenCodec(SECRET)
+    token = codec.encode(1, 2, 3, 0, 6, 0, 1760000000, 0)
+    tampered = token[:10] + ("A" if token[10] != "A" else "B") + token[11:]
+    with pytest.raises(ApiError) as error:
+        codec.decode(tampered)
+    assert error.value.status == 403
+
+
+def test_token_from_another_key_is_rejected():
+    token = TokenCodec(b"other-secret").encode(1, 2, 3, 0, 6, 0, 1760000000, 0)
+    with pytest.raises(ApiError) as error:
+        TokenCodec(SECRET).decode(token)
+    assert error.value.status == 403
+
+
+@pytest.mark.parametrize("token", ["", "not a token!", "QUJD"])
+def test_malformed_token_is_rejected(token):
+    with pytest.raises(ApiError) as error:
+        TokenCodec(SECRET).decode(token)
+    assert error.value.status in (400, 403)
+
+
+def test_used_tokens_in_memory():
+    used = UsedTokens(ttl=100)
+    assert used.claim(1, 0, 1000, now=1000)
+    assert not used.claim(1, 0, 1000, now=1001)
+    assert used.claim(1, 1, 1000, now=1002)
+    # An older token of the same round stays used
+    assert not used.claim(1, 0, 1000, now=1003)
+    # Rounds are forgotten once expired
+    assert used.claim(1, 0, 1000, now=1101)
+
+
+def test_used_tokens_are_shared_through_the_journal(tmp_path):
+    path = str(tmp_path / "aws_services.used_tokens.log")
+    first, second = UsedTokens(path), UsedTokens(path)
+    assert first.claim(7, 0, 1000, now=1000)
+    assert not second.claim(7, 0, 1000, now=1000)
+    assert second.claim(7, 1, 1000, now=1000)
+    assert not first.claim(7, 1, 1000, now=1000)
+    # A process starting later reads what the others accepted
+    assert not UsedTokens(path).claim(7, 1, 1000, now=1000)
+
+
+def test_rotated_journal_keeps_live_rounds(tmp_path, monkeypatch):
+    monkeypatch.setattr(hangman_api, "JOURNAL_ROTATE_BYTES", 200)
+    path = str(tmp_path / "aws_services.used_tokens.log")
+    first, second = UsedTokens(path, ttl=100), UsedTokens(path, ttl=100)
+    assert second.claim(1, 0, 1000, now=1000)
+    for round_id in range(2, 20):
+        assert first.claim(round_id, 0, 1050, now=1050)
+    journal_id = first.journal_id
+    # Rotating at t=1150 drops round 1 but keeps the rounds started at 1050
+    assert first.claim(20, 0, 1150, now=1150)
+    assert first.journal_id != journal_id
+    assert not second.claim(5, 0, 1050, now=1150)
+    assert second.claim(1, 0, 1150, now=1150)
+
+
+def test_partial_line_is_dropped(tmp_path):
+    path = str(tmp_path / "aws_services.used_tokens.log")
+    assert UsedTokens(path).claim(1, 0, 1000, now=1000)
+    with open(path, 'ab') as file:
+        file.write(b"[2, 0, 10")
+    used = UsedTokens(path)
+    assert not used.claim(1, 0, 1000, now=1000)
+    assert used.claim(3, 0, 1000, now=1000)
+    fresh = UsedTokens(path)
+    assert not fresh.claim(1, 0, 1000, now=1000)
+    assert not fresh.claim(3, 0, 1000, now=1000)
+    assert fresh.claim(2, 0, 1000, now=1000)
+
+
+def test_used_tokens_path_sits_next_to_the_catalog(tmp_path):
+    assert used_tokens_path(str(tmp_path / "aws_services.json")) == str(tmp_path / "aws_services.used_tokens.log")
+    assert used_tokens_path(str(tmp_path)) == str(tmp_path / ".used_tokens.log")
+
+
+def test_token_cannot_be_replayed_on_another_server(game_module, catalog_file):
+    first = HangmanApi(game_module.AwsHangman(catalog_file), SECRET)
+    second = HangmanApi(game_module.AwsHangman(catalog_file), SECRET)
+    token = first.start_round()["token"]
+    following = first.guess(token, "E")["token"]
+    with pytest.raises(ApiError) as error:
+        second.guess(token, "A")
+    assert error.value.status == 409
+    assert "token" in second.guess(following, "A")
+
+
+def service_of(api, token):
+    """Service a round is about, read back from its token"""
+    index = api.codec.decode(token)[1]
+    return api.snapshot()[1][index]
+
+
+def test_finished_round_is_recorded_once_across_servers(game_module, catalog_file):
+    first = HangmanApi(game_module.AwsHangman(catalog_file), SECRET)
+    second = HangmanApi(game_module.AwsHangman(catalog_file), SECRET)
+    token = first.start_round(player="alice")["token"]
+    final = second.guess(token, service_of(first, token), player="alice")
+    assert final["game_over"] and final["won"]
+    # Replaying the winning guess elsewhere is refused, so the round counts once
+    with pytest.raises(ApiError):
+        first.guess(token, service_of(first, token), player="alice")
+    standings = first.standings(player="alice")
+    assert standings["player"]["games"] == 1
+    assert standings["player"]["score"] == final["points"] > 0
+
+
+def test_round_belongs_to_its_player(game_module, catalog_file):
+    api = HangmanApi(game_module.AwsHangman(catalog_file), SECRET)
+    token = api.start_round(player="alice")["token"]
+    with pytest.raises(ApiError) as error:
+        api.guess(token, "E", player="mallory")
+    assert error.value.status == 403
+    anonymous = api.start_round()["token"]
+    with pytest.raises(ApiError):
+        api.guess(anonymous, "E", player="mallory")
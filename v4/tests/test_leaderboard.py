@@ -0,0 +1,149 @@
+import bisect
+import random
+
+import pytest
+
+import leaderboard
+from leaderboard import Leaderboard, LeaderboardStore, RankedSkipList, leaderboard_paths
+
+
+def check_against(skiplist, expected):
+    assert len(skiplist) == len(expected)
+    assert list(skiplist) == expected
+    assert skiplist.first(5) == expected[:5]
+    for index, key in enumerate(expected):
+        assert skiplist[index] == key
+        assert skiplist.rank(key) == index
+    if expected:
+        assert skiplist[-1] == expected[-1]
+
+
+@pytest.mark.parametrize("prefilled", [0, 200])
+def test_skiplist_matches_a_sorted_list(prefilled):
+    rng = random.Random(prefilled)
+    # Keys are tuples, like the leaderboard's (-score, seq, player)
+    expected = sorted((key,) for key in rng.sample(range(10000), prefilled))
+    skiplist = RankedSkipList.from_sorted(expected)
+    check_against(skiplist, expected)
+    for step in range(2000):
+        if expected and rng.random() < 0.4:
+            key = expected.pop(rng.randrange(len(expected)))
+            skiplist.remove(key)
+        else:
+            key = (rng.randrange(10000),)
+            if key in expected:
+                continue
+            bisect.insort(expected, key)
+            skiplist.insert(key)
+        if step % 100 == 0:
+            check_against(skiplist, expected)
+    check_against(skiplist, expected)
+
+
+def test_skiplist_errors():
+    skiplist = RankedSkipList.from_sorted([(1,), (2,), (3,)])
+    with pytest.raises(KeyError):
+        skiplist.remove((4,))
+    with pytest.raises(IndexError):
+        skiplist[3]
+    assert skiplist.rank((2.5,)) == 2
+
+
+def naive_standings(results):
+    """(player, score) best first, ties going to whoever reached the score first"""
+    totals, reached = {}, {}
+    for seq, (player, points) in enumerate(results):
+        if player not in totals or points:
+            reached[player] = seq
+        totals[player] = totals.get(player, 0) + points
+    return sorted(totals.items(), key=lambda item: (-item[1], reached[item[0]]))
+
+
+def test_leaderboard_ranks_and_dedupes_rounds():
+    rng = random.Random(7)
+    board = Leaderboard()
+    results = []
+    for round_number in range(500):
+        player, points = f"player{rng.randrange(40)}", rng.choice([0, 0, 5, 10, 25])
+        assert board.record(player, points, points > 0, round_id=f"round{round_number}")
+        results.append((player, points))
+        # A retried round is not counted twice
+        assert not board.record(player, points, points > 0, round_id=f"round{round_number}")
+
+    expected = naive_standings(results)
+    assert [(row["player"], row["score"]) for row in board.top(len(expected))] == expected
+    for rank, (player, _) in enumerate(expected, 1):
+        assert board.rank(player) == rank
+    assert board.rank("nobody") is None
+    assert sum(row["games"] for row in board.top(100)) == 500
+
+    # A snapshot round-trip keeps the ranking and the recent round ids
+    restored = Leaderboard.from_snapshot(board.to_snapshot())
+    assert restored.top(100) == board.top(100)
+    assert not restored.record("player1", 10, True, round_id="round3")
+
+
+def store_for(catalog_file, interval=3600.0):
+    return LeaderboardStore.open(catalog_file, snapshot_interval=interval)
+
+
+def test_processes_replay_the_shared_journal(catalog_file):
+    first, second = store_for(catalog_file), store_for(catalog_file)
+    first.record("alice", 10, True, "r1")
+    second.record("bob", 25, True, "r2")
+    # The same round reported through the other process is not counted again
+    second.record("alice", 10, True, "r1")
+    first.record("carol", 5, True, "r3")
+
+    standings = first.standings(count=10, player="bob")
+    assert [row["player"] for row in standings["top"]] == ["bob", "alice", "carol"]
+    assert standings["player"]["rank"] == 1
+    assert second.refresh().top(10) == first.board.top(10)
+
+    # A restart replays the journal written since the last snapshot
+    first.snapshot()
+    second.record("carol", 30, True, "r4")
+    restarted = store_for(catalog_file)
+    assert restarted.board.top(10) == second.refresh().top(10)
+    assert restarted.board.entry("carol")["score"] == 35
+
+
+def test_partial_lines_wait_for_the_writer(catalog_file):
+    store = store_for(catalog_file)
+    store.record("alice", 10, True, "r1")
+    _, journal_path = leaderboard_paths(catalog_file)
+    with open(journal_path, 'ab') as file:
+        file.write(b'["bob", 5, tr')
+    assert len(store.refresh()) == 1
+    with open(journal_path, 'ab') as file:
+        file.write(b'ue, "r2"]\n')
+    assert store.refresh().entry("bob")["score"] == 5
+
+
+def test_rotated_journal_is_picked_up_by_other_processes(catalog_file, monkeypatch):
+    monkeypatch.setattr(leaderboard, "JOURNAL_ROTATE_BYTES", 200)
+    writer, reader = store_for(catalog_file, interval=0), store_for(catalog_file)
+    for number in range(20):
+        writer.record(f"player{number % 3}", number, True, f"r{number}")
+    assert writer.offset < 200
+    assert reader.refresh().top(10) == writer.board.top(10)
+    assert store_for(catalog_file).board.top(10) == writer.board.top(10)
+
+
+def test_crash_during_rotation_keeps_the_snapshot(catalog_file, monkeypatch):
+    monkeypatch.setattr(leaderboard, "JOURNAL_ROTATE_BYTES", 0)
+    store = store_for(catalog_file)
+    store.record("alice", 10, True, "r1")
+    # Snapshot written for a new journal, but the process died before starting it
+    def crash(self, journal_id=None):
+        raise OSError("crash")
+    monkeypatch.setattr(LeaderboardStore, "start_journal", crash)
+    with pytest.raises(OSError):
+        store.snapshot()
+    monkeypatch.undo()
+    assert store.read_snapshot()["journal"] != store.read_journal_header()[0]
+
+    restarted = store_for(catalog_file)
+    assert restarted.board.entry("alice")["score"] == 10
+    restarted.record("bob", 5, False, "r2")
+    assert store_for(catalog_file).board.top(10) == restarted.board.top(10)
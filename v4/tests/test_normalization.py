@@ -0,0 +1,17 @@
+from aws_service_updater import SERVICE_ALIAS_TOKENS, AwsServiceUpdater
+from benchmarks.bench_normalize import legacy_normalize_service_name, load_corpus
+
+
+def test_service_families_keep_the_legacy_mapping(catalog_file):
+    updater = AwsServiceUpdater(catalog_file)
+    family_keys = set(SERVICE_ALIAS_TOKENS.values())
+    for name in load_corpus():
+        legacy = legacy_normalize_service_name(name)
+        if legacy in family_keys:
+            assert updater.normalize_service_name(name) == legacy, name
+
+
+def test_glacier_is_filed_under_s3(catalog_file):
+    updater = AwsServiceUpdater(catalog_file)
+    assert updater.normalize_service_name("Amazon S3 Glacier") == "S3"
+    assert updater.normalize_service_name("Amazon Simple Storage Service (S3)") == "S3"
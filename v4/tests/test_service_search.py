@@ -0,0 +1,58 @@
+"""Search ranking through the ranked lists of common tokens, checked against scoring every match"""
+import random
+
+import pytest
+
+import service_search
+from service_search import ServiceIndex, rank_key
+
+WORDS = ("data", "service", "managed", "stream", "storage", "queue", "cache", "graph", "ledger", "search")
+
+
+def catalog(count, seed=0):
+    rng = random.Random(seed)
+    return {f"{rng.choice('ABCDEFGH')}{rng.choice('IJKLMNOP')}{number}": {"description": " ".join(rng.sample(WORDS, 4))}
+            for number in range(count)}
+
+
+def scored_search(index, query, limit):
+    """Reference: score every matching service, then sort"""
+    scores = index.term_scores(query)
+    return [name for name, _ in sorted(scores.items(), key=lambda item: (-item[1], *rank_key(item[0])))[:limit]]
+
+
+@pytest.fixture
+def small_lists(monkeypatch):
+    monkeypatch.setattr(service_search, "MAX_WORD_POSTINGS", 50)
+    monkeypatch.setattr(service_search, "TOP_POSTINGS", 8)
+
+
+@pytest.mark.parametrize("query", ["data", "stor", "managd", "a1", "queue", "ledgers", "AI1"])
+def test_common_words_rank_like_full_scoring(small_lists, query):
+    index = ServiceIndex.build(catalog(400))
+    for limit in (1, 5, 20):
+        assert index.search(query, limit) == scored_search(index, query, limit)
+
+
+def test_ranked_lists_follow_edits(small_lists):
+    services = catalog(400)
+    index = ServiceIndex.build(services)
+    rng = random.Random(1)
+    # Remove and re-add the best-ranked services, which the ranked lists hold
+    for name in sorted(services, key=rank_key)[:40] + rng.sample(list(services), 100):
+        if rng.random() < 0.5:
+            index.remove(name)
+        else:
+            index.update(name, {"description": services[name]["description"] + " data"})
+        for query in ("data", "service", "cache"):
+            assert index.search(query, 10) == scored_search(index, query, 10)
+
+
+def test_search_finds_names_and_typos():
+    index = ServiceIndex.build({"DYNAMODB": {"description": "Key-value and document database"},
+                                "DOCUMENTDB": {"description": "MongoDB compatible document database"},
+                                "S3": {"description": "Object storage"}})
+    assert index.search("dynamo") == ["DYNAMODB"]
+    assert index.search("dynamdb") == ["DYNAMODB"]
+    assert index.search("document database") == ["DOCUMENTDB", "DYNAMODB"]
+    assert index.search("storage") == ["S3"]
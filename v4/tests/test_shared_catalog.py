@@ -0,0 +1,108 @@
+import json
+import os
+
+import pytest
+
+from catalog_model import DIFFICULTIES, CatalogError, parse_catalog
+from shared_catalog import CatalogPublisher, SharedCatalog, SharedCatalogClient, attach_segment, encode_catalog, segment_name
+
+
+@pytest.fixture
+def catalog(catalog_file):
+    """Bundled catalog with note entries, extra fields and non-ASCII text added"""
+    with open(catalog_file, 'r') as file:
+        data = json.load(file)
+    data["S3"]["note_entries"] = [{"kind": "recent_update", "text": "Conditional writes", "hash": "ab12", "added": "2026-10-01T09:00:00"}]
+    data["EC2"]["aliases"] = ["Elastic Compute Cloud"]
+    data["LAMBDA"]["description"] += " (λ functions, über-fast)"
+    return parse_catalog(data)
+
+
+@pytest.fixture
+def publisher():
+    publisher = CatalogPublisher(f"hangman-test-{os.getpid()}")
+    yield publisher
+    publisher.close()
+
+
+def test_layout_round_trip(catalog, publisher):
+    generation = publisher.publish(catalog)
+    client = SharedCatalogClient(publisher.name)
+    shared = client.refresh()
+    try:
+        assert shared.generation == generation
+        assert len(shared) == len(catalog)
+        assert list(shared) == sorted(catalog)
+        assert shared.to_dict() == {name: catalog[name].to_dict() for name in sorted(catalog)}
+        assert shared["S3"].note_entries == catalog["S3"].note_entries
+        assert "NOPE" not in shared and 5 not in shared
+        with pytest.raises(KeyError):
+            shared["NOPE"]
+
+        # Every filter gives the same services as the parsed catalog
+        assert shared.category_names() == catalog.category_names()
+        for category in catalog.category_names() + [None, "Unknown"]:
+            for difficulty in DIFFICULTIES + (None, "Impossible"):
+                assert sorted(shared.select(category, difficulty)) == sorted(catalog.select(category, difficulty))
+    finally:
+        client.close()
+
+
+def test_empty_catalog_round_trip(publisher):
+    publisher.publish(parse_catalog({}))
+    client = SharedCatalogClient(publisher.name)
+    shared = client.refresh()
+    assert len(shared) == 0 and shared.to_dict() == {} and list(shared.select(difficulty="Easy")) == []
+    client.close()
+
+
+def test_clients_move_to_new_versions(catalog, publisher):
+    publisher.publish(catalog)
+    client = SharedCatalogClient(publisher.name)
+    first = client.refresh()
+    assert client.refresh() is None
+
+    edited = catalog.to_dict()
+    edited["S3"]["description"] = "Edited"
+    del edited["EC2"]
+    publisher.publish(parse_catalog(edited))
+
+    # The old version stays readable until it is dropped
+    second = client.refresh()
+    assert second.generation == first.generation + 1
+    assert first["S3"].description != "Edited" and "EC2" in first
+    assert second["S3"].description == "Edited" and "EC2" not in second
+    # Replaced versions are unlinked straight away
+    with pytest.raises(FileNotFoundError):
+        attach_segment(segment_name(publisher.name, first.generation))
+    del first
+    client.close()
+
+
+def test_publisher_takes_over_after_a_crash(catalog):
+    name = f"hangman-crash-{os.getpid()}"
+    crashed = CatalogPublisher(name)
+    crashed.publish(catalog)
+    # Killed without close(): the next publisher removes what it left and carries on
+    successor = CatalogPublisher(name)
+    try:
+        assert successor.publish(catalog) == 2
+        with pytest.raises(FileNotFoundError):
+            attach_segment(segment_name(name, 1))
+        client = SharedCatalogClient(name)
+        assert client.refresh().generation == 2
+        client.close()
+    finally:
+        successor.close()
+        crashed.segment.close()
+        crashed.control.close()
+
+
+def test_missing_or_foreign_segments_are_rejected(publisher):
+    with pytest.raises(CatalogError):
+        SharedCatalogClient(f"hangman-missing-{os.getpid()}")
+    assert encode_catalog({}, 1)[:8] == b"AWSHCAT1"
+    publisher.publish(parse_catalog({}))
+    segment = attach_segment(publisher.name)
+    with pytest.raises(CatalogError):
+        SharedCatalog(segment)
@@ -0,0 +1,67 @@
+"""What's New streaming against a recorded listing API, including a page that fails"""
+import json
+
+import pytest
+
+from aws_service_updater import WHATS_NEW_PAGE_SIZE, AwsServiceUpdater, whats_new_page_url
+from replay import replay_session, write_archive
+
+CATALOG = {"S3": {"description": "Object storage", "category": "Storage", "difficulty": "Easy", "certification_notes": ""}}
+
+# Three full pages and a short last one, newest first
+ANNOUNCEMENTS = 3 * WHATS_NEW_PAGE_SIZE + 10
+
+
+def listing_pages(failing_page=None):
+    """Recorded listing API responses, with failing_page answering 503"""
+    responses = {}
+    for page in range(ANNOUNCEMENTS // WHATS_NEW_PAGE_SIZE + 1):
+        numbers = range(page * WHATS_NEW_PAGE_SIZE, min((page + 1) * WHATS_NEW_PAGE_SIZE, ANNOUNCEMENTS))
+        items = [{"item": {"id": f"post-{number}", "additionalFields": {
+            "headline": f"S3 adds feature {number}",
+            "postDateTime": f"2026-10-17T{23 - number // 60:02d}:{59 - number % 60:02d}:00Z",
+            "postBody": f"<p>Feature {number}</p>",
+        }}} for number in numbers]
+        body = json.dumps({"items": items}).encode('utf-8')
+        status = 503 if page == failing_page else 200
+        responses[whats_new_page_url(page)] = (status, {"Content-Type": "application/json"}, body)
+    return responses
+
+
+def make_updater(tmp_path, failing_page=None):
+    """Updater over a one-service catalog in tmp_path, replaying the listing API"""
+    services_file = tmp_path / "aws_services.json"
+    if not services_file.exists():
+        services_file.write_text(json.dumps(CATALOG))
+    archive = tmp_path / f"pages-{failing_page}.zip"
+    write_archive(str(archive), listing_pages(failing_page))
+    return AwsServiceUpdater(str(services_file), session=replay_session(str(archive)), stream_whats_new=True,
+                             whats_new_bootstrap_days=36500)
+
+
+def test_reads_every_page_then_stops_at_the_mark(tmp_path, capsys):
+    updater = make_updater(tmp_path)
+    announcements = updater.collect_whats_new()
+    assert len(announcements) == ANNOUNCEMENTS
+    updater.merge_announcements(announcements)
+    assert updater.whats_new_state == {"post_date": "2026-10-17T23:59:00Z", "ids": ["post-0"]}
+    assert updater.collect_whats_new() == []
+
+
+@pytest.mark.parametrize("failing_page", [0, 1, 2, 3])
+def test_failed_page_keeps_the_mark(tmp_path, capsys, failing_page):
+    # An earlier run left the mark at the oldest announcement, so every page is new
+    mark = {"post_date": "2026-10-17T22:35:00Z", "ids": [f"post-{ANNOUNCEMENTS - 1}"]}
+    updater = make_updater(tmp_path, failing_page)
+    updater.whats_new_state = dict(mark)
+    announcements = updater.collect_whats_new()
+    assert len(announcements) == failing_page * WHATS_NEW_PAGE_SIZE
+    updater.merge_announcements(announcements)
+    assert updater.whats_new_state == mark
+    assert "Keeping the What's New high-water mark" in capsys.readouterr().out
+
+    # The next run reads everything the failed one missed
+    next_run = make_updater(tmp_path)
+    next_run.whats_new_state = updater.whats_new_state
+    titles = [title for title, _, _ in next_run.collect_whats_new()]
+    assert titles == [f"S3 adds feature {number}" for number in range(ANNOUNCEMENTS - 1)]
@@ -0,0 +1,191 @@
+import json
+import math
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+# Number of change messages kept in memory for the end-of-run listing
+MAX_LOGGED_MESSAGES = 1000
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers (0 for an empty list)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class PhaseStats:
+    """Timing, request and error totals collected for one update phase"""
+
+    def __init__(self, name):
+        self.name = name
+        self.durations = []
+        self.cpu_times = []
+        self.request_latencies = []
+        self.requests = 0
+        self.bytes = 0
+        self.errors = 0
+        self.changes = 0
+
+    def summary(self):
+        """Summarize the phase as a JSON-serializable dict"""
+        wall = sum(self.durations)
+        return {
+            "phase": self.name,
+            "runs": len(self.durations),
+            "wall_seconds": round(wall, 4),
+            "cpu_seconds": round(sum(self.cpu_times), 4),
+            "requests": self.requests,
+            "bytes": self.bytes,
+            "errors": self.errors,
+            "changes": self.changes,
+            "pages_per_second": round(self.requests / wall, 2) if wall > 0 else 0.0,
+            "request_latency_p50": round(percentile(self.request_latencies, 50), 4),
+            "request_latency_p90": round(percentile(self.request_latencies, 90), 4),
+            "request_latency_p99": round(percentile(self.request_latencies, 99), 4),
+        }
+
+
+class UpdateLog:
+    """Structured event log for an updater run
+
+    Behaves like the old list of change messages (append, len, iteration)
+    while also recording timed phase spans, requests, errors and counters.
+    Every event can be streamed as a JSON line to a file or stdout.
+    """
+
+    def __init__(self, stream=None, max_messages=MAX_LOGGED_MESSAGES):
+        self.stream = stream
+        self.messages = deque(maxlen=max_messages)
+        self.total_changes = 0
+        self.phases = {}
+        self.counters = {}
+        # Phases can run concurrently, each on its own thread
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    @property
+    def current_phase(self):
+        """Phase running on the calling thread, if any"""
+        return getattr(self.local, 'phase', None)
+
+    @current_phase.setter
+    def current_phase(self, phase):
+        self.local.phase = phase
+
+    @classmethod
+    def open(cls, path):
+        """Create a log streaming JSON lines to path ('-' for stdout)"""
+        if not path:
+            return cls()
+        if path == '-':
+            return cls(sys.stdout)
+        return cls(open(path, 'a'))
+
+    def close(self):
+        """Close the JSON lines stream if we opened a file"""
+        if self.stream and self.stream not in (sys.stdout, sys.stderr):
+            self.stream.close()
+
+    def phase_stats(self, phase):
+        """Stats bucket for a phase, created on first use"""
+        phase = phase or "other"
+        stats = self.phases.get(phase)
+        if stats is None:
+            stats = self.phases.setdefault(phase, PhaseStats(phase))
+        return stats
+
+    def emit(self, event, **fields):
+        """Write one structured event to the JSON lines stream"""
+        if self.stream is None:
+            return
+        record = {"ts": datetime.now().isoformat(timespec='milliseconds'), "event": event}
+        if self.current_phase and "phase" not in fields:
+            record["phase"] = self.current_phase
+        record.update(fields)
+        with self.lock:
+            self.stream.write(json.dumps(record) + "\n")
+            self.stream.flush()
+
+    def append(self, message):
+        """Record a change to the catalog"""
+        with self.lock:
+            self.messages.append(message)
+            self.total_changes += 1
+            self.phase_stats(self.current_phase).changes += 1
+        self.emit("change", message=message)
+
+    def error(self, message, **fields):
+        """Record a failure; errors are still printed for interactive runs"""
+        print(message)
+        with self.lock:
+            self.phase_stats(self.current_phase).errors += 1
+        self.emit("error", message=message, **fields)
+
+    def increment(self, counter, amount=1):
+        """Bump a named counter (cache hits, skipped pages, ...)"""
+        with self.lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def record_request(self, url, status, nbytes, elapsed):
+        """Record one HTTP fetch in the current phase"""
+        with self.lock:
+            stats = self.phase_stats(self.current_phase)
+            stats.requests += 1
+            stats.bytes += nbytes
+            stats.request_latencies.append(elapsed)
+        self.emit("request", url=url, status=status, bytes=nbytes, seconds=round(elapsed, 4))
+
+    @contextmanager
+    def span(self, phase):
+        """Time a phase of the update (wall clock and CPU)"""
+        previous = self.current_phase
+        self.current_phase = phase
+        self.emit("phase_start")
+        start = time.perf_counter()
+        # Process-wide, so phases running at the same time each count the other's CPU too
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            cpu = time.process_time() - cpu_start
+            with self.lock:
+                stats = self.phase_stats(phase)
+                stats.durations.append(elapsed)
+                stats.cpu_times.append(cpu)
+            self.emit("phase_end", seconds=round(elapsed, 4), cpu_seconds=round(cpu, 4))
+            self.current_phase = previous
+
+    def summary(self):
+        """Per-phase latency, request and byte totals plus counters"""
+        return {
+            "changes": self.total_changes,
+            "phases": [stats.summary() for stats in self.phases.values()],
+            "counters": dict(self.counters),
+        }
+
+    def format_summary(self):
+        """Human readable version of summary() for the end of a run"""
+        lines = []
+        for phase in self.summary()["phases"]:
+            lines.append(
+                f"{phase['phase']:>6}: {phase['wall_seconds']:.2f}s wall, {phase['cpu_seconds']:.2f}s cpu, "
+                f"{phase['requests']} requests, {phase['bytes']} bytes, {phase['errors']} errors, "
+                f"p50/p90/p99 {phase['request_latency_p50']:.3f}/{phase['request_latency_p90']:.3f}/{phase['request_latency_p99']:.3f}s"
+            )
+        for counter, value in sorted(self.counters.items()):
+            lines.append(f"{counter}: {value}")
+        return "\n".join(lines)
+
+    def __len__(self):
+        return self.total_changes
+
+    def __iter__(self):
+        return iter(list(self.messages))